@@ -1,10 +1,13 @@
 from __future__ import annotations
 from typing import Union, List, Literal
-from dataclasses import dataclass
-import json
+from dataclasses import dataclass, fields, is_dataclass
+from bisect import bisect_left
+import io
+import re
+from visitor import Visitor
 
 
-@dataclass
+@dataclass(slots=True)
 class Type:
     value: Union[Literal['str_t', 'int_t', 'float_t', 'bool_t', 'none_t'],NonPrimitiveType]
 
@@ -15,13 +18,13 @@ class Type:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class NonPrimitiveType:
     type: Union['list', 'tuple']
     value: Type
 
 
-@dataclass
+@dataclass(slots=True)
 class Id:
     name: str
     def __init__(self, name):
@@ -29,13 +32,13 @@ class Id:
         self.name = name
 
 
-@dataclass
+@dataclass(slots=True)
 class Declaration:
     id: Id
     type: Type
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOperation:
     left: Id
     type: Type
@@ -43,7 +46,7 @@ class UnaryOperation:
     operand: Id
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOperation:
     left: Id
     type: Type
@@ -52,18 +55,18 @@ class BinaryOperation:
     operand_b: Id
 
 
-@dataclass
+@dataclass(slots=True)
 class Parameter:
     paramType: Type
     var: Id
 
 
-@dataclass
+@dataclass(slots=True)
 class ParameterLst:
     lst: List[Parameter]
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDeclaration:
     name: Id
     lst: ParameterLst
@@ -71,44 +74,44 @@ class FunctionDeclaration:
     returnType: Union[Type, None]
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt:
     ifCond: Id
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class ElifStmt:
     elifCond: Id
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class ElseStmt:
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt:
     cond: Id
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class RangeValues:
     stop: Union[Expression, None]
     start: Union[Expression, None]
     step: Union[Expression, None]
 
 
-@dataclass
+@dataclass(slots=True)
 class ForLoopRange:
     var: Id
     rangeVal: RangeValues
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class ForLoopList:
     var: Id
     indexVar : Id
@@ -117,65 +120,65 @@ class ForLoopList:
     body: Block
 
 
-@dataclass
+@dataclass(slots=True)
 class Expression:
     value: Union[BinaryOperation, UnaryOperation, Id]
 
 
-@dataclass
+@dataclass(slots=True)
 class ArgumentLst:
     lst: Union[List[Expression], List[Id], None]
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt:
     stmt: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall:
     name: Id
     lst: ArgumentLst
 
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     lst: List[Union[FunctionDeclaration, ReturnStmt, FunctionCall, ForLoopRange, ForLoopList, WhileStmt, \
                     IfStmt, ElifStmt, ElseStmt, BinaryOperation, UnaryOperation]]
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment:
     id: Id
     val: any
 
 
-@dataclass
+@dataclass(slots=True)
 class String:
     val: str
     len: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStatement:
     value: Id
 
 
-@dataclass
+@dataclass(slots=True)
 class PrimitiveLiteral:
     id: Id
     type: Type
     value: any
 
 
-@dataclass
+@dataclass(slots=True)
 class LstAdd:
     obj: Id
     value: any
     type: Type
     idx: Union[str, int]
 
-@dataclass
+@dataclass(slots=True)
 class NonPrimitiveIndex:
     result: Id
     obj: Id
@@ -183,13 +186,13 @@ class NonPrimitiveIndex:
     idx: Id
 
 
-@dataclass
+@dataclass(slots=True)
 class NonPrimitiveLiteral:
     head: Id
     type: NonPrimitiveType
     value: List[Union[Id, PrimitiveLiteral]]
 
-@dataclass
+@dataclass(slots=True)
 class NonPrimitiveSlicing:
     result_reg: Id
     obj: Id
@@ -197,10 +200,250 @@ class NonPrimitiveSlicing:
     end: Union[Id,None]
     type: NonPrimitiveType
 
-class CCodeGenerator:
+# Bytes a C string literal can't hold as they are, other than the unprintable ones
+C_ESCAPES = {ord('"'): '\\"', ord('\\'): '\\\\', ord('\n'): '\\n', ord('\t'): '\\t'}
+
+
+def c_string(value: str):
+    """ value as a C string literal of its UTF-8 bytes """
+    chars = []
+    for byte in value.encode():
+        if byte in C_ESCAPES:
+            chars.append(C_ESCAPES[byte])
+        elif 32 <= byte < 127:
+            chars.append(chr(byte))
+        else:
+            # Octal escapes stop after three digits, unlike hexadecimal ones
+            chars.append(f'\\{byte:03o}')
+    return '"' + ''.join(chars) + '"'
+
+
+class WrittenNames:
+    """
+    Which variables and registers a block writes to, itself or in any block
+    nested in it. One walk numbers the blocks so the blocks nested in a block
+    come right after it, and keeps the numbers of the blocks writing each name:
+    a block writes a name when one of them falls in its range. Asking about a
+    loop then never walks its body again, however deep loops are nested
+    """
+    def __init__(self, root: Block = None):
+        # (first, last) number of the blocks in each block, by id of the block
+        self.ranges = {}
+        # Numbers of the blocks writing each name, in increasing order
+        self.writers = {}
+        self.count = 0
+        if root is not None:
+            self.add(root)
+
+    def add(self, root: Block):
+        # (block, first number) once the blocks nested in it are numbered
+        stack = [(root, None)]
+        while stack:
+            block, first = stack.pop()
+            if first is not None:
+                self.ranges[id(block)] = (first, self.count - 1)
+                continue
+            number = self.count
+            self.count += 1
+            stack.append((block, number))
+            for statement in reversed(block.lst):
+                name = self.written(statement)
+                if name is not None:
+                    numbers = self.writers.setdefault(name, [])
+                    if not numbers or numbers[-1] != number:
+                        numbers.append(number)
+                body = getattr(statement, 'body', None)
+                if isinstance(body, Block):
+                    stack.append((body, None))
+
+    @staticmethod
+    def written(statement):
+        if isinstance(statement, (Assignment, Declaration)):
+            return statement.id.name
+        if isinstance(statement, (BinaryOperation, UnaryOperation)):
+            return statement.left.name
+        if isinstance(statement, NonPrimitiveLiteral):
+            return statement.head.name
+        if isinstance(statement, NonPrimitiveIndex):
+            return statement.result.name
+        if isinstance(statement, (ForLoopRange, ForLoopList)):
+            return statement.var.name
+        return None
+
+    def writes(self, block: Block, name):
+        if id(block) not in self.ranges:
+            self.add(block)
+        first, last = self.ranges[id(block)]
+        numbers = self.writers.get(name, [])
+        i = bisect_left(numbers, first)
+        return i < len(numbers) and numbers[i] <= last
+
+def list_min_lengths(block: Block):
+    """
+    Lower bound on the length of every list variable that is only ever
+    written once, by assigning it a list literal. Lists never shrink, so the
+    length of the literal holds wherever the variable is in scope
+    """
+    writes, literals, sources = {}, {}, {}
+    stack = [block]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+            continue
+        if not is_dataclass(node):
+            continue
+        written = None
+        if isinstance(node, Assignment):
+            written = node.id
+            if isinstance(node.val, str):
+                sources[node.id.name] = node.val
+        elif isinstance(node, NonPrimitiveLiteral):
+            written = node.head
+            literals[node.head.name] = len(node.value)
+        elif isinstance(node, (BinaryOperation, UnaryOperation)):
+            written = node.left
+        elif isinstance(node, NonPrimitiveIndex):
+            written = node.result
+        elif isinstance(node, NonPrimitiveSlicing):
+            written = node.result_reg
+        elif isinstance(node, (ForLoopRange, ForLoopList, Parameter)):
+            written = node.var
+        if isinstance(written, Id):
+            writes[written.name] = writes.get(written.name, 0) + 1
+        stack.extend(getattr(node, f.name) for f in fields(node))
+    return {name: literals[source] for name, source in sources.items()
+            if source in literals and writes[name] == 1 and writes[source] == 1}
+
+def may_append(block: Block, name, defined_functions, appending_functions):
+    """
+    Whether running a block can append to a list, directly or through a call
+    to a function that can. Calls to name, the function the block belongs to,
+    are covered by the block itself. Calls to functions that are not defined
+    yet are assumed to append.
+    """
+    stack = [block]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+        elif isinstance(node, LstAdd):
+            return True
+        elif isinstance(node, FunctionCall):
+            called = node.name
+            if called != name and not called.startswith(('print_', 'input_')) and \
+                    (called not in defined_functions or called in appending_functions):
+                return True
+            stack.extend(node.lst)
+        elif is_dataclass(node):
+            stack.extend(getattr(node, f.name) for f in fields(node))
+    return False
+
+def appendable_strings(block: Block):
+    """
+    String variables of a block that `s = s + x` can extend in place. Each one
+    is only ever assigned a new string, so it never shares its buffer with
+    another variable, and is only read by concatenations and prints, so its
+    buffer is never shared later either
+    """
+    strings, fresh, shared = set(), set(), set()
+    assignments = []
+    stack = [block]
+    while stack:
+        node = stack.pop()
+        # Pushed in reverse, so nodes are visited in program order
+        if isinstance(node, (list, tuple)):
+            stack.extend(reversed(node))
+        elif isinstance(node, Declaration):
+            if node.type.value == 'str_t':
+                strings.add(node.id.name)
+        elif isinstance(node, BinaryOperation):
+            # The operands are only read, and a concatenation is always a new string
+            if node.type.value == 'str_t' and node.operator == '+':
+                fresh.add(node.left.name)
+            else:
+                shared.add(node.left.name)
+        elif isinstance(node, Assignment):
+            assignments.append(node)
+            if isinstance(node.val, FunctionCall):
+                stack.append(node.val)
+        elif isinstance(node, FunctionCall):
+            if not node.name.startswith('print_'):
+                shared.update(node.lst)
+        elif isinstance(node, ReturnStatement):
+            # The variable is gone once its value is returned
+            continue
+        elif isinstance(node, Id):
+            shared.add(node.name)
+        elif isinstance(node, str):
+            shared.add(node)
+        elif is_dataclass(node):
+            stack.extend(getattr(node, f.name) for f in reversed(fields(node)))
+    # Registers holding a new string. The IR reads each register once, so
+    # handing one to a variable does not share it
+    for node in assignments:
+        value = node.val
+        if isinstance(value, String) or (isinstance(value, str) and value in fresh) or \
+                (isinstance(value, FunctionCall) and value.name.startswith('input_')):
+            if node.id.name[0] == '_':
+                fresh.add(node.id.name)
+            continue
+        if isinstance(value, Id):
+            shared.add(value.name)
+        elif isinstance(value, str):
+            shared.add(value)
+        shared.add(node.id.name)
+    return strings - shared
+
+class CodeEmitter:
+    """
+    Writes the nested line structure produced by CCodeGenerator to a file
+    handle, one line at a time.
+
+    A temporary list register is renamed to the variable it got assigned to
+    while its line is written, so every line is renamed exactly once.
+    Only whole identifiers are renamed, never parts of them or string literals.
+    """
+    token_pattern = re.compile(r'"(?:\\.|[^"\\])*"|\b_\w+')
+
+    def __init__(self, out=None, renames=None):
+        self.out = out if out is not None else io.StringIO()
+        self.renames = {tmp: var for tmp, var in (renames or {}).items() if var is not None}
+
+    def getvalue(self):
+        return self.out.getvalue()
+
+    def write(self, text):
+        self.out.write(text)
+
+    def write_structure(self, structure, indent=0):
+        for line in structure:
+            if line is None:
+                continue
+            if isinstance(line, tuple):
+                self.write_structure(line, indent)
+            elif isinstance(line, list):
+                self.write_structure(line, indent + 1)
+            else:
+                self.out.write("    " * indent + self.rename(line) + "\n")
+
+    def rename(self, line):
+        if not self.renames:
+            return line
+        return self.token_pattern.sub(self._rename_token, line)
+
+    def _rename_token(self, match):
+        token = match.group(0)
+        return self.renames.get(token, token)
+
+class CCodeGenerator(Visitor):
+    prefix = 'gen_'
+
     def __init__(self):
         self.function_declarations = []
         self.function_definitions = []
+        # Element types of every print function for several values, by name
+        self.print_functions = {}
         self.state_in_function_declaration = False
         self.temp_dict = {}
         self.temp_list_dict = {}
@@ -208,95 +451,74 @@ class CCodeGenerator:
         self.decl_scope = [[]]
         self.list_type_dict = {}
         self.list_decl_dict = []
-        self.list_len_dict = {}
-        self.converted_str_lst = {}
-        self.propagation = {} # [variable_value, scope_counter, state] state being whether the variable should be propgated or not
-        self.scope_counter = 0
-
-        self.is_inloop = False
-        self.pre_run = False
-        self.eval_mode = True  # Optimization flag
-        self.variants = []
-        self.var_dict = {}
-        #self.var_dict = {'true':'true','false':'false','NONE_LITERAL':'NONE_LITERAL'}
-        self.has_if_head = False
-        self.ignore_if = False
-
-    def generate_code(self, root):
+        self.defined_functions = set()
+        self.appending_functions = set()
+        # Return type of the function being generated if it runs in its own memory region
+        self.region_return_type = None
+        # C type of every variable and register declared in the function being
+        # generated, or in the main program outside of functions
+        self.declared_types = {}
+        self.appendable_strings = set()
+        self.list_min_lengths = {}
+        self.written_names = WrittenNames()
+        # (lowest, highest) value of each for range loop variable whose loop body is being generated
+        self.index_ranges = {}
+        # Operands of every string concatenation, by the register it is stored in
+        self.str_concats = {}
+        # Name of the static data of every distinct string literal
+        self.strings = {}
+
+    def generate_code(self, root, out=None):
+        """
+        Generate the C program for root. The program is streamed to the file
+        handle out if one is given, otherwise it is returned as a string.
+        """
+        self.appendable_strings = appendable_strings(root)
+        self.list_min_lengths = list_min_lengths(root)
+        self.written_names = WrittenNames(root)
         structure = self.gen(root)
-        formatted = self.generate_code_formatter(structure)
-        declarations_str, definitions_str = self.generate_function_code()
-        return self.code_template(declarations_str, definitions_str, formatted)
-
-    def generate_function_code(self):
-        declarations_str = ";\n".join(self.function_declarations)
-        if len(declarations_str) != 0: declarations_str += ';'
-        definitions_str = ""
-        for definition in self.function_definitions:
-            formatted = self.generate_code_formatter(definition)
-            definitions_str += formatted
-        return declarations_str, definitions_str
-
-    def generate_code_formatter(self, structure, indent=0):
-        result = ""
-        for line in structure:
-            if line is None:
-                continue
-            if isinstance(line, tuple):
-                code = self.generate_code_formatter(line, indent)
-            elif isinstance(line, list):
-                code = self.generate_code_formatter(line, indent + 1)
-            else:
-                code = "    " * indent + line + "\n"
-            result += code
-        for tmp in self.temp_list_dict.keys():
-            var = self.temp_list_dict[tmp]
-            if var != None:
-                result = result.replace(tmp, var)
-        return result
-
-    def code_template(self, function_declarations, function_definitions, main_code):
-        if len(function_declarations) == 0:
-            function_code = ""
-        else:
-            function_code = f"""
-/***** Function declarations *****/
-{function_declarations}
-/***** End of function declarations *****/
-
-/***** Function definitions *****/
-{function_definitions}
-/***** End of function definitions *****/
-        """.strip() + '\n'
-
-        return f"""
-#include "../starter.c"
-
-{function_code}
-int main() {{
-/***** Main *****/
-{main_code}
+        emitter = CodeEmitter(out, self.temp_list_dict)
+        self.code_template(emitter, structure)
+        if out is None:
+            return emitter.getvalue()
+
+    def code_template(self, emitter, main_structure):
+        emitter.write('#include "starter.h"\n\n')
+        if self.strings:
+            emitter.write("/***** String constants *****/\n")
+            for value, name in self.strings.items():
+                emitter.write(f"static const char {name}[] = {c_string(value)};\n")
+            emitter.write("/***** End of string constants *****/\n\n")
+        if self.print_functions:
+            emitter.write("/***** Print functions *****/\n")
+            for name, types in self.print_functions.items():
+                emitter.write_structure(self.print_function(name, types))
+            emitter.write("/***** End of print functions *****/\n\n")
+        if len(self.function_declarations) != 0:
+            emitter.write("/***** Function declarations *****/\n")
+            emitter.write(";\n".join(self.function_declarations) + ";\n")
+            emitter.write("/***** End of function declarations *****/\n\n")
+            emitter.write("/***** Function definitions *****/\n")
+            for definition in self.function_definitions:
+                emitter.write_structure(definition)
+            emitter.write("\n/***** End of function definitions *****/\n")
+        emitter.write("\nint main() {\n    output_init();\n\n/***** Main *****/\n")
+        emitter.write_structure(main_structure)
+        emitter.write("""
 /***** End of main *****/
 
-    str_clean_up();
-    list_clean_up();
+    arena_free();
 
     return 0;
-}}
-        """.strip() + '\n'
+}
+""")
 
     def gen(self, node):
-        method = 'gen_' + node.__class__.__name__
-        try:
-            return getattr(self, method)(node)
-        except AttributeError:
-            print(f"Trying to process node {node}")
-            raise
+        return self.visit(node)
 
     def gen_Block(self, node: Block):
         result = []
         self.decl_scope.append([])
-        self.scope_counter += 1
         for x in node.lst:
             code = self.gen(x)
             if code:
@@ -308,7 +530,6 @@ int main() {{
                 else:
                     result.append(code)
         self.decl_scope.pop()
-        self.scope_counter -= 1
         return result
 
     def gen_Expression(self, node: Expression):
@@ -320,7 +541,8 @@ int main() {{
     def gen_Declaration(self, node: Declaration):
         type_t = self.gen(node.type)
         name = self.gen(node.id)
-        if type_t == "list_t *":
+        self.declared_types[name] = type_t
+        if type_t.endswith("_list_t *"):
             self.list_type_dict[name] = type_t
             return None
         if name[0] == '_':
@@ -338,92 +560,102 @@ int main() {{
             return node.value
         else:
             assert node.value.type in ['list', 'tuple']
-            return "list_t *"
+            return f"{self.list_element(node)}_list_t *"
 
     def gen_UnaryOperation(self, node: UnaryOperation):
         left = self.gen(node.left)
-        op = self.gen(node.operand)
+        op = self.get_val(self.gen(node.operand))
         operator = self.convert_operator(node.operator)
-        if self.eval_mode:
-            if not self.pre_run:
-                if left[0] == "_":
-                    if op[0] == "_":
-                        op = self.look_up_temp(op)
-                    self.temp_dict[left] = f'({operator} {op})'
-                else:
-                    value = self._eval(node)
-                    if node.type.value == "int_t" and isinstance(value,float):
-                        value = int(value)
-                    self.var_dict[left] = value
-                    return f"({left} = {value});"
-            elif left[0] != "_" and left not in self.variants:
-                self.variants.append(left)
+        if left[0] == "_":
+            self.temp_dict[left] = f'({operator} {op})'
         else:
-            if left[0] == "_":
-                self.temp_dict[left] = f'({operator} {op})'
-            else:
-                return f"{self.gen(node.left)} = ({operator} {self.gen(node.operand)});"
+            return f"{left} = ({operator} {op});"
 
     def gen_BinaryOperation(self, node: BinaryOperation):
         left = self.gen(node.left)
         operator = self.convert_operator(node.operator)
         op_a = self.get_val(self.gen(node.operand_a))
         op_b = self.get_val(self.gen(node.operand_b))
-        if self.eval_mode:
-            if not self.pre_run:
-                if left[0] == "_":
-                    op_a = self._eval(node.operand_a)
-                    op_b = self._eval(node.operand_b)
-                    if node.type.value == 'int_t':
-                        if isinstance(op_a,float):
-                            op_a = int(op_a)
-                        if isinstance(op_b,float):
-                            op_b = int(op_b)
-                    if type(op_a) == type(op_b) == str and (('"' in op_a or 'input_str()' == op_a) and \
-                                                            ('"' in op_b or 'input_str()' == op_b)):
-                        self.temp_dict[left] = f'str_concat({op_a},{op_b})'
-                        return
-                    if node.type.value == 'int_t' and isinstance(op_a,(int,float,bool)) and isinstance(op_b,(int,float,bool)):
-                        self.temp_dict[left] = int(eval(f'{op_a} {operator} {op_b}'))
-                    elif node.type.value == 'float_t' and isinstance(op_a,(int,float,bool)) and isinstance(op_b,(int,float,bool)):
-                        self.temp_dict[left] = float(eval(f'{op_a} {operator} {op_b}'))
-                    else:
-                        self.temp_dict[left] = f'({op_a} {operator} {op_b})'
-                else:
-                    value = self._eval(node)
-                    if node.type.value == 'int_t' and isinstance(value,float):
-                        value = int(value)
-                    self.var_dict[left] = value
-                    return f"{left} = {value};"
-            elif left[0] != "_" and left not in self.variants:
-                self.variants.append(left)
-        else:
-            value = f"({op_a} {operator} {op_b})"
+        # Comparisons are typed bool_t, so a string comparison is told apart by its operand
+        if node.type.value == 'str_t' or self.declared_types.get(self.gen(node.operand_a)) == 'str_t':
+            value = self.gen_str_operation(left, operator, op_a, op_b)
             if left[0] == "_":
                 self.temp_dict[left] = value
-            else:
-                return f"{left} = {value};"
+                return
+            return f"{left} = {value};"
+        value = f"({op_a} {operator} {op_b})"
+        if left[0] == "_":
+            self.temp_dict[left] = value
+        else:
+            return f"{left} = {value};"
+
+    def gen_str_operation(self, left, operator, op_a, op_b):
+        if operator == '==':
+            return f"str_eq({op_a}, {op_b})"
+        if operator == '!=':
+            return f"!str_eq({op_a}, {op_b})"
+        assert operator == '+', f"Unsupported operator on strings {operator}"
+        self.str_concats[left] = (op_a, op_b)
+        return f"str_concat({op_a}, {op_b})"
 
     def gen_Parameter(self, node: Parameter):
-        return f"{self.gen(node.paramType)} {self.gen(node.var)}"
+        type_t, name = self.gen(node.paramType), self.gen(node.var)
+        self.declared_types[name] = type_t
+        return f"{type_t} {name}"
 
     def gen_ParameterLst(self, node: ParameterLst):
         return ", ".join(self.gen(param) for param in node.lst)
 
     def gen_FunctionDeclaration(self, node: FunctionDeclaration):
         assert not self.state_in_function_declaration, "Cannot declare function inside of a function"
-        function_declaration = f"{self.gen(node.returnType)} {self.gen(node.name)}({self.gen(node.lst)})"
+        name = self.gen(node.name)
+        return_type = self.gen(node.returnType)
+        # Functions only see their own parameters and variables
+        outer_types, self.declared_types = self.declared_types, {}
+        function_declaration = f"{return_type} {name}({self.gen(node.lst)})"
         self.function_declarations.append(function_declaration)
         self.state_in_function_declaration = True
+        appends = may_append(node.body, name, self.defined_functions, self.appending_functions)
+        self.defined_functions.add(name)
+        if appends:
+            self.appending_functions.add(name)
+        # Strings and lists the function allocates can only outlive the call through
+        # its return value or by being appended to a list from outside. Without
+        # either, all of them are freed when the function returns
+        if not appends and return_type != 'str_t' and not return_type.endswith('_list_t *'):
+            self.region_return_type = return_type
+        outer_strings, self.appendable_strings = self.appendable_strings, appendable_strings(node.body)
+        body = self.gen(node.body)
+        self.appendable_strings = outer_strings
+        if self.region_return_type:
+            body = ["region_t _region_ = region_begin();"] + body + ["region_end(_region_);"]
         self.function_definitions.append((
             function_declaration + " {",
-            self.gen(node.body),
-            "} " f"/* End of {self.gen(node.name)} */",
+            body,
+            "} " f"/* End of {name} */",
         ))
+        self.region_return_type = None
+        self.declared_types = outer_types
         self.state_in_function_declaration = False
         return None
 
+    def print_function(self, name, types):
+        """
+        Definition of the print function for several values, the values' types in order
+        """
+        body = []
+        for i, type_name in enumerate(types):
+            body += [f"output_{type_name}(value{i});", "output_char(' ');"]
+        params = ", ".join(f"{type_name}_t value{i}" for i, type_name in enumerate(types))
+        return (
+            f"static inline none_t {name}({params}) {{",
+            body + ["output_char('\\n');", "return NONE_LITERAL;"],
+            "}",
+        )
+
     def gen_FunctionCall(self, node: FunctionCall):
+        if node.name.startswith('print_') and len(node.lst) > 1:
+            self.print_functions[node.name] = node.name[len('print_'):].split('_')
         arg_list = []
         for i in node.lst:
             if i in self.temp_dict.keys():
@@ -434,99 +666,20 @@ int main() {{
         return node.name + "(" + arg_string + ")"
 
     def gen_IfStmt(self, node: IfStmt):
-        if self.eval_mode:
-            eval_cond = self._eval(node.ifCond)
-            if str(eval_cond) == 'False' or eval_cond == "false" or eval_cond == "NONE_LITERAL":
-                self.has_if_head = False
-                self.ignore_if = False
-                return None
-            else:
-                self.has_if_head = True
-                if not self.pre_run:
-                    self.pre_run = True
-                    self.gen(node.body)
-                    for var in self.variants:
-                        if var in self.propagation:
-                            self.propagation[var][2] = False
-                        self.var_dict[var] = var
-                    self.pre_run = False
-                body = self.gen(node.body)
-                if not body:
-                    return None
-                if str(eval_cond) == 'True' or eval_cond == "true":
-                    self.ignore_if = True
-                    return "".join(body)
-                return (
-                    f"if ({eval_cond})" " {",
-                    body,
-                    "}",
-                )
-        else:
-            eval_cond = self.get_val(self.gen(node.ifCond))
         return (
-            f"if ({eval_cond})" " {",
+            f"if ({self.get_val(self.gen(node.ifCond))})" " {",
             self.gen(node.body),
             "}",
         )
 
     def gen_ElifStmt(self, node: ElifStmt):
-        if self.eval_mode:
-            if self.ignore_if:
-                return None
-            eval_cond = self._eval(node.elifCond)
-            if not self.pre_run:
-                self.pre_run = True
-                self.gen(node.body)
-                for var in self.variants:
-                    if var in self.propagation:
-                        self.propagation[var][2] = False
-                    self.var_dict[var] = var
-                self.pre_run = False
-            body = self.gen(node.body)
-            if not body:
-                return None
-            if str(eval_cond) == 'False' or eval_cond == "false" or eval_cond == "NONE_LITERAL":
-                return None
-            else:
-                if self.has_if_head:
-                    return (
-                        f"else if ({eval_cond})" " {",
-                        body,
-                        "}",
-                    )
-                elif str(eval_cond) == 'True' or eval_cond == "true":
-                    self.has_if_head = True
-                    self.ignore_if = True
-                    return "".join(body)
-                else:
-                    return (
-                        f"if ({eval_cond})" " {",
-                        body,
-                        "}",
-                    )
-        else:
-            eval_cond = self.get_val(self.gen(node.elifCond))
         return (
-            f"else if ({eval_cond})" " {",
+            f"else if ({self.get_val(self.gen(node.elifCond))})" " {",
             self.gen(node.body),
             "}",
         )
 
     def gen_ElseStmt(self, node: ElseStmt):
-        if self.eval_mode:
-            if not self.pre_run:
-                self.pre_run = True
-                self.gen(node.body)
-                for var in self.variants:
-                    if var in self.propagation:
-                        self.propagation[var][2] = False
-                    self.var_dict[var] = var
-                self.pre_run = False
-            body = self.gen(node.body)
-            if self.ignore_if or not body:
-                return None
-            if not self.has_if_head:
-                return "".join(body)
         return (
             "else {",
             self.gen(node.body),
@@ -534,43 +687,35 @@ int main() {{
         )
 
     def gen_WhileStmt(self, node: WhileStmt):
-        cond = self.get_val(self.gen(node.cond))
-        if self.eval_mode:
-            if not self.is_inloop:
-                eval_cond = self._eval(node.cond)
-                if str(eval_cond) == 'False' or eval_cond == "false":
-                    return None
-                self.is_inloop = True
-                self.pre_run = True
-                self.gen(node.body)
-                self.pre_run = False
-                for var in self.variants:
-                    if var in self.propagation:
-                        self.propagation[var][2] = False
-                    self.var_dict[var] = var
-                body = self.gen(node.body)
-                if not body:
-                    return None
-                result = (f"while ({cond})" " {",
-                      body,
-                      "}",)
-                self.variants = []
-                self.is_inloop = False
-                return result
-            elif self.pre_run:
-                self.gen(node.body)
-                return None
-            else:
-                eval_cond = self._eval(node.cond)
-                if eval_cond == False or eval_cond == "false":
-                    return None
         return (
-            f"while ({cond})" " {",
+            f"while ({self.get_val(self.gen(node.cond))})" " {",
             self.gen(node.body),
             "}",
         )
+
     def gen_ForLoopRange(self, node: ForLoopRange):
+        bounds = self.range_bounds(node)
+        if bounds:
+            self.index_ranges[node.var.name] = bounds
+        try:
+            return self.gen_for_range_loop(node)
+        finally:
+            self.index_ranges.pop(node.var.name, None)
+
+    def range_bounds(self, node: ForLoopRange):
+        """
+        Lowest and highest value the loop variable takes in the loop body, when
+        the range is constant and the body never writes to the variable
+        """
+        start, stop, step = (value if type(value) == int else self.get_val(str(value))
+                             for value in (node.rangeVal.start, node.rangeVal.stop, node.rangeVal.step))
+        if not all(type(value) == int for value in (start, stop, step)) or step <= 0 or start >= stop:
+            return None
+        if self.written_names.writes(node.body, node.var.name):
+            return None
+        return start, stop - 1
 
+    def gen_for_range_loop(self, node: ForLoopRange):
         stop_val = node.rangeVal.stop
         step_val = node.rangeVal.step
         if stop_val in self.temp_dict.keys():
@@ -580,75 +725,48 @@ int main() {{
         assign_string = self.gen_Assignment(Assignment(id=node.var, val=node.rangeVal.start))
         comp_string = f"{node.var.name} < {stop_val};"
         step_string = f"{node.var.name} += {step_val}"
-        if self.eval_mode:
-            ranges = self._eval(node.rangeVal)
-            if type(ranges[0]) == type(ranges[2]) == int and  ranges[0] >= ranges[2]:
-                return None
-            if not self.is_inloop:
-                self.is_inloop = True
-                self.pre_run = True
-                self.gen(node.body)
-                self.pre_run = False
-                for var in self.variants:
-                    if var in self.propagation:
-                        self.propagation[var][2] = False
-                    self.var_dict[var] = var
-                body = self.gen(node.body)
-                if not body:
-                    return None
-                result = (
-                    "for (" + assign_string + " " + comp_string + " " + step_string + "){",
-                    body,
-                    "}",
-                )
-                self.variants = []
-                self.is_inloop = False
-                return result
-            elif self.pre_run:
-                self.gen(node.body)
-                return None
+        reserve = self.gen_list_reserve(node)
         return (
+               *reserve,
                "for (" + assign_string + " " + comp_string + " " + step_string + "){",
                self.gen(node.body),
                "}",
         )
 
+    def gen_list_reserve(self, node: ForLoopRange):
+        """
+        Make room up front in every list the loop appends to on each iteration,
+        so the appends never reallocate. Only lists that already exist before
+        the loop, and are not reassigned in it, are reserved.
+        """
+        appends = {}
+        elements = {}
+        for statement in node.body.lst:
+            if isinstance(statement, LstAdd) and statement.idx == 'end':
+                obj = self.gen(statement.obj)
+                if obj[0] != '_':
+                    appends[obj] = appends.get(obj, 0) + 1
+                    elements[obj] = self.list_element(statement.type)
+        if not appends:
+            return []
+        start, stop, step = (self.get_val(str(value)) for value in (node.rangeVal.start, node.rangeVal.stop, node.rangeVal.step))
+        iterations = f"range_length({start}, {stop}, {step})"
+        return [f"{elements[obj]}_list_reserve({obj}, {iterations}{'' if count == 1 else f' * {count}'});"
+                for obj, count in appends.items() if not self.written_names.writes(node.body, obj)]
+
     def gen_ForLoopList(self, node: ForLoopList):
         idx = self.get_val(node.indexVar.name)
         assign_var = self.get_val(node.var.name)
         lst = self.get_val(node.Lst.name)
-        assign_string = f"int_t i = 0;"
-        comp_string = f"i < {node.length};"
-        step_string = f"i += {idx}"
-        self.var_dict["i"] = 0
-        if self.eval_mode:
-            if not self.is_inloop:
-                self.is_inloop = True
-                self.pre_run = True
-                self.gen(node.body)
-                self.pre_run = False
-                for var in self.variants:
-                    if var in self.propagation:
-                        self.propagation[var][2] = False
-                    self.var_dict[var] = var
-                body = self.gen(node.body)
-                if not body:
-                    return None
-                result = (
-                    "for (" + assign_string + " " + comp_string + " " + step_string + "){",
-                    [f"{assign_var} = list_get(int_v, {lst}, i);"],
-                    body,
-                    "}",
-                )
-                self.variants = []
-                self.is_inloop = False
-                return result
-            elif self.pre_run:
-                self.gen(node.body)
-                return None
+        # The index only runs over the current length of the list, so reading
+        # the element needs no bounds check
+        assign_string = f"int_t _index_ = 0;"
+        comp_string = f"_index_ < {lst}->length;"
+        step_string = f"_index_ += {idx}"
+        read_element = f"{assign_var} = list_get_unchecked({lst}, _index_);"
         return (
                "for (" + assign_string + " " + comp_string + " " + step_string + ") {",
-               [f"{assign_var} = list_get(int_v, {lst}, i);"],
+               [read_element],
                self.gen(node.body),
                "}",
         )
@@ -663,127 +781,117 @@ int main() {{
         if isinstance(assign_var, str) and assign_var[0] == '_':
             self.temp_dict[assign_var] = None
             temp_var = True
-        if not self.pre_run:
-            if isinstance(node.val, (Id, FunctionCall, String)):
-                assign_value = self.gen(node.val)
-                if isinstance(node.val, String):
-                    self.converted_str_lst[assign_var] = assign_value
-                if temp_var:
-                    self.temp_dict[assign_var] = assign_value
-                    if isinstance(node.val, FunctionCall) and node.val.name[:6] == "print_":
-                        return f"{assign_value};"
-                    return None
-
-                elif assign_value in self.temp_dict.keys():
-                    assign_value = self.get_temp_val(assign_value)
-
-                elif assign_value in self.temp_list_dict.keys():
-                    self.temp_list_dict[assign_value] = assign_var
-                    return None
-
-                # MARK
-                assign_value = self.get_prop_val(assign_value)
-                self.set_prop_val(assign_var, assign_value)
-                result = f"{assign_var} = {assign_value};"
-
-            elif isinstance(node.val, bool):
-                assign_value = str(node.val).lower()
-                if temp_var:
-                    self.temp_dict[assign_var] = assign_value
-                    return None
-                elif assign_value in self.temp_dict.keys():
-                    assign_value = self.get_temp_val(assign_value)
-                elif assign_value in self.temp_list_dict.keys():
-                    self.temp_list_dict[assign_value] = assign_var
-                    return None
-                assign_value = self.get_prop_val(assign_value)
-                self.set_prop_val(assign_var, assign_value)
-                result = f"{assign_var} = {assign_value};"
-            elif node.val == "none-placeholder":
-                if temp_var:
-                    self.temp_dict[assign_var] = "NONE_LITERAL"
-                    return None
-                self.set_prop_val(assign_var, "NONE_LITERAL")
-                result = f"{assign_var} = NONE_LITERAL;"
-            else:
-                assign_value = node.val
-                if temp_var:
-                    self.temp_dict[assign_var] = assign_value
-                    return None
-                elif assign_value in self.temp_dict.keys():
-                    assign_value = self.get_temp_val(assign_value)
-                elif assign_value in self.temp_list_dict.keys():
-                    self.temp_list_dict[assign_value] = assign_var
-                    self.list_len_dict[assign_var] = self.list_len_dict[assign_value]
-                    return None
-                if (assign_value in self.temp_list_dict.values() or assign_value in self.list_decl_dict or \
-                    (type(assign_value) == str and "list_slice" in assign_value)) and\
-                        assign_var not in self.temp_list_dict.values():
-                    if assign_var not in self.list_decl_dict:
-                        self.list_decl_dict.append(assign_var)
-                        type_t = self.list_type_dict[assign_var]
-                        if "list_slice" in assign_value:
-                            params = assign_value.split("(")[1].split(")")[0].split(",")
-                            self.list_len_dict[assign_var] = eval(f"{params[2]}-{params[1]}")
-                        else:
-                            self.list_len_dict[assign_var] = self.list_len_dict[assign_value]
-                        return "".join([f"{type_t} {assign_var};", f"{assign_var} = {assign_value}"])
-                assign_value = self.get_prop_val(assign_value)
-                self.set_prop_val(assign_var, assign_value)
-                result = f"{assign_var} = {assign_value}"
-        if not temp_var and assign_var not in self.variants:
-            if self.pre_run:
-                self.variants.append(assign_var)
-            else:
-                if type(node.val) == str and node.val != '_':
-                    value = self._eval(node)
-                    self.var_dict[assign_var] = value
-                    result = f"{assign_var} = {value};"
-                else:
-                    self.var_dict[assign_var] = assign_value
+        if isinstance(node.val, (Id, FunctionCall, String)):
+            assign_value = self.gen(node.val)
+            if temp_var:
+                self.temp_dict[assign_var] = assign_value
+                if isinstance(node.val, FunctionCall) and node.val.name[:6] == "print_":
+                    return f"{assign_value};"
+                return None
+
+            elif assign_value in self.temp_dict.keys():
+                assign_value = self.get_temp_val(assign_value)
+
+            elif assign_value in self.temp_list_dict.keys():
+                self.temp_list_dict[assign_value] = assign_var
+                return None
+
+            result = f"{assign_var} = {assign_value};"
+
+        elif isinstance(node.val, bool):
+            assign_value = str(node.val).lower()
+            if temp_var:
+                self.temp_dict[assign_var] = assign_value
+                return None
+            result = f"{assign_var} = {assign_value};"
+        elif node.val == "none-placeholder":
+            if temp_var:
+                self.temp_dict[assign_var] = "NONE_LITERAL"
+                return None
+            result = f"{assign_var} = NONE_LITERAL;"
+        else:
+            assign_value = node.val
+            if temp_var:
+                self.temp_dict[assign_var] = assign_value
+                return None
+            elif assign_value in self.temp_dict.keys():
+                assign_value = self.get_temp_val(assign_value)
+            elif assign_value in self.temp_list_dict.keys():
+                self.temp_list_dict[assign_value] = assign_var
+                return None
+            # A list variable is declared where it is first assigned, be it a list,
+            # a slice or a list returned by a function
+            if (assign_value in self.temp_list_dict.values() or assign_value in self.list_decl_dict or \
+                assign_var in self.list_type_dict) and assign_var not in self.temp_list_dict.values():
+                if assign_var not in self.list_decl_dict:
+                    self.list_decl_dict.append(assign_var)
+                    type_t = self.list_type_dict[assign_var]
+                    return "".join([f"{type_t} {assign_var};", f"{assign_var} = {assign_value}"])
+            result = f"{assign_var} = {assign_value};"
+        concat = self.str_concats.get(node.val) if isinstance(node.val, str) else None
+        if concat and concat[0] == assign_var and assign_var in self.appendable_strings:
+            return f"str_append(&{assign_var}, {concat[1]});"
         return result
 
     def gen_String(self, node: String):
-        # Using json.dumps to do string escape
-        import json
-        return json.dumps(node.val)
+        name = self.strings.get(node.val)
+        if name is None:
+            name = self.strings[node.val] = f"_str{len(self.strings)}_"
+        return f"str_literal({name})"
 
     def gen_ReturnStatement(self, node: ReturnStatement):
         assert self.state_in_function_declaration, "Cannot have return statement outside of a function declaration"
         value = self.get_val(self.gen(node.value))
+        if self.region_return_type:
+            return (
+                "{",
+                [f"{self.region_return_type} _result_ = {value};", "region_end(_region_);", "return _result_;"],
+                "}",
+            )
         return f"return {value};"
 
     def gen_LstAdd(self, node: LstAdd):
         obj = self.gen(node.obj)
-        type_t = self.gen(node.type)
-        type_t = type_t[:-1] + "v"
         value = self.get_val(self.gen(node.value))
-        value = self.get_prop_val(value)
         if node.idx == 'end':
-            return f"list_add({type_t}, {obj}, {value});"
+            return f"{self.list_element(node.type)}_list_add({obj}, {value});"
 
     def gen_NonPrimitiveIndex(self, node: NonPrimitiveIndex):
         idx_reg = self.gen(node.result)
         idx = self.gen(node.idx)
-        type_v = self.convert_v_type(node.type)
         if idx in self.temp_dict:
             idx = self.get_temp_val(idx)
+        get = "list_get_unchecked" if self.index_in_bounds(self.gen(node.obj), idx) else f"{self.list_element(node.type)}_list_get"
         if idx_reg[0] == "_":
-            self.temp_dict[idx_reg] = f"list_get({type_v},{self.gen(node.obj)},{idx})"
+            self.temp_dict[idx_reg] = f"{get}({self.gen(node.obj)},{idx})"
+        else:
+            return f"{self.gen(node.result)} = {get}({self.gen(node.obj)},{idx})"
+
+    def index_in_bounds(self, obj, idx):
+        """
+        Whether every value idx can take is a valid index of the list obj
+        """
+        if obj not in self.list_min_lengths:
+            return False
+        if type(idx) == int:
+            lowest = highest = idx
+        elif idx in self.index_ranges:
+            lowest, highest = self.index_ranges[idx]
         else:
-            return f"{self.gen(node.result)} = list_get({type_v},{self.gen(node.obj)},{idx})"
+            return False
+        return 0 <= lowest and highest < self.list_min_lengths[obj]
 
     def gen_NonPrimitiveLiteral(self, node: NonPrimitiveLiteral):
         head = self.gen(node.head)
         if isinstance(head, str) and head[0] == '_':
             self.temp_list_dict[head] = None
-        init = [f"list_t * {head} = list_init({len(node.value)});"]
-        val_type = self.convert_v_type(node.type)
+        type_t = self.gen(node.type)
+        self.list_type_dict[head] = type_t
+        element = self.list_element(type_t)
+        init = [f"{type_t} {head} = {element}_list_init({len(node.value)});"]
         for item in node.value:
             value = self.get_val(self.gen(item))
-            value = self.get_prop_val(value)
-            init.append(f"list_init_add({val_type},{self.gen(node.head)},{value});")
-        self.list_len_dict[head] = len(node.value)
+            init.append(f"{element}_list_init_add({self.gen(node.head)},{value});")
         return "".join(init)
 
     def gen_NonPrimitiveSlicing(self, node: NonPrimitiveSlicing):
@@ -796,23 +904,22 @@ int main() {{
         if node.end:
             end = self.get_val(self.gen(node.end))
         else:
-            end = self.list_len_dict[obj]
-        result = f"list_slice({obj},{start},{end})"
+            end = f"{obj}->length"
+        result = f"{self.list_element(node.type)}_list_slice({obj},{start},{end})"
         self.temp_dict[result_reg] = result
         return None
 
-    def convert_v_type(self,node: Type):
-        if isinstance(node.value, str):
-            assert node.value in ['str_t', 'int_t', 'float_t', 'bool_t', 'str_t', 'none_t']
-            return node.value.replace('_t', '_v')
-        elif not isinstance(node.value, NonPrimitiveType):
-            assert node.value.value.value in ['str_t', 'int_t', 'float_t', 'bool_t', 'str_t', 'none_t']
-            return node.value.value.value.replace('_t', '_v')
-        elif not isinstance(node.value, Type):
-            assert node.value.value.value in ['str_t', 'int_t', 'float_t', 'bool_t', 'str_t', 'none_t']
-            return node.value.value.value.replace('_t', '_v')
-        else:
-            return 'list_v'
+    def list_element(self, type_t):
+        """
+        Element type name of a list, as used by the runtime's typed lists: 'int'
+        for an int_list_t, from either the list's C type or its Type node
+        """
+        if isinstance(type_t, str):
+            assert type_t.endswith("_list_t *"), type_t
+            return type_t[:-len("_list_t *")]
+        element = type_t.value.value if isinstance(type_t.value, NonPrimitiveType) else type_t
+        assert isinstance(element, Type) and isinstance(element.value, str), "C_AST Error: Lists can only hold int, float, bool, str or none"
+        return element.value[:-len("_t")]
 
     def get_temp_val(self, tmp):
         if tmp in self.temp_dict.keys():
@@ -823,31 +930,6 @@ int main() {{
         if name[0] == "_":
             return self.get_temp_val(name)
         return name
-    # set progagation dictionary for the variable and value
-    def set_prop_val(self, name, val):
-        if name in self.propagation.keys():
-            prop = self.propagation[name]
-            if not prop[2]: # Don't set variable if the variable state is not 
-                return None
-            if self.scope_counter > prop[1]: # if the variable is being assigned in a if statement, while loop etc, the variable should not continue to propogate
-                prop[2] = False
-                return None
-        if isinstance(val, (bool,int,float)) or val == "NONE_LITERAL":
-            self.propagation[name] = [val, self.scope_counter, True]
-
-    def get_prop_val(self, name):
-        if self.eval_mode and name in self.propagation.keys():
-            prop = self.propagation[name]
-            if prop[2]: # 
-                return prop[0]
-        return name
-
-    def _eval(self, node):
-        method = 'eval_' + node.__class__.__name__
-        try:
-            return getattr(self, method)(node)
-        except AttributeError:
-            return node
 
     def convert_operator(self, op):
         if op == "and" or op == "&":
@@ -857,93 +939,3 @@ int main() {{
         elif op == "not":
             return "!"
         return op
-    def look_up_temp(self, temp_reg):
-        cur_val = temp_reg
-        while cur_val != None:
-            prev = cur_val
-            cur_val = self.temp_dict.get(cur_val)
-        return prev
-
-    def eval_BinaryOperation(self, node: BinaryOperation):
-        left = self._eval(node.operand_a)
-        right = self._eval(node.operand_b)
-        left = self.get_prop_val(left)
-        right = self.get_prop_val(right)
-        operator = self.convert_operator(node.operator)
-        if self.gen(node.left) not in self.variants and isinstance(left, (bool, int, float))\
-                and isinstance(right, (bool, int, float)):
-            temp_dict = self.var_dict.copy()
-            for var in self.variants:
-                temp_dict.pop(var,None)
-            if node.type.value == "int_t":
-                return int(eval(f"{left} {operator} {right}",temp_dict))
-            return eval(f"{left} {operator} {right}",temp_dict)
-        return f"{left} {operator} {right}"
-
-    def eval_UnaryOperation(self, node: UnaryOperation):
-        operand = self._eval(node.operand)
-        operator = self.convert_operator(node.operator)
-        if self.gen(node.left) not in self.variants:
-            temp_dict = self.var_dict.copy()
-            for var in self.variants:
-                temp_dict.pop(var,None)
-            operand = self.get_prop_val(operand)
-            if node.type.value == "int_t":
-                return int(eval(f"{operator} {operand}",temp_dict))
-            return eval(f"{operator} {operand}",temp_dict)
-        return f"{operator} {operand}"
-
-    def eval_Id(self, node: Id):
-        if node.name[0] == "_":
-            expr = self.look_up_temp(node.name)
-            try:
-                if node.name in self.converted_str_lst:
-                    return self.converted_str_lst[node.name]
-                temp_dict = self.var_dict.copy()
-                for var in self.variants:
-                    temp_dict.pop(var,None)
-                result = eval(f"{expr}",temp_dict)
-                if type(result) == str and result not in self.var_dict:
-                    import json
-                    result = json.dumps(result)
-                    self.converted_str_lst[node.name] = result
-                    return result
-            except:
-                result = expr
-            return result
-        else:
-            if node.name not in self.variants and node.name in self.var_dict:
-                return self.var_dict[node.name]
-        return node.name
-
-    def eval_PrimitiveLiteral(self,node:PrimitiveLiteral):
-        return node.value
-
-    def eval_FunctionCall(self,node:FunctionCall):
-        return self.gen(node)
-
-    def eval_Assignment(self,node:Assignment):
-        expr = self.look_up_temp(node.val)
-        name = self.gen(node.id)
-        try:
-            if node.val in self.converted_str_lst:
-                result = self.converted_str_lst[node.val]
-                self.converted_str_lst[name] = result
-                return result
-            temp_dict = self.var_dict.copy()
-            for var in self.variants:
-                temp_dict.pop(var,None)
-            result = eval(f"{expr}", temp_dict)
-            if type(result) == str and result not in self.var_dict:
-                result = json.dumps(result)
-                self.converted_str_lst[name] = result
-                return json.dumps(result)
-        except:
-            result = expr
-        return result
-
-    def eval_RangeValues(self,node:RangeValues):
-        start = self.look_up_temp(node.start)
-        step = self.look_up_temp(node.step)
-        stop = self.look_up_temp(node.stop)
-        return [eval(f"{start}",self.var_dict),eval(f"{step}",self.var_dict),eval(f"{stop}",self.var_dict)]
@@ -3,17 +3,67 @@ from ir_gen import *
 from symbol_table import SymbolTable
 from typing import List
 from AST import Type as A_Type, NonPrimitiveType
+from bisect import bisect_left
+from visitor import Visitor
 
 
-class CASTGenerator:
+class IRCursor:
+    """
+    Read-only cursor over a list of IR lines.
+
+    Consuming a line only moves an index forward, and the positions of labels
+    and elif heads are indexed once, so lookahead never rescans the IR.
+    """
+    def __init__(self, ir):
+        self.ir = ir
+        self.pos = 0
+        self.label_positions = {}
+        self.elif_positions = []
+        for idx, ir_line in enumerate(ir):
+            if isinstance(ir_line, IR_Label):
+                self.label_positions.setdefault(ir_line.value, []).append(idx)
+            elif isinstance(ir_line, IR_ElifStmt):
+                self.elif_positions.append(idx)
+
+    def __bool__(self):
+        return self.pos < len(self.ir)
+
+    def peek(self, offset=0):
+        return self.ir[self.pos + offset]
+
+    def peek_at(self, idx):
+        return self.ir[idx]
+
+    def advance(self):
+        ir_line = self.ir[self.pos]
+        self.pos += 1
+        return ir_line
+
+    def find_label(self, label, start=None):
+        """ Index of the first occurrence of label at or after start, None if there is none """
+        return self._next(self.label_positions.get(label, []), self.pos if start is None else start)
+
+    def find_elif(self, start=None):
+        """ Index of the first IR_ElifStmt at or after start, None if there is none """
+        return self._next(self.elif_positions, self.pos if start is None else start)
+
+    @staticmethod
+    def _next(positions, start):
+        i = bisect_left(positions, start)
+        if i == len(positions):
+            return None
+        return positions[i]
+
+
+class CASTGenerator(Visitor):
+    prefix = 'gen_'
+
     def __init__(self):
         self.seen_labels = []  # Labels have seen
         self.waiting_labels = []  # Labels have not seen
         self.temp_st = SymbolTable()  # Keep track of declared variables
         self.result_AST = []
         self.end_if_labels = []  # value is a tuple (label name, head of if)
-        self.current_str = None
-        self.current_str_count = 0
         self.argument_list_stack = []
         self.argument_list_dict = {}
         # For loop variables
@@ -28,39 +78,34 @@ class CASTGenerator:
 
 
     def generate_AST(self, ir, st=None):
-        self.ir = ir[:]
+        self.ir = IRCursor(ir)
         while self.ir:
-            ir_line = self.ir.pop(0)
+            ir_line = self.ir.advance()
             generated_line = self.gen(ir_line, st)
             if generated_line != None:
                 self.result_AST += generated_line
         return C_AST.Block(self.result_AST)
 
     def gen(self, ir_line, st=None):
-        method = 'gen_' + ir_line.__class__.__name__
-        try:
-            return getattr(self, method)(ir_line, st)
-        except AttributeError:
-            print(f"Trying to process ir {ir_line}")
-            raise
+        return self.visit(ir_line, st)
 
     def gen_IR_Label(self, ir_node: IR_Label, st=None):
         if "FORRANGE" in ir_node.value:
             # do something for FOR
             #pass
-            return self._gen_IR_For_Range(self.ir.pop(0), st)
+            return self._gen_IR_For_Range(self.ir.advance(), st)
         elif "FORLIST" in ir_node.value:
-            return self._gen_IR_For_List(self.ir.pop(0), st)
+            return self._gen_IR_For_List(self.ir.advance(), st)
         elif "WHILE" in ir_node.value:
             # do something for WHILE
-            return self._gen_IR_While(self.ir.pop(0), st)
+            return self._gen_IR_While(self.ir.advance(), st)
         elif 'FUNC' in ir_node.value:
             # This is a function, we need the label at the top of waiting
             # to find the end of declaration
             # Based on our Function IR, return statement is required.
             # Also, assume functions are declared in global scope
             end_func_idx = ir_node.value.rfind("_")
-            return self._gen_IR_Func(self.ir.pop(0), ir_node.value[7:end_func_idx], st)
+            return self._gen_IR_Func(self.ir.advance(), ir_node.value[7:end_func_idx], st)
         else:
             # other cases
             return ir_node.value
@@ -150,12 +195,18 @@ class CASTGenerator:
         for arg in args:
             arg_types.append(self.temp_st.lookup_variable(arg))
 
-        c_name, type_val = self.temp_st.get_C_function(ir_node.name, arg_types)
+        if ir_node.name == 'print' and len(arg_types) > 1:
+            # print_int_str for print(1, "a"), which CCodeGenerator defines for the call
+            c_names, type_val = zip(*(self.temp_st.get_C_function('print', [arg_type]) for arg_type in arg_types))
+            c_name, type_val = 'print_' + '_'.join(name[len('print_'):] for name in c_names), type_val[0]
+        else:
+            c_name, type_val = self.temp_st.get_C_function(ir_node.name, arg_types)
 
         function_call_node = C_AST.FunctionCall(name=c_name, lst=args)
 
-        # Assume return types are PrimitiveType
-        if type_val.value.value == 'int':
+        if type_val.value.__class__.__name__ == 'NonPrimitiveType':
+            type_val = self.convert_NonPrimitive_Type(type_val)
+        elif type_val.value.value == 'int':
             type_val = 'int_t'
         elif type_val.value.value == 'float':
             type_val = 'float_t'
@@ -168,7 +219,7 @@ class CASTGenerator:
         else:
             assert False, f"{type_val=}"
         # return always immediately follows the function call
-        ret_reg = self.gen(self.ir.pop(0))
+        ret_reg = self.gen(self.ir.advance())
         self.temp_st.declare_variable(name=ret_reg, type=C_AST.Type(value=type_val))
         id_node = C_AST.Id(name=ret_reg)
         decl_node = C_AST.Declaration(id=id_node, type=C_AST.Type(value=type_val))
@@ -183,44 +234,44 @@ class CASTGenerator:
 
     def gen_IR_IfStmt(self, ir_node: IR_IfStmt, st=None):
         false_label = ir_node.if_false.label
-        idx = 0
-        prev_node = None
-        next_node = self.ir[idx]
-        # if next node is not label or not the false label, then it is in body
-        while not (next_node.__class__.__name__ == 'IR_Label' and next_node.value == false_label):
-            idx += 1
-            prev_node = next_node
-            next_node = self.ir[idx]
+        # everything before the false label is in body
+        false_idx = self.ir.find_label(false_label)
+        if false_idx is None:
+            raise IndexError(f"False label {false_label} of if statement not found")
+        prev_node = self.ir.peek_at(false_idx - 1) if false_idx > self.ir.pos else None
         # based on the if stmt structure in IR, the end of if label must be before false label
         self.end_if_labels.append([prev_node.label, 0])
         if_node = C_AST.IfStmt(ifCond=C_AST.Id(name=ir_node.cond_reg), body=C_AST.Block([]))
         # signal is set to false when reaching the false label
         continue_sig = True
         while continue_sig:
-            node = self.ir.pop(0)
+            node = self.ir.advance()
             val = self.gen(node, st)
             if val and val == false_label:
                 continue_sig = False
             elif val:
                 if_node.body.lst += val
         # call elif to check if we have following elif
-        if_stmt = self._gen_IR_ElifStmt(self.ir.pop(0), [if_node], st)
+        if_stmt = self._gen_IR_ElifStmt(self.ir.advance(), [if_node], st)
         return if_stmt
 
     def _gen_IR_ElifStmt(self, ir_node: any, if_stmt=None, st=None):
-        idx = 0
-        prev_node = None
-        next_node = ir_node
         continue_sig = True
-        while not (next_node.__class__.__name__ == 'IR_ElifStmt' or \
-                   (next_node.__class__.__name__ == 'IR_Label' and next_node.value == self.end_if_labels[-1][0])):
-            # it has to reach one of the condition without reaching the end of ir
-            prev_node = next_node
-            next_node = self.ir[idx]
-            idx += 1
+        # ir_node is already consumed, so the search starts right before the cursor
+        # it has to reach one of the condition without reaching the end of ir
+        start = self.ir.pos - 1
+        label_idx = self.ir.find_label(self.end_if_labels[-1][0], start)
+        elif_idx = self.ir.find_elif(start)
+        if label_idx is None and elif_idx is None:
+            raise IndexError(f"End label {self.end_if_labels[-1][0]} of if statement not found")
+        if elif_idx is None or (label_idx is not None and label_idx < elif_idx):
+            next_idx = label_idx
+        else:
+            next_idx = elif_idx
+        next_node = self.ir.peek_at(next_idx)
         if next_node.__class__.__name__ == 'IR_Label':
             # if stmts is empty, there is not trailing if statements
-            if not prev_node:
+            if next_idx == start:
                 self.end_if_labels.pop()
                 return if_stmt
             result_stmt = C_AST.ElseStmt(body=C_AST.Block([]))
@@ -232,7 +283,7 @@ class CASTGenerator:
                 elif val:
                     result_stmt.body.lst += val
                 if continue_sig:
-                    cur_node = self.ir.pop(0)
+                    cur_node = self.ir.advance()
         else:
             # reach elif, stmts are the conditional expression, need to be inserted before if head`
             cond_ast = []
@@ -241,13 +292,13 @@ class CASTGenerator:
                 temp_val = self.gen(cur_node,st)
                 if temp_val:
                     cond_ast += temp_val
-                cur_node = self.ir.pop(0)
+                cur_node = self.ir.advance()
             if_stmt = if_stmt[:self.end_if_labels[-1][1]] + cond_ast + if_stmt[self.end_if_labels[-1][1]:]
             self.end_if_labels[-1][1] += len(cond_ast)
             result_stmt = C_AST.ElifStmt(elifCond=C_AST.Id(cur_node.cond_reg), body=C_AST.Block([]))
             false_label = next_node.elif_false.label
             while continue_sig:
-                node = self.ir.pop(0)
+                node = self.ir.advance()
                 val = self.gen(node, st)
                 if val and val == false_label:
                     continue_sig = False
@@ -257,7 +308,7 @@ class CASTGenerator:
         if result_stmt.__class__.__name__ == "ElseStmt":
             self.end_if_labels.pop()
             return if_stmt
-        if_stmt = self._gen_IR_ElifStmt(self.ir.pop(0), if_stmt, st)
+        if_stmt = self._gen_IR_ElifStmt(self.ir.advance(), if_stmt, st)
         return if_stmt
 
     def gen_IR_Assignment(self, ir_node: IR_Assignment, st=None):
@@ -293,7 +344,8 @@ class CASTGenerator:
 
     def gen_IR_GetLength(self, ir_node:IR_GetLength, st=None):
         length = self.list_len.get(ir_node.pointer_reg)
-        if length is None:
+        # Lists returned by functions are in list_len with an unknown length
+        if ir_node.pointer_reg not in self.list_len:
             raise Exception(f'C_AST_Gen Error: {ir_node.pointer_reg} is not previously defined as non-primitive')
         self.get_length[length] = ir_node.pointer_reg
         # return self.gen_IR_Assignment(IR_Assignment(name=ir_node.result_reg, val=length))
@@ -307,7 +359,7 @@ class CASTGenerator:
         continue_sig = True
         decl_stmt = []
         while continue_sig and length > 0:
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             if cur_node.__class__.__name__ == "IR_List_VAL":
                 lst.append(C_AST.Id(cur_node.reg))
                 length -= 1
@@ -353,23 +405,12 @@ class CASTGenerator:
         self.loop_step = ir_node.reg
         return [decl_node, assign]
 
-    def gen_IR_String(self,ir_node:IR_String,st=None):
-        self.current_str = C_AST.String(val="", len=ir_node.length)
-        self.current_str_count = 0
-
+    def gen_IR_StringConst(self, ir_node: IR_StringConst, st=None):
         type_val = "str_t"
         self.temp_st.declare_variable(name=ir_node.reg, type=C_AST.Type(value=type_val))
         id_node = C_AST.Id(name=ir_node.reg)
         decl_node = C_AST.Declaration(id=id_node, type=C_AST.Type(value=type_val))
-        return [decl_node, C_AST.Assignment(id=id_node, val=self.current_str)]
-
-    def gen_IR_String_char(self,ir_node:IR_String_char,st=None):
-        self.current_str.val = self.current_str.val + ir_node.val
-        self.current_str_count += 1
-        if self.current_str_count == self.current_str.len:
-            self.current_str_count = 0
-            self.current_str = None
-        return None
+        return [decl_node, C_AST.Assignment(id=id_node, val=C_AST.String(val=ir_node.val, len=len(ir_node.val)))]
 
     def gen_IR_Parameter_VAL(self, ir_node: IR_Parameter_VAL, st=None):
         return ir_node.name
@@ -392,7 +433,7 @@ class CASTGenerator:
         # get params
         length = ir_node.length
         for i in range(length):
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             val = self.gen(cur_node)
             params.append(val)
             param_regs.append(cur_node.reg)
@@ -413,7 +454,7 @@ class CASTGenerator:
         continue_sig = True
         #  get function body
         while continue_sig:
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             val = self.gen(cur_node, st)
             # check if reached the end of function
             if val and val == self.waiting_labels[-1]:
@@ -430,7 +471,7 @@ class CASTGenerator:
             if type.value.__class__.__name__ == "PrimitiveType":
                 converted_types.append(C_AST.Type(type.value.value + "_t"))
             else:
-                converted_types.append(C_AST.Type(C_AST.NonPrimitiveType(type.value.name)))
+                converted_types.append(C_AST.Type(self.convert_NonPrimitive_Type(type)))
         return converted_types
 
     def _gen_IR_While(self, ir_node: any, st=None):
@@ -438,12 +479,12 @@ class CASTGenerator:
         cur_node = ir_node
         while cur_node.__class__.__name__ != "IR_IfStmt":
             head += self.gen(cur_node, st)
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
         false_label = cur_node.if_false.label
         result_stmt = C_AST.WhileStmt(cond=C_AST.Id(cur_node.cond_reg),body=C_AST.Block([]))
         continue_sig = True
         while continue_sig:
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             val = self.gen(cur_node,st)
             if val and val == false_label:
                 continue_sig = False
@@ -471,13 +512,13 @@ class CASTGenerator:
             else:
                 head += self.gen(cur_node, st)
 
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
 
         false_label = cur_node.if_false.label
         result_stmt = C_AST.ForLoopRange(rangeVal=C_AST.RangeValues(stop=cur_loop_stop, start=cur_loop_start, step=cur_loop_step),var=cur_id, body=C_AST.Block([]))
         continue_sig = True
         while continue_sig:
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             val = self.gen(cur_node, st)
             if val and val == false_label:
                 continue_sig = False
@@ -513,14 +554,14 @@ class CASTGenerator:
             else:
                 head += self.gen(cur_node, st)
 
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
 
         false_label = cur_node.if_false.label
         result_stmt = C_AST.ForLoopList(var=C_AST.Id(name=cur_id), indexVar=C_AST.Id(cur_index), length=cur_list_len, Lst=C_AST.Id(cur_list_reg), body=C_AST.Block([]))
 
         continue_sig = True
         while continue_sig:
-            cur_node = self.ir.pop(0)
+            cur_node = self.ir.advance()
             val = self.gen(cur_node, st)
             if val and val == false_label:
                 continue_sig = False
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the compiler stages.
+
+Every benchmark runs on synthetic programs of a given number of statements.
+
+    python bench.py c_ast_gen --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import AST
+from yacc import pythonParser
+from type_checker import TypeChecker, SymbolTable
+from ir_gen import IRGen
+from C_AST_gen import CASTGenerator
+from C_AST import CCodeGenerator
+from const_prop import propagate_constants
+from cfg import build_cfg
+from compiler import compiler, execute_program
+from profiler import count_nodes
+
+INT = AST.Type(AST.PrimitiveType('int'))
+VARIABLES = [f'v{i}' for i in range(5)]
+
+
+def int_literal(value):
+    return AST.PrimitiveLiteral(name='int', value=value)
+
+
+def binary(left, operator, right):
+    return AST.BinaryOperation(left=left, operator=operator, right=right)
+
+
+def synthetic_ast(size):
+    """
+    Top level AST nodes of a program with about `size` statements, mixing
+    arithmetic, if statements, while loops and for loops
+    """
+    v = [AST.Id(name) for name in VARIABLES]
+    nodes = [AST.Assignment(left=var, type=INT, right=int_literal(0)) for var in v]
+    count = len(nodes)
+    while count < size:
+        i = AST.Id('i')
+        nodes += [
+            AST.Assignment(left=v[1], type=None, right=binary(v[0], '+', binary(int_literal(3), '*', v[2]))),
+            AST.IfStmt(ifCond=binary(v[1], '>', int_literal(10)), body=AST.Block([
+                AST.Assignment(left=v[2], type=None, right=binary(v[2], '-', int_literal(1))),
+            ])),
+            AST.WhileStmt(cond=binary(v[3], '<', int_literal(5)), body=AST.Block([
+                AST.Assignment(left=v[3], type=None, right=binary(v[3], '+', int_literal(1))),
+            ])),
+            AST.ForLoopRange(var=i, rangeVal=AST.RangeValues(stop=int_literal(4), start=int_literal(0), step=None), body=AST.Block([
+                AST.Assignment(left=v[4], type=None, right=binary(v[4], '+', i)),
+            ])),
+        ]
+        count += 7
+    return nodes
+
+
+def synthetic_source(size, depth):
+    """
+    Source code of a program with about `size` lines, made of if statements
+    and while loops nested `depth` levels deep
+    """
+    lines = [f'{var}: int = 0' for var in VARIABLES]
+    while len(lines) < size:
+        for level in range(depth):
+            tabs = '\t' * level
+            var = VARIABLES[level % len(VARIABLES)]
+            lines.append(f'{tabs}{var} = {var} + {level}')
+            if level % 2 == 0:
+                lines.append(f'{tabs}if {var} < {level * 3}:')
+            else:
+                lines.append(f'{tabs}while {var} < {level * 3}:')
+        lines.append('\t' * depth + f'{VARIABLES[0]} = {VARIABLES[0]} - 1')
+    return '\n'.join(lines) + '\n'
+
+
+def elif_chains(chains, arms):
+    """ Source code of `chains` if statements, each with `arms` - 2 elifs and an else """
+    lines = ['x: int = 0']
+    for chain in range(chains):
+        lines += ['if x == 0:', '\tx = x + 1']
+        for arm in range(1, arms - 1):
+            lines += [f'elif x == {arm}:', f'\tx = x + {arm}']
+        lines += ['else:', '\tx = x - 1']
+    return '\n'.join(lines) + '\n'
+
+
+def nested_ranges(size, depth):
+    """
+    Source code of a program with about `size` lines, made of for range loops
+    nested `depth` levels deep that each append to a list
+    """
+    lines = ['a: [int] = [0]']
+    while len(lines) < size:
+        for level in range(depth):
+            tabs = '\t' * level
+            lines += [f'{tabs}for i{level} in range({level + 2}):', f'{tabs}\ta.append(i{level})']
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_ir(size):
+    blocks = synthetic_ast(size)
+    st = SymbolTable()
+    tc = TypeChecker()
+    for block in blocks:
+        tc.typecheck(block, st)
+    ir_generator = IRGen()
+    ir_generator.generate_IR(blocks)
+    return ir_generator.IR, st
+
+
+def typechecked_ast(source):
+    parser = pythonParser()
+    parser.build()
+    blocks = parser.parse(source)
+    st = SymbolTable()
+    tc = TypeChecker()
+    for block in blocks:
+        tc.typecheck(block, st)
+    return blocks
+
+
+def source_ir(source):
+    ir_generator = IRGen()
+    ir_generator.generate_IR(typechecked_ast(source))
+    return ir_generator.IR
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_c_ast_gen(args):
+    print(f"{'statements':>12} {'IR lines':>10} {'seconds':>10} {'us/IR line':>12}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        ir, st = synthetic_ir(size)
+        seconds, _ = timed(CASTGenerator().generate_AST, ir, st)
+        print(f"{size:>12} {len(ir):>10} {seconds:>10.3f} {seconds / len(ir) * 1e6:>12.2f}")
+
+
+def bench_c_code_gen(args):
+    print(f"{'statements':>12} {'C lines':>10} {'seconds':>10} {'us/C line':>12}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        ir, st = synthetic_ir(size)
+        c_ast = CASTGenerator().generate_AST(ir, st)
+        c_code_generator = CCodeGenerator()
+        seconds, code = timed(c_code_generator.generate_code, c_ast)
+        lines = code.count('\n')
+        print(f"{size:>12} {lines:>10} {seconds:>10.3f} {seconds / lines * 1e6:>12.2f}")
+
+
+def bench_nested_loops(args):
+    print(f"{'lines':>12} {'depth':>6} {'C lines':>10} {'seconds':>10} {'us/C line':>12}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        blocks = typechecked_ast(nested_ranges(size, args.depth))
+        st = SymbolTable()
+        ir_generator = IRGen()
+        ir_generator.generate_IR(blocks)
+        c_ast = CASTGenerator().generate_AST(ir_generator.IR, st)
+        seconds, code = timed(CCodeGenerator().generate_code, c_ast)
+        lines = code.count('\n')
+        print(f"{size:>12} {args.depth:>6} {lines:>10} {seconds:>10.3f} {seconds / lines * 1e6:>12.2f}")
+
+
+def bench_const_prop(args):
+    print(f"{'statements':>12} {'IR lines':>10} {'seconds':>10} {'us/IR line':>12}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        ir, st = synthetic_ir(size)
+        seconds, _ = timed(propagate_constants, ir)
+        print(f"{size:>12} {len(ir):>10} {seconds:>10.3f} {seconds / len(ir) * 1e6:>12.2f}")
+
+
+def bench_cfg(args):
+    print(f"{'lines':>12} {'depth':>6} {'IR lines':>10} {'blocks':>8} {'loops':>7} {'seconds':>10} {'us/IR line':>12}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        ir = source_ir(synthetic_source(size, args.depth))
+        seconds, cfg = timed(build_cfg, ir)
+        print(f"{size:>12} {args.depth:>6} {len(ir):>10} {len(cfg.blocks):>8} {len(cfg.loops):>7} {seconds:>10.3f} {seconds / len(ir) * 1e6:>12.2f}")
+
+
+def bench_elif_chain(args):
+    arms = 1000
+    print(f"{'chains':>12} {'arms':>6} {'IR lines':>10} {'seconds':>10} {'us/arm':>10}")
+    for chains in args.sizes or [1, 10, 100]:
+        blocks = typechecked_ast(elif_chains(chains, arms))
+        seconds, ir = timed(IRGen().generate_IR, blocks)
+        print(f"{chains:>12} {arms:>6} {len(ir):>10} {seconds:>10.3f} {seconds / (chains * arms) * 1e6:>10.2f}")
+
+
+def bench_memory(args):
+    print(f"{'lines':>12} {'stage':>10} {'nodes':>10} {'MB':>8} {'bytes/node':>11}")
+    for size in args.sizes or [100000]:
+        source = synthetic_source(size, args.depth)
+        lines = source.count('\n')
+        parser = pythonParser()
+        parser.build()
+        tracemalloc.start()
+        stages = []
+
+        def measure(name, func, *args):
+            before = tracemalloc.get_traced_memory()[0]
+            result = func(*args)
+            stages.append((name, count_nodes(result), tracemalloc.get_traced_memory()[0] - before))
+            return result
+
+        blocks = measure('ast', parser.parse, source)
+        st = SymbolTable()
+        tc = TypeChecker()
+        for block in blocks:
+            tc.typecheck(block, st)
+        ir = measure('ir', IRGen().generate_IR, blocks)
+        measure('c_ast', CASTGenerator().generate_AST, ir, st)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        for name, nodes, size_bytes in stages:
+            print(f"{lines:>12} {name:>10} {nodes:>10} {size_bytes / 2 ** 20:>8.1f} {size_bytes / nodes:>11.1f}")
+        print(f"{lines:>12} {'peak':>10} {'':>10} {peak / 2 ** 20:>8.1f}")
+
+
+def counting(visitor_class):
+    """ Subclass of visitor_class counting the nodes its instances visit """
+    class Counting(visitor_class):
+        visits = 0
+
+        def visit(self, node, *args):
+            Counting.visits += 1
+            return super().visit(node, *args)
+    return Counting
+
+
+def run_visitors(blocks, visitors):
+    """ Seconds each visitor takes on its stage, from the typed AST blocks to C code """
+    st = SymbolTable()
+    checker = visitors['typecheck']()
+    typecheck, _ = timed(lambda: [checker.typecheck(block, st) for block in blocks])
+    ir_gen, ir = timed(visitors['ir']().generate_IR, blocks)
+    c_ast_gen, c_ast = timed(visitors['c_ast']().generate_AST, ir, st)
+    c_code_gen, _ = timed(visitors['c_code']().generate_code, c_ast)
+    return {'typecheck': typecheck, 'ir': ir_gen, 'c_ast': c_ast_gen, 'c_code': c_code_gen}
+
+
+def bench_visitors(args):
+    visitors = {'typecheck': TypeChecker, 'ir': IRGen, 'c_ast': CASTGenerator, 'c_code': CCodeGenerator}
+    parser = pythonParser()
+    parser.build()
+    print(f"{'lines':>12} {'stage':>10} {'visits':>10} {'seconds':>10} {'visits/s':>12}")
+    for size in args.sizes or [10000, 100000]:
+        source = synthetic_source(size, args.depth)
+        lines = source.count('\n')
+        counters = {stage: counting(visitor) for stage, visitor in visitors.items()}
+        run_visitors(parser.parse(source), counters)
+        seconds = run_visitors(parser.parse(source), visitors)
+        for stage, counter in counters.items():
+            print(f"{lines:>12} {stage:>10} {counter.visits:>10} {seconds[stage]:>10.3f} {counter.visits / seconds[stage]:>12.0f}")
+
+
+def bench_parse(args):
+    parser = pythonParser()
+    parser.build()
+    print(f"{'lines':>12} {'depth':>6} {'seconds':>10} {'us/line':>10}")
+    for size in args.sizes or [1000, 10000, 100000]:
+        source = synthetic_source(size, args.depth)
+        lines = source.count('\n')
+        seconds, _ = timed(parser.parse, source)
+        print(f"{lines:>12} {args.depth:>6} {seconds:>10.3f} {seconds / lines * 1e6:>10.2f}")
+
+
+def run_program(source, input=''):
+    """
+    Compile source with the full pipeline and time one run of the executable on input
+    """
+    with tempfile.TemporaryDirectory() as build_dir:
+        input_file = os.path.join(build_dir, 'program.py')
+        with open(input_file, 'w') as f:
+            f.write(source)
+        executable = os.path.join(build_dir, 'program')
+        compiler(input_file, executable + '.c', executable)
+        seconds, (code, stdout) = timed(execute_program, executable, input)
+        assert code == 0, stdout
+        return seconds, stdout
+
+
+def bench_list_append(args):
+    print(f"{'appends':>12} {'loop':>10} {'seconds':>10} {'ns/append':>10}")
+    for size in args.sizes or [1000000]:
+        programs = {
+            # Every iteration appends, so the generator reserves the list up front
+            'reserved': f'c: [int] = []\nfor i in range({size}):\n\tc.append(i)\n',
+            # A conditional append, so the list grows geometrically as it goes
+            'growing': f'c: [int] = []\nfor i in range({size}):\n\tif i >= 0:\n\t\tc.append(i)\n',
+        }
+        for loop, source in programs.items():
+            seconds, _ = run_program(source)
+            print(f"{size:>12} {loop:>10} {seconds:>10.3f} {seconds / size * 1e9:>10.2f}")
+
+
+def bench_list_slice(args):
+    print(f"{'length':>12} {'slices':>10} {'seconds':>10} {'ns/slice':>10}")
+    slices = 10000
+    for size in args.sizes or [1000, 100000]:
+        # Slices are views, so the time should not grow with the length of the slice
+        source = f'a: [int] = []\nfor i in range({size}):\n\ta.append(i)\nfor i in range({slices}):\n\tb: [int] = a[1:{size}]\n'
+        seconds, _ = run_program(source)
+        print(f"{size:>12} {slices:>10} {seconds:>10.3f} {seconds / slices * 1e9:>10.2f}")
+
+
+def bench_list_sum(args):
+    print(f"{'elements':>12} {'loop':>10} {'seconds':>10} {'ns/element':>10}")
+    for size in args.sizes or [10000000]:
+        build = f'a: [int] = []\nfor i in range({size}):\n\ta.append(i)\ns: int = 0\n'
+        programs = {
+            # for x in a reads the elements without bounds checks
+            'for_in': build + 'for x in a:\n\ts = s + x\nprint(s)\n',
+            # a is built by appends, so its length is unknown and a[i] stays checked
+            'indexed': build + f'for i in range({size}):\n\tx: int = a[i]\n\ts = s + x\nprint(s)\n',
+        }
+        # Only the time spent summing is reported, the time to build the list is subtracted
+        build_seconds = min(run_program(build)[0] for _ in range(args.repeat))
+        for loop, source in programs.items():
+            seconds = min(run_program(source)[0] for _ in range(args.repeat)) - build_seconds
+            print(f"{size:>12} {loop:>10} {seconds:>10.3f} {seconds / size * 1e9:>10.2f}")
+
+
+def bench_str_append(args):
+    print(f"{'appends':>12} {'string':>10} {'seconds':>10} {'ns/append':>10}")
+    for size in args.sizes or [1000, 10000]:
+        programs = {
+            # s is only read by the concatenation and the print, so it is extended in place
+            'in_place': f's: str = ""\nfor i in range({size}):\n\ts = s + "ab"\nprint(s)\n',
+            # t shares the buffer of s, so every concatenation copies s. Quadratic
+            # in time and, since main never frees its strings, in memory too
+            'copied': f's: str = ""\nt: str = s\nfor i in range({size}):\n\ts = s + "ab"\nprint(s)\n',
+        }
+        for string, source in programs.items():
+            seconds, _ = run_program(source)
+            print(f"{size:>12} {string:>10} {seconds:>10.3f} {seconds / size * 1e9:>10.2f}")
+
+
+def bench_print(args):
+    print(f"{'prints':>12} {'values':>10} {'seconds':>10} {'ns/print':>10}")
+    for size in args.sizes or [1000000]:
+        programs = {
+            'int': f'for i in range({size}):\n\tprint(i)\n',
+            'int_str': f'for i in range({size}):\n\tprint(i, "x")\n',
+        }
+        for values, source in programs.items():
+            seconds = min(run_program(source)[0] for _ in range(args.repeat))
+            print(f"{size:>12} {values:>10} {seconds:>10.3f} {seconds / size * 1e9:>10.2f}")
+
+
+def bench_input(args):
+    print(f"{'ints':>12} {'reader':>12} {'seconds':>10} {'ns/int':>10}")
+    for size in args.sizes or [1000000]:
+        data = ' '.join(str(i) for i in range(size)) + '\n'
+        programs = {
+            'input_int': f'a: [int] = []\nfor i in range({size}):\n\ta.append(input_int())\n',
+            'input_ints': f'a: [int] = input_ints({size})\n',
+            'input_list': 'a: [int] = input_list_int()\n',
+        }
+        for reader, source in programs.items():
+            seconds = min(run_program(source, data)[0] for _ in range(args.repeat))
+            print(f"{size:>12} {reader:>12} {seconds:>10.3f} {seconds / size * 1e9:>10.2f}")
+
+
+def bench_parser_build(args):
+    def build(cache_dir):
+        parser = pythonParser()
+        parser.build(cache_dir=cache_dir)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold, _ = timed(build, cache_dir)
+        warm = min(timed(build, cache_dir)[0] for _ in range(args.repeat))
+    print(f"cold build (tables generated and cached): {cold * 1000:>8.1f} ms")
+    print(f"warm build (tables read from cache):      {warm * 1000:>8.1f} ms")
+
+
+benchmarks = {
+    'c_ast_gen': bench_c_ast_gen,
+    'c_code_gen': bench_c_code_gen,
+    'nested_loops': bench_nested_loops,
+    'const_prop': bench_const_prop,
+    'cfg': bench_cfg,
+    'elif_chain': bench_elif_chain,
+    'parse': bench_parse,
+    'memory': bench_memory,
+    'visitors': bench_visitors,
+    'list_append': bench_list_append,
+    'list_slice': bench_list_slice,
+    'list_sum': bench_list_sum,
+    'str_append': bench_str_append,
+    'print': bench_print,
+    'input': bench_input,
+    'parser_build': bench_parser_build,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the compiler stages')
+    parser.add_argument('benchmark', choices=benchmarks.keys(), help='The benchmark to run')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Sizes of the synthetic programs, in statements, lines or appends depending on the benchmark')
+    parser.add_argument('--depth', type=int, default=32, help='Nesting depth of the synthetic sources')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs to take the best time of')
+    args = parser.parse_args()
+    benchmarks[args.benchmark](args)
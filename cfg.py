@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field, asdict
+from ir_gen import IR_Label, IR_Goto, IR_IfStmt, IR_ElifStmt, IR_ReturnStmt
+
+
+@dataclass
+class BasicBlock:
+    index: int
+    # IR lines ir[start:end] of the block
+    start: int
+    end: int
+    # Label of the function the block belongs to, None for the main program
+    function: str = None
+    # A branch's successors are its fall through (true) block, then its false block
+    successors: list = field(default_factory=list)
+    predecessors: list = field(default_factory=list)
+    # Immediate dominator, None for entries and for blocks control never reaches
+    idom: int = None
+    # Innermost loop of cfg.loops the block is in, None outside of loops
+    loop: int = None
+
+
+@dataclass
+class Loop:
+    header: int
+    # Blocks jumping back to the header
+    latches: list
+    blocks: list
+    # Loop of cfg.loops this one is nested in
+    parent: int = None
+    depth: int = 1
+
+
+@dataclass
+class CFG:
+    ir: list
+    blocks: list
+    # Blocks control reaches without an edge: the program's first block and every function's
+    entries: list
+    block_of_label: dict
+    loops: list = field(default_factory=list)
+    # Numbers of every reachable block in a depth first walk of the dominator tree
+    dom_pre: dict = field(default_factory=dict)
+    dom_post: dict = field(default_factory=dict)
+
+    def lines(self, block: BasicBlock):
+        return self.ir[block.start:block.end]
+
+    def dominates(self, a, b):
+        """ Whether every path from an entry to block b goes through block a """
+        if a not in self.dom_pre or b not in self.dom_pre:
+            return False
+        return self.dom_pre[a] <= self.dom_pre[b] and self.dom_post[b] <= self.dom_post[a]
+
+    def loop_depth(self, index):
+        loop = self.blocks[index].loop
+        return 0 if loop is None else self.loops[loop].depth
+
+
+def is_branch(ir_line):
+    return isinstance(ir_line, (IR_IfStmt, IR_ElifStmt))
+
+
+def false_label(ir_line):
+    return ir_line.if_false.label if isinstance(ir_line, IR_IfStmt) else ir_line.elif_false.label
+
+
+def build_cfg(ir) -> CFG:
+    """
+    Split the IR into basic blocks, link them, and find their dominators and loops.
+
+    A block starts at a label or after a goto, a branch or a return. A function
+    is `Goto(skip)`, `Label(FUNC_...)`, its body and `Label(skip)`: the program
+    jumps over it, so the function's first block is an entry of its own and its
+    body never falls through into the skip label.
+    """
+    leaders = {0} if ir else set()
+    # skip label of each function, by the index of its FUNC label
+    function_ends = {}
+    for idx, ir_line in enumerate(ir):
+        if isinstance(ir_line, IR_Label):
+            leaders.add(idx)
+            if 'FUNC' in ir_line.value and idx > 0 and isinstance(ir[idx - 1], IR_Goto):
+                function_ends[idx] = ir[idx - 1].label
+        elif isinstance(ir_line, (IR_Goto, IR_IfStmt, IR_ElifStmt, IR_ReturnStmt)) and idx + 1 < len(ir):
+            leaders.add(idx + 1)
+    starts = sorted(leaders)
+
+    blocks = []
+    block_of_label = {}
+    function = None
+    function_end = None
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(ir)
+        first = ir[start]
+        if isinstance(first, IR_Label):
+            if first.value == function_end:
+                function = function_end = None
+            if start in function_ends:
+                function, function_end = first.value, function_ends[start]
+            block_of_label[first.value] = index
+        blocks.append(BasicBlock(index=index, start=start, end=end, function=function))
+
+    entries = [0] if blocks else []
+    for block in blocks:
+        last = ir[block.end - 1]
+        next_block = blocks[block.index + 1] if block.index + 1 < len(blocks) else None
+        if next_block is not None and next_block.start in function_ends:
+            entries.append(next_block.index)
+        if next_block is not None and block.function is not None and next_block.function is None:
+            # the end of a function's body, only reached by jumping over the function
+            next_block = None
+        if isinstance(last, IR_Goto):
+            block.successors = [block_of_label[last.label]]
+        elif is_branch(last):
+            block.successors = [next_block.index, block_of_label[false_label(last)]]
+        elif isinstance(last, IR_ReturnStmt) or next_block is None:
+            block.successors = []
+        else:
+            block.successors = [next_block.index]
+        for successor in block.successors:
+            blocks[successor].predecessors.append(block.index)
+    cfg = CFG(ir=ir, blocks=blocks, entries=entries, block_of_label=block_of_label)
+    find_dominators(cfg)
+    find_loops(cfg)
+    return cfg
+
+
+def reverse_postorder(cfg: CFG):
+    """ Blocks reachable from the entries, every block ahead of its successors but for back edges """
+    order = []
+    visited = set()
+    for entry in reversed(cfg.entries):
+        if entry in visited:
+            continue
+        visited.add(entry)
+        stack = [(entry, iter(cfg.blocks[entry].successors))]
+        while stack:
+            index, successors = stack[-1]
+            for successor in successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, iter(cfg.blocks[successor].successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(index)
+    order.reverse()
+    return order
+
+
+def find_dominators(cfg: CFG):
+    """
+    Immediate dominator of every block, with the iterative algorithm of Cooper,
+    Harvey and Kennedy. The entries hang off a virtual root, numbered -1
+    """
+    order = reverse_postorder(cfg)
+    number = {index: i + 1 for i, index in enumerate(order)}
+    number[-1] = 0
+    entries = set(cfg.entries)
+    idom = {-1: -1}
+    for entry in cfg.entries:
+        idom[entry] = -1
+
+    def intersect(a, b):
+        while a != b:
+            while number[a] > number[b]:
+                a = idom[a]
+            while number[b] > number[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for index in order:
+            if index in entries:
+                continue
+            new = None
+            for predecessor in cfg.blocks[index].predecessors:
+                if predecessor in idom:
+                    new = predecessor if new is None else intersect(predecessor, new)
+            if idom.get(index) != new:
+                idom[index] = new
+                changed = True
+
+    children = {}
+    for index in order:
+        cfg.blocks[index].idom = None if idom[index] == -1 else idom[index]
+        children.setdefault(idom[index], []).append(index)
+    counter = 0
+    stack = [(-1, iter(children.get(-1, [])))]
+    while stack:
+        index, rest = stack[-1]
+        child = next(rest, None)
+        if child is not None:
+            counter += 1
+            cfg.dom_pre[child] = counter
+            stack.append((child, iter(children.get(child, []))))
+        else:
+            stack.pop()
+            counter += 1
+            cfg.dom_post[index] = counter
+    cfg.dom_post.pop(-1)
+
+
+def find_loops(cfg: CFG):
+    """
+    Natural loops: an edge to a block dominating its source jumps back to the
+    head of a loop, made of the blocks reaching the edge without going through
+    the head. Loops sharing a head are one loop. Outer loops are numbered
+    before the loops nested in them
+    """
+    latches = {}
+    for block in cfg.blocks:
+        for successor in block.successors:
+            if cfg.dominates(successor, block.index):
+                latches.setdefault(successor, []).append(block.index)
+    loops = []
+    for header in sorted(latches):
+        body = {header}
+        stack = list(latches[header])
+        while stack:
+            index = stack.pop()
+            if index not in body:
+                body.add(index)
+                stack.extend(cfg.blocks[index].predecessors)
+        loops.append(Loop(header=header, latches=latches[header], blocks=sorted(body)))
+    # Outer loops hold more blocks than the loops in them, so walking from the
+    # largest loop down, a block's loop is the innermost one seen so far
+    loops.sort(key=lambda loop: (-len(loop.blocks), loop.header))
+    for number, loop in enumerate(loops):
+        loop.parent = cfg.blocks[loop.header].loop
+        if loop.parent is not None:
+            loop.depth = loops[loop.parent].depth + 1
+        for index in loop.blocks:
+            cfg.blocks[index].loop = number
+    cfg.loops = loops
+
+
+def cfg_to_json(cfg: CFG):
+    """ The blocks and loops of cfg as JSON serializable dicts, without the IR """
+    return {
+        'entries': cfg.entries,
+        'blocks': [asdict(block) for block in cfg.blocks],
+        'loops': [asdict(loop) for loop in cfg.loops],
+    }
+
+
+def cfg_to_str(cfg: CFG):
+    """ The IR of every block under a line with its edges, dominator and loop """
+    def names(indices, prefix='B'):
+        return ' '.join(f'{prefix}{index}' for index in indices) or '-'
+
+    lines = []
+    for block in cfg.blocks:
+        idom = '-' if block.idom is None else f'B{block.idom}'
+        loop = '-' if block.loop is None else f'L{block.loop}'
+        entry = ' entry' if block.index in cfg.entries else ''
+        function = f' {block.function}' if block.function else ''
+        lines.append(f'B{block.index}{entry}{function}: preds {names(block.predecessors)} succs {names(block.successors)} idom {idom} loop {loop}')
+        lines += ['    ' + repr(ir_line) for ir_line in cfg.lines(block)]
+    for number, loop in enumerate(cfg.loops):
+        parent = '-' if loop.parent is None else f'L{loop.parent}'
+        lines.append(f'L{number}: header B{loop.header} latches {names(loop.latches)} parent {parent} depth {loop.depth} blocks {names(loop.blocks)}')
+    return '\n'.join(lines) + '\n'
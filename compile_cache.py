@@ -0,0 +1,108 @@
+import hashlib
+import os
+import shutil
+import uuid
+from runtime import runtime_hash
+
+COMPILE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'compile_cache')
+# Every module whose code can change the IR, the C code or the executable
+COMPILER_MODULES = ['lex.py', 'yacc.py', 'AST.py', 'symbol_table.py', 'type_checker.py', 'ir_gen.py', 'cfg.py', 'const_prop.py', 'C_AST_gen.py', 'C_AST.py', 'visitor.py', 'compiler.py', 'runtime.py', 'ply/lex.py', 'ply/yacc.py']
+
+compiler_version_hash = None
+
+
+def compiler_version():
+    """
+    Hash of the compiler's own source code, so editing the compiler invalidates the cache
+    """
+    global compiler_version_hash
+    if compiler_version_hash is None:
+        h = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in COMPILER_MODULES:
+            with open(os.path.join(here, name), 'rb') as f:
+                h.update(name.encode() + b'\0' + f.read() + b'\0')
+        compiler_version_hash = h.hexdigest()
+    return compiler_version_hash
+
+
+class CompileCache:
+    """
+    Content addressed cache of compiled programs.
+
+    An entry holds the IR text, the C code and the executable of one program
+    and is keyed by the source text, opt_on, the compiler version and the C
+    runtime the program is built against. Entries live in one directory each;
+    a hit refreshes the directory's mtime and the least recently used entries
+    are evicted once the cache grows past max_size bytes.
+    """
+    IR = 'ir.txt'
+    C = 'program.c'
+    EXECUTABLE = 'program'
+
+    def __init__(self, directory=None, max_size=256 * 1024 * 1024):
+        self.directory = directory or COMPILE_CACHE_DIR
+        self.max_size = max_size
+
+    def key(self, source, opt_on):
+        h = hashlib.sha256()
+        h.update(compiler_version().encode() + b'\0')
+        h.update(b'opt_on\0' if opt_on else b'opt_off\0')
+        h.update(runtime_hash().encode() + b'\0')
+        h.update(source.encode())
+        return h.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def restore(self, key, c, executable, ir_tmp=None):
+        """
+        Copy a cached entry to c, executable and ir_tmp. Returns False on a miss
+        """
+        entry = self.entry_path(key)
+        try:
+            shutil.copyfile(os.path.join(entry, self.C), c)
+            shutil.copy2(os.path.join(entry, self.EXECUTABLE), executable)
+            if ir_tmp:
+                shutil.copyfile(os.path.join(entry, self.IR), ir_tmp)
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key, ir_text, c, executable):
+        entry = self.entry_path(key)
+        tmp_entry = f'{entry}.{uuid.uuid4().hex}.tmp'
+        try:
+            os.makedirs(tmp_entry)
+            with open(os.path.join(tmp_entry, self.IR), 'w') as f:
+                f.write(ir_text)
+            shutil.copyfile(c, os.path.join(tmp_entry, self.C))
+            shutil.copy2(executable, os.path.join(tmp_entry, self.EXECUTABLE))
+            # Atomic, so a concurrent restore never sees half an entry
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Either another compile stored the same entry first, or the cache
+            # is not writable. Both only cost a cache miss later
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp'):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+            total += size
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -1,14 +1,21 @@
 from os import execl
-from yacc import pythonParser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+import json
+import os
+import time
+from yacc import get_shared_parser
+from compile_cache import CompileCache
+from runtime import RUNTIME_DIR, runtime_object
+from profiler import Profiler, stage, count_nodes, write_chrome_trace
 from type_checker import TypeChecker, SymbolTable
 from ir_gen import IRGen
 from C_AST_gen import CASTGenerator
 from C_AST import CCodeGenerator
+from const_prop import propagate_constants
 
 def py_parser():
-    p = pythonParser()
-    p.build()
-    return p
+    return get_shared_parser()
 
 def read(filename):
     with open(filename) as f:
@@ -40,51 +47,220 @@ def from_blocks_to_ir(blocks):
     ir_generator.generate_IR(blocks)
     return ir_generator.IR
 
-def from_ir_st_to_c(ir, st, opt_on):
+def from_ir_st_to_c_ast(ir, st):
     c_ast_generator = CASTGenerator()
-    c_ast = c_ast_generator.generate_AST(ir, st)
+    return c_ast_generator.generate_AST(ir, st)
+
+def from_c_ast_to_c(c_ast, out=None):
     c_code_generator = CCodeGenerator()
-    c_code_generator.eval_mode = opt_on
-    return c_code_generator.generate_code(c_ast)
+    return c_code_generator.generate_code(c_ast, out=out)
 
-def compiler(input_file, c, executable, opt_on=False, ir_tmp=None):
-    input_str = read(input_file)
-    input_str = remove_comments(input_str)
+def front_end(input_file, c, opt_on=False, ir_tmp=None, profiler=None):
+    """
+    Every stage from reading input_file to writing the C code to c. Returns the IR as text
+    """
+    with stage(profiler, 'read'):
+        input_str = read(input_file)
+        input_str = remove_comments(input_str)
+        if profiler: profiler.count('lines', input_str.count('\n') + 1)
 
     for index, s in enumerate(input_str.split('\n')):
         if s.startswith(' ') and len(s.strip()) != 0:
             raise Exception(f"Leading spaces detected at line {index}\nIndentation using spaces are not supported. Did you mean to use tabs?")
 
-    try:
-        blocks = parse_from_code_to_blocks(input_str)
-    except Exception as e:
-        raise Exception("Parser Error: " + e.args[0])
-    try:
-        st = type_check_from_blocks_to_st(blocks)
-    except Exception as e:
-        raise Exception("Type Checker Error: " + e.args[0])
+    with stage(profiler, 'parse'):
+        try:
+            blocks = parse_from_code_to_blocks(input_str)
+        except Exception as e:
+            raise Exception("Parser Error: " + e.args[0])
+        if profiler: profiler.count('ast_nodes', count_nodes(blocks))
+    with stage(profiler, 'typecheck'):
+        try:
+            st = type_check_from_blocks_to_st(blocks)
+        except Exception as e:
+            raise Exception("Type Checker Error: " + e.args[0])
+
+    with stage(profiler, 'ir'):
+        try:
+            ir = from_blocks_to_ir(blocks)
+        except Exception as e:
+            raise Exception("IR Translation Error: ", e.args[0])
+        ir_text = ir_to_str(ir)
+        if ir_tmp: write(ir_tmp, ir_text)
+        if profiler: profiler.count('ir_lines', len(ir))
+    if opt_on:
+        with stage(profiler, 'opt'):
+            try:
+                ir = propagate_constants(ir)
+            except Exception as e:
+                raise Exception("Optimization Error: " + str(e))
+            if profiler: profiler.count('ir_lines', len(ir))
+    with stage(profiler, 'c_ast'):
+        try:
+            c_ast = from_ir_st_to_c_ast(ir, st)
+        except Exception as e:
+            raise Exception("Unable to generate target: " + e.args[0])
+        if profiler: profiler.count('c_ast_nodes', count_nodes(c_ast))
+    with stage(profiler, 'c_emit'):
+        try:
+            with open(c, 'w+') as f:
+                from_c_ast_to_c(c_ast, out=f)
+                if profiler: profiler.count('c_bytes', f.tell())
+        except Exception as e:
+            raise Exception("Unable to generate target: " + e.args[0])
+    return ir_text
+
+def back_end(c, executable, profiler=None):
+    """
+    Build executable from the C code in c
+    """
+    with stage(profiler, 'gcc'):
+        try:
+            check_if_code_compiles(c, executable)
+        except Exception as e:
+            raise Exception("Unable to compile output: ", e)
+
+def compiler(input_file, c, executable, opt_on=False, ir_tmp=None, cache=None, profiler=None):
+    """
+    Compile input_file to the C file c and the executable. With a CompileCache
+    as cache, an unchanged program is copied out of the cache without running
+    any stage. With a Profiler as profiler, every stage is recorded in it
+    """
+    if cache is not None:
+        with stage(profiler, 'cache'):
+            key = cache.key(read(input_file), opt_on)
+            hit = cache.restore(key, c, executable, ir_tmp)
+        if hit:
+            return
+    ir_text = front_end(input_file, c, opt_on=opt_on, ir_tmp=ir_tmp, profiler=profiler)
+    back_end(c, executable, profiler=profiler)
+    if cache is not None:
+        cache.store(key, ir_text, c, executable)
+
+
+@dataclass
+class CompileResult:
+    input_file: str
+    c: str
+    executable: str
+    # StageProfile of every stage that ran
+    stages: list = field(default_factory=list)
+    error: str = None
+    cached: bool = False
+    key: str = None
+    ir_text: str = None
 
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def timings(self):
+        return {profile.name: profile.wall for profile in self.stages}
+
+def front_end_job(result, opt_on, cache, profiler):
+    # Runs in a worker process, so errors come back as text rather than as exceptions
     try:
-        ir = from_blocks_to_ir(blocks)
+        if cache is not None:
+            with profiler.stage('cache'):
+                result.key = cache.key(read(result.input_file), opt_on)
+                result.cached = cache.restore(result.key, result.c, result.executable)
+            if result.cached:
+                return result
+        result.ir_text = front_end(result.input_file, result.c, opt_on=opt_on, profiler=profiler)
     except Exception as e:
-        raise Exception("IR Translation Error: ", e.args[0])
-    if ir_tmp: write(ir_tmp, ir_to_str(ir))
+        result.error = str(e)
+    finally:
+        result.stages += profiler.stages
+    return result
+
+def back_end_job(result, cache, profiler):
     try:
-        code = from_ir_st_to_c(ir, st, opt_on=opt_on)
+        back_end(result.c, result.executable, profiler=profiler)
+        if cache is not None:
+            cache.store(result.key, result.ir_text, result.c, result.executable)
     except Exception as e:
-        raise Exception("Unable to generate target: " + e.args[0])
+        result.error = str(e)
+    result.stages += profiler.stages
+    # Only needed to fill the cache
+    result.ir_text = None
+    return result
 
-    write(c, code)
+def compile_many(paths, jobs=None, opt_on=False, cache=None, memory=False):
+    """
+    Compile every program in paths to an executable.
 
-    try:
-        check_if_code_compiles(c, executable)
-    except Exception as e:
-        raise Exception("Unable to compile output: ", e)
+    The front-end stages run in a pool of `jobs` processes and each C file is
+    handed to a pool of `jobs` gcc subprocesses as soon as it is written, so
+    the two overlap. Programs found in cache, a CompileCache, skip both.
+    A failing file does not stop the others. Returns one
+    CompileResult per path, in the same order as paths. The C file and the
+    executable of each program are written next to it. memory=True also
+    records the peak memory of every stage.
+    """
+    jobs = jobs or os.cpu_count()
+    # Every stage of every program is timed from here, so they line up in a trace
+    origin = time.perf_counter()
+    results = []
+    for path in paths:
+        base = os.path.splitext(path)[0]
+        results.append(CompileResult(input_file=path, c=base + '.c', executable=base))
+
+    with ProcessPoolExecutor(max_workers=jobs) as front_end_pool, ThreadPoolExecutor(max_workers=jobs) as gcc_pool:
+        pending = {front_end_pool.submit(front_end_job, result, opt_on, cache, Profiler(memory, origin)): index for index, result in enumerate(results)}
+        gcc_jobs = []
+        for future in as_completed(pending):
+            index = pending[future]
+            try:
+                # The worker sends back a filled in copy of the result
+                results[index] = future.result()
+            except Exception as e:
+                # The worker process itself died
+                results[index].error = f"Front-end worker failed: {e!r}"
+            if results[index].ok and not results[index].cached:
+                gcc_jobs.append(gcc_pool.submit(back_end_job, results[index], cache, Profiler(False, origin)))
+        for future in gcc_jobs:
+            future.result()
+    return results
+
+def find_programs(inputs):
+    """
+    The .py files in inputs, with directories expanded to the .py files they contain
+    """
+    paths = []
+    for name in inputs:
+        if os.path.isdir(name):
+            paths += sorted(os.path.join(name, f) for f in os.listdir(name) if f.endswith('.py'))
+        else:
+            paths.append(name)
+    return paths
+
+def batch_chrome_trace(results):
+    """
+    Chrome trace events of compile_many results, one track per program
+    """
+    events = []
+    for index, result in enumerate(results):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': index, 'args': {'name': result.input_file}})
+        profiler = Profiler()
+        profiler.stages = result.stages
+        events += profiler.to_chrome_trace(pid=0, tid=index)
+    return events
+
+def print_report(results):
+    stages = ['cache', 'read', 'parse', 'typecheck', 'ir', 'opt', 'c_ast', 'c_emit', 'gcc']
+    print(f"{'program':<40}" + ''.join(f"{name:>10}" for name in stages) + "  status")
+    for result in results:
+        times = ''.join(f"{result.timings[name]:>10.3f}" if name in result.timings else f"{'-':>10}" for name in stages)
+        status = ('ok (cached)' if result.cached else 'ok') if result.ok else result.error.split('\n')[0]
+        print(f"{result.input_file:<40}{times}  {status}")
+    failed = sum(not result.ok for result in results)
+    print(f"{len(results) - failed} compiled, {failed} failed")
 
 
 def check_if_code_compiles(filename, output):
     import subprocess
-    proc = subprocess.run(f'gcc {filename} -o {output}', shell=True, stdout=subprocess.PIPE, universal_newlines=True)
+    proc = subprocess.run(f'gcc -I{RUNTIME_DIR} {filename} {runtime_object()} -o {output}', shell=True, stdout=subprocess.PIPE, universal_newlines=True)
     assert proc.returncode == 0, f"gcc return code was {proc.returncode}\n{proc.stderr}"
 
 
@@ -96,12 +272,33 @@ def execute_program(filename, input=""):
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Compile a python program to C')
-    parser.add_argument('input', help='The python program to compile')
+    parser.add_argument('input', nargs='+', help='The python program to compile, or with --batch the programs and directories of programs')
     parser.add_argument('-o', '--opt', help='Enable optimization', action='store_true')
     parser.add_argument('-r', '--run', help='Run the code if successfully compiled', action='store_true')
+    parser.add_argument('-b', '--batch', help='Compile many programs in parallel and print a report', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of parallel jobs in batch mode, defaults to the number of CPUs')
+    parser.add_argument('--report', help='Also write the batch report as JSON to this file')
+    parser.add_argument('--cache', help='Reuse the output of unchanged programs from the compilation cache', action='store_true')
+    parser.add_argument('--cache-dir', help='Directory of the compilation cache, implies --cache')
+    parser.add_argument('-p', '--profile', help='Print the time, memory and counts of every stage', action='store_true')
+    parser.add_argument('--profile-out', help='Write the profile to this file, implies --profile')
+    parser.add_argument('--profile-format', choices=['json', 'chrome'], default='json', help='Format of --profile-out, chrome is the Chrome trace event format')
     args = parser.parse_args()
+    cache = CompileCache(args.cache_dir) if args.cache or args.cache_dir else None
+    profile = args.profile or args.profile_out is not None
+
+    if args.batch:
+        results = compile_many(find_programs(args.input), jobs=args.jobs, opt_on=args.opt, cache=cache, memory=profile)
+        print_report(results)
+        if args.report:
+            write(args.report, json.dumps([asdict(result) for result in results], indent=2) + '\n')
+        if args.profile_out and args.profile_format == 'chrome':
+            write_chrome_trace(args.profile_out, batch_chrome_trace(results))
+        elif args.profile_out:
+            write(args.profile_out, json.dumps({result.input_file: [asdict(profile) for profile in result.stages] for result in results}, indent=2) + '\n')
+        exit(0 if all(result.ok for result in results) else 1)
 
-    name = args.input
+    name = args.input[0]
     input_file = f'./playground/{name}.py'
     c_file = input_file.replace('.py', '.c')
     output_file = input_file.replace('.py', '')
@@ -109,12 +306,20 @@ if __name__ == '__main__':
 
     print(f"Compiling {input_file} to {c_file}. Optimization: {'on' if args.opt else 'off'}")
 
+    profiler = Profiler(memory=True) if profile else None
     try:
-        compiler(input_file, c_file, output_file, opt_on=args.opt, ir_tmp=ir_tmp_file)
+        compiler(input_file, c_file, output_file, opt_on=args.opt, ir_tmp=ir_tmp_file, cache=cache, profiler=profiler)
     except Exception as e:
         raise
     else:
         print('Successfully compiled to C code')
+    finally:
+        if profiler:
+            print(profiler.report())
+        if args.profile_out and args.profile_format == 'chrome':
+            profiler.write_chrome_trace(args.profile_out)
+        elif args.profile_out:
+            profiler.write_json(args.profile_out)
 
     try:
         check_if_code_compiles(c_file, output_file)
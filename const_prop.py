@@ -0,0 +1,410 @@
+import math
+import re
+from collections import deque
+from dataclasses import fields, replace
+from ir_gen import *
+from cfg import build_cfg, is_branch
+
+# Operators whose result CASTGenerator types as bool_t, whatever their operands
+COMPARISONS = ["<", "<=", "=>", ">", "=="]
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+REGISTER = re.compile(r'_t(\d+)_')
+
+# Names each IR line reads, which can be replaced by a constant
+READS = {
+    IR_BinaryOperation: ('left_reg', 'right_reg'),
+    IR_UnaryOperation: ('operand_reg',),
+    IR_Assignment: ('val',),
+    IR_IfStmt: ('cond_reg',),
+    IR_ElifStmt: ('cond_reg',),
+    IR_ReturnStmt: ('reg',),
+    IR_Argument_VAL: ('reg',),
+    IR_List_VAL: ('reg',),
+    IR_LstAdd: ('val_reg',),
+    IR_NonPrimitiveIndex: ('idx_reg',),
+    IR_NonPrimitiveSlicing: ('start_reg', 'end_reg'),
+    IR_LoopStart: ('val',),
+    IR_LoopStop: ('val',),
+    IR_LoopStep: ('val',),
+}
+
+# Names each IR line writes a value that is never constant to
+KILLS = {
+    IR_StringConst: ('reg',),
+    IR_List: ('reg',),
+    IR_Parameter: ('reg',),
+    IR_Parameter_VAL: ('reg', 'name'),
+    IR_Argument: ('reg', 'function_call_reg'),
+    IR_FunctionCall: ('reg',),
+    IR_FunctionReturn: ('reg',),
+    IR_GetLength: ('result_reg',),
+    IR_NonPrimitiveIndex: ('result_reg',),
+    IR_ForLoopVar: ('reg',),
+    IR_NonPrimitiveSlicing: ('result_reg',),
+}
+
+
+def written_name(ir_line, field):
+    # parameters are named by an Id
+    name = getattr(ir_line, field)
+    return getattr(name, 'name', name)
+
+
+def literal_type(value):
+    if isinstance(value, bool):
+        return 'bool_t'
+    if isinstance(value, int):
+        return 'int_t'
+    if isinstance(value, float):
+        return 'float_t'
+    return None
+
+
+def binary_type(operator, left_t, right_t):
+    """ C type of a binary operation's result, the way CASTGenerator declares it """
+    if operator in COMPARISONS:
+        return 'bool_t'
+    if left_t is None or right_t is None:
+        return None
+    if 'float_t' in (left_t, right_t):
+        return 'float_t'
+    if 'str_t' in (left_t, right_t):
+        return 'str_t'
+    return 'int_t'
+
+
+def unary_type(operator, operand_t):
+    return 'bool_t' if operator == '!' else operand_t
+
+
+def as_type(value, type_t):
+    """
+    value, an int or a float as C computes it, stored in a variable of type_t.
+    None when the value cannot be written as a literal of that type
+    """
+    if type_t == 'float_t':
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, float) or not INT_MIN < value <= INT_MAX:
+        return None
+    if type_t == 'int_t':
+        return value
+    if type_t == 'bool_t' and value in (0, 1):
+        return bool(value)
+    return None
+
+
+def c_divide(a, b):
+    """ Integer division truncating towards zero, as in C """
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+def fold_binary(operator, left, right, type_t):
+    """ Value of `left operator right` in C, None if it is not a constant of type_t """
+    if type_t not in ('int_t', 'float_t', 'bool_t'):
+        return None
+    (left_t, a), (right_t, b) = left, right
+    floating = 'float_t' in (left_t, right_t)
+    a, b = (float(a), float(b)) if floating else (int(a), int(b))
+    if operator == '+':
+        value = a + b
+    elif operator == '-':
+        value = a - b
+    elif operator == '*':
+        value = a * b
+    elif operator == '/':
+        if b == 0:
+            return None
+        value = a / b if floating else c_divide(a, b)
+    elif operator == '%':
+        if floating or b == 0:
+            return None
+        value = a - b * c_divide(a, b)
+    elif operator == '^':
+        if floating:
+            return None
+        value = a ^ b
+    elif operator in ('and', '&'):
+        value = int(bool(a) and bool(b))
+    elif operator in ('or', '|'):
+        value = int(bool(a) or bool(b))
+    elif operator == '<':
+        value = int(a < b)
+    elif operator == '<=':
+        value = int(a <= b)
+    elif operator == '>':
+        value = int(a > b)
+    elif operator == '>=':
+        value = int(a >= b)
+    elif operator == '==':
+        value = int(a == b)
+    elif operator == '!=':
+        value = int(a != b)
+    else:
+        # '=>' and anything else gcc would reject
+        return None
+    return as_type(value, type_t)
+
+
+def fold_unary(operator, operand, type_t):
+    operand_t, a = operand
+    if operator in ('!', 'not'):
+        return as_type(int(not a), type_t)
+    if operator == '-' and operand_t != 'bool_t':
+        return as_type(-a, type_t)
+    return None
+
+
+def constant(type_t, value):
+    """ The constant value of type_t, None if value is not one """
+    if value is None or literal_type(value) != type_t:
+        return None
+    return (type_t, value)
+
+
+def same_constant(a, b):
+    # repr tells 0.0 and -0.0 apart
+    return a[0] == b[0] and repr(a[1]) == repr(b[1])
+
+
+class ConstantPropagation:
+    """
+    Sparse conditional constant propagation over the control flow graph of the IR.
+
+    Every register is written by a single IR line, so like an SSA value it has
+    one lattice value for the whole program: not evaluated yet, a constant, or
+    missing from self.registers' constants once it can hold more than one
+    value. Variables are assigned all over, so they are tracked per block
+    instead: the state of a block maps the variables holding a known constant
+    to it. Constants are (C type, value) pairs. Only the branches a constant
+    condition can take are followed, so code that never runs does not spoil
+    the constants of the rest.
+    """
+    def __init__(self, ir):
+        self.ir = ir
+        self.cfg = build_cfg(ir)
+        self.types = {}
+        self.ambiguous = set()
+        self.register_count = 0
+        # register -> constant, or None once it is not constant
+        self.registers = {}
+        # register -> blocks reading it
+        self.uses = {}
+        self.in_states = {}
+        self.worklist = deque()
+        self.queued = set()
+        self.infer_types()
+
+    def infer_types(self):
+        """
+        Type of every register and variable, as CASTGenerator declares them, by
+        function. A variable assigned values of different types is ambiguous
+        and never treated as a constant
+        """
+        for block in self.cfg.blocks:
+            function = block.function
+            for ir_line in self.cfg.lines(block):
+                for f in fields(ir_line):
+                    value = getattr(ir_line, f.name)
+                    match = REGISTER.fullmatch(value) if isinstance(value, str) else None
+                    if match:
+                        self.register_count = max(self.register_count, int(match.group(1)))
+                for name in READS.get(type(ir_line), ()):
+                    self.uses.setdefault(getattr(ir_line, name), set()).add(block.index)
+                if isinstance(ir_line, IR_PrimitiveLiteral):
+                    self.define(function, ir_line.reg, literal_type(ir_line.val))
+                elif isinstance(ir_line, IR_BinaryOperation):
+                    self.define(function, ir_line.result_reg, binary_type(ir_line.operator,
+                                self.type_of(function, ir_line.left_reg), self.type_of(function, ir_line.right_reg)))
+                elif isinstance(ir_line, IR_UnaryOperation):
+                    self.define(function, ir_line.result_reg, unary_type(ir_line.operator, self.type_of(function, ir_line.operand_reg)))
+                elif isinstance(ir_line, IR_Assignment):
+                    self.define(function, ir_line.name, self.type_of(function, ir_line.val))
+                elif isinstance(ir_line, (IR_LoopStart, IR_LoopStop, IR_LoopStep)):
+                    self.define(function, ir_line.reg, 'int_t')
+                elif isinstance(ir_line, IR_StringConst):
+                    self.define(function, ir_line.reg, 'str_t')
+                else:
+                    for name in KILLS.get(type(ir_line), ()):
+                        self.define(function, written_name(ir_line, name), None)
+
+    def define(self, function, name, type_t):
+        key = (function, name)
+        if key not in self.types:
+            self.types[key] = type_t
+        elif self.types[key] != type_t:
+            self.ambiguous.add(key)
+
+    def type_of(self, function, name):
+        key = (function, name)
+        return None if key in self.ambiguous else self.types.get(key)
+
+    def analyse(self):
+        blocks = self.cfg.blocks
+        out_states = {}
+        executable = set()
+        for index in self.cfg.entries:
+            self.enqueue(index)
+        while self.worklist:
+            index = self.worklist.popleft()
+            self.queued.discard(index)
+            block = blocks[index]
+            if index in self.cfg.entries:
+                state = {}
+            else:
+                state = self.meet([out_states[p] for p in block.predecessors if (p, index) in executable])
+            self.in_states[index] = state
+            out = self.transfer(block, dict(state))
+            changed = out_states.get(index) != out
+            out_states[index] = out
+            for successor in self.taken(block, out):
+                if (index, successor) not in executable or changed:
+                    executable.add((index, successor))
+                    self.enqueue(successor)
+
+    def enqueue(self, index):
+        if index not in self.queued:
+            self.worklist.append(index)
+            self.queued.add(index)
+
+    @staticmethod
+    def meet(states):
+        result = dict(states[0])
+        for state in states[1:]:
+            for name, constant in list(result.items()):
+                if name not in state or not same_constant(constant, state[name]):
+                    del result[name]
+        return result
+
+    def taken(self, block, state):
+        """ Successors of block control can reach with the state at its end """
+        last = self.ir[block.end - 1]
+        condition = self.lookup(state, last.cond_reg) if is_branch(last) else None
+        if condition:
+            true_block, false_block = block.successors
+            return [true_block] if condition[1] else [false_block]
+        return block.successors
+
+    def lookup(self, state, name):
+        if isinstance(name, str) and REGISTER.fullmatch(name):
+            return self.registers.get(name)
+        return state.get(name)
+
+    def write(self, state, name, constant):
+        """ Record name as holding constant, or anything if constant is None """
+        if not REGISTER.fullmatch(name):
+            if constant is None:
+                state.pop(name, None)
+            else:
+                state[name] = constant
+            return
+        if name in self.registers:
+            old = self.registers[name]
+            if old is None or (constant is not None and same_constant(old, constant)):
+                return
+            constant = None
+        self.registers[name] = constant
+        # the blocks reading the register have to be evaluated with its new value
+        for index in self.uses.get(name, ()):
+            if index in self.in_states:
+                self.enqueue(index)
+
+    def transfer(self, block, state, out=None):
+        """
+        Update state through the lines of block. With a list as out, the lines
+        are appended to it with constants folded and substituted
+        """
+        function = block.function
+        lines = self.cfg.lines(block)
+        loop_head = isinstance(lines[0], IR_Label) and ('FORRANGE' in lines[0].value or 'FORLIST' in lines[0].value)
+        for idx, ir_line in enumerate(lines):
+            if out is not None and not loop_head:
+                # reads are replaced with the values from before the line runs
+                literals, read_line = self.substitute(ir_line, state)
+            if isinstance(ir_line, IR_PrimitiveLiteral):
+                self.write(state, ir_line.reg, constant(literal_type(ir_line.val), ir_line.val))
+            elif isinstance(ir_line, IR_BinaryOperation):
+                left, right = self.lookup(state, ir_line.left_reg), self.lookup(state, ir_line.right_reg)
+                type_t = self.type_of(function, ir_line.result_reg)
+                value = fold_binary(ir_line.operator, left, right, type_t) if left and right else None
+                self.write(state, ir_line.result_reg, constant(type_t, value))
+            elif isinstance(ir_line, IR_UnaryOperation):
+                operand = self.lookup(state, ir_line.operand_reg)
+                type_t = self.type_of(function, ir_line.result_reg)
+                value = fold_unary(ir_line.operator, operand, type_t) if operand else None
+                self.write(state, ir_line.result_reg, constant(type_t, value))
+            elif isinstance(ir_line, IR_Assignment):
+                value = self.lookup(state, ir_line.val)
+                if loop_head and idx == 1:
+                    value = self.range_start(lines, state)
+                self.write(state, ir_line.name, value if value and value[0] == self.type_of(function, ir_line.name) else None)
+            elif isinstance(ir_line, (IR_LoopStart, IR_LoopStop, IR_LoopStep)):
+                value = self.lookup(state, ir_line.val)
+                self.write(state, ir_line.reg, value if value and value[0] == 'int_t' else None)
+            else:
+                for name in KILLS.get(type(ir_line), ()):
+                    self.write(state, written_name(ir_line, name), None)
+
+            if out is None:
+                continue
+            if loop_head:
+                out.append(ir_line)
+            elif isinstance(ir_line, (IR_BinaryOperation, IR_UnaryOperation)) and self.registers.get(ir_line.result_reg):
+                out.append(IR_PrimitiveLiteral(reg=ir_line.result_reg, val=self.registers[ir_line.result_reg][1]))
+            else:
+                out += literals + [read_line]
+        return state
+
+    def range_start(self, lines, state):
+        """
+        Constant the variable of a for range loop holds at the loop head. The IR
+        has no increment, so this is only known when the loop never runs
+        """
+        assign, compare = lines[1], lines[2] if len(lines) > 2 else None
+        if not isinstance(compare, IR_BinaryOperation):
+            return None
+        start, stop = self.lookup(state, assign.val), self.lookup(state, compare.right_reg)
+        if start and stop and start[1] >= stop[1]:
+            return start
+        return None
+
+    def substitute(self, ir_line, state):
+        """
+        Literals for every variable ir_line reads that holds a constant, and
+        ir_line reading the literals in their place
+        """
+        literals, changes = [], {}
+        for name in READS.get(type(ir_line), ()):
+            value = getattr(ir_line, name)
+            if not isinstance(value, str) or value not in state:
+                continue
+            self.register_count += 1
+            reg = f"_t{self.register_count}_"
+            literals.append(IR_PrimitiveLiteral(reg=reg, val=state[value][1]))
+            changes[name] = reg
+        return literals, replace(ir_line, **changes) if changes else ir_line
+
+    def rewrite(self):
+        """
+        The IR with every constant operation replaced by its value and every
+        constant variable read replaced by a literal. Code that never runs is
+        kept as is
+        """
+        result = []
+        for block in self.cfg.blocks:
+            if block.index not in self.in_states:
+                result += self.cfg.lines(block)
+                continue
+            self.transfer(block, dict(self.in_states[block.index]), result)
+        return result
+
+
+def propagate_constants(ir):
+    """
+    Optimized copy of ir, where everything that is constant whenever it runs is
+    computed at compile time
+    """
+    propagation = ConstantPropagation(ir)
+    propagation.analyse()
+    return propagation.rewrite()
@@ -1,28 +1,26 @@
 from dataclasses import dataclass
 from typing import Union
 import AST
+from visitor import Visitor
 
-# self.cond_label_stack = []
-# self.cond_label_idx_stack = []
 
-
-@dataclass
+@dataclass(slots=True)
 class IR_Label:
     value: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Goto:
     label: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_PrimitiveLiteral:
     reg: int
     val: any
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_BinaryOperation:
     result_reg: int
     left_reg: int
@@ -30,35 +28,35 @@ class IR_BinaryOperation:
     operator: str
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_UnaryOperation:
     result_reg: int
     operator: str
     operand_reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_PushParam:  # should it be just value rather than register?
     reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_PopParam:  # number of params to pop?
     reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_FunctionCall:
     name: str
     reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_FunctionReturn:
     reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_ReturnStmt:
     reg: int
 
@@ -71,26 +69,26 @@ class IR_PopStack:
     val: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_IfStmt:
     if_false: IR_Goto
     cond_reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_ElifStmt:
     elif_false: IR_Goto
     cond_reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Assignment:
     name: str
     val: any
 
 
 # determines start of a list or tuple
-@dataclass
+@dataclass(slots=True)
 class IR_List:
     reg: int
     operator: str  # LIST, TUPLE
@@ -98,99 +96,96 @@ class IR_List:
 
 
 # represents individual elements in a list or tuple
-@dataclass
+@dataclass(slots=True)
 class IR_List_VAL:
     reg: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_LoopStart:
     reg: str
     val: any
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_LoopStop:
     reg: str
     val: any
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_LoopStep:
     reg: str
     val: any
 
 
-@dataclass
-class IR_String:
-    reg: int
-    length: int
-
-
-@dataclass
-class IR_String_char:
+@dataclass(slots=True)
+class IR_StringConst:
     reg: int
+    # Taken from the string pool of the IRGen, so equal literals share one str
     val: str
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Parameter:
     reg: int
     length: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Parameter_VAL:
     reg: int
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Argument:
     reg: int
     function_call_reg: int
     length: int
 
 
-@dataclass
+@dataclass(slots=True)
 class IR_Argument_VAL:
     reg: int
 
-@dataclass
+@dataclass(slots=True)
 class IR_GetLength:
     result_reg: str
     pointer_reg: str
 
-@dataclass
+@dataclass(slots=True)
 class IR_LstAdd:
     obj_reg: str
     val_reg: str
     idx: Union[str, int]
 
-@dataclass
+@dataclass(slots=True)
 class IR_NonPrimitiveIndex:
     result_reg: str
     obj_reg: str
     idx_reg: str
 
-@dataclass
+@dataclass(slots=True)
 class IR_ForLoopVar:
     reg: str
 
-@dataclass
+@dataclass(slots=True)
 class IR_NonPrimitiveSlicing:
     result_reg: str
     obj_reg: str
     start_reg: Union[str,None]
     end_reg: Union[str,None]
 
-class IRGen:
+class IRGen(Visitor):
+    prefix = 'gen_'
+
     def __init__(self):
         self.IR = []
         self.register_count = 0
         self.label_count = 0
-        self.cond_label_stack = []
-        self.cond_label_idx_stack = []
+        # Every distinct string literal of the module
+        self.strings = {}
 
 
     def generate_IR(self, nodes):
@@ -199,8 +194,7 @@ class IRGen:
         return self.IR
 
     def generate(self, node):
-        method = 'gen_' + node.__class__.__name__
-        return getattr(self, method)(node)
+        return self.visit(node)
 
     def add_code(self, code):
         self.IR.append(code)
@@ -340,10 +334,7 @@ class IRGen:
     def gen_PrimitiveLiteral(self, node: AST.PrimitiveLiteral):
         prim_reg = self.inc_register()
         if node.name == "str":
-            self.add_code(IR_String(reg=prim_reg, length=len(node.value)))
-            for c in node.value:
-                string_reg = self.inc_register()
-                self.add_code(IR_String_char(reg=string_reg, val=c))
+            self.add_code(IR_StringConst(reg=prim_reg, val=self.strings.setdefault(node.value, node.value)))
         else:
             self.add_code(IR_PrimitiveLiteral(reg=prim_reg, val=node.value))
         return prim_reg
@@ -380,54 +371,45 @@ class IRGen:
         cond = self.generate(node.ifCond)
 
         fbranch_label = self.inc_label()
-        self.cond_label_stack.append(self.inc_label())  # record the
+        end_label = self.inc_label()
 
         # Skip to the false_body if the condition is not met
         self.add_code(IR_IfStmt(if_false=IR_Goto(fbranch_label), cond_reg=cond))
         for stmt in node.body.lst:
             self.generate(stmt)
         # End of true body
-        self.add_code(IR_Goto(self.cond_label_stack[-1]))
+        self.add_code(IR_Goto(end_label))
 
-        # mark false and true labels
-        # record the idx of true label for elif and else insertion
         # it is possible that false label has no content
         self.mark_label(fbranch_label)
-        self.cond_label_idx_stack.append(len(self.IR))
-        self.mark_label(self.cond_label_stack[-1])
+        self.mark_label(end_label)
+
+    def reopen_chain(self):
+        """
+        The elif and else of a chain come right after its if or previous elif,
+        so the chain's end label is the last line of the IR: take it off to put
+        the branch ahead of it, rather than splicing the branch into the IR
+        """
+        end_label = self.IR.pop()
+        assert isinstance(end_label, IR_Label), "Expect elif and else to follow an if"
+        return end_label
 
     def gen_ElifStmt(self, node: AST.ElifStmt):
-        # copy the whole IR to make sure that
-        # subsequent conditional stmts are in place
-        ir_copy = self.IR[:]
-        # reset IR
-        self.IR = []
+        end_label = self.reopen_chain()
         cond = self.generate(node.elifCond)
         fbranch_label = self.inc_label()
         self.add_code(IR_ElifStmt(elif_false=IR_Goto(fbranch_label), cond_reg=cond))
         for stmt in node.body.lst:
             self.generate(stmt)
-        self.add_code(IR_Goto(self.cond_label_stack[-1]))
+        self.add_code(IR_Goto(end_label.value))
         self.mark_label(fbranch_label)
-        len_elif = len(self.IR)
-        # insert elif IR
-        self.IR = ir_copy[:self.cond_label_idx_stack[-1]] + self.IR + ir_copy[self.cond_label_idx_stack[-1]:]
-        # update the true label index
-        self.cond_label_idx_stack[-1] += len_elif
+        self.add_code(end_label)
 
     def gen_ElseStmt(self, node: AST.ElseStmt):
-        # copy the whole IR to make sure that
-        # subsequent conditional stmts are in place
-        ir_copy = self.IR[:]
-        # reset IR
-        self.IR = []
+        end_label = self.reopen_chain()
         for stmt in node.body.lst:
             self.generate(stmt)
-        # insert else IR
-        self.IR = ir_copy[:self.cond_label_idx_stack[-1]] + self.IR + ir_copy[self.cond_label_idx_stack[-1]:]
-        # pop cond_label and cond_label_idx
-        self.cond_label_idx_stack.pop(-1)
-        self.cond_label_stack.pop(-1)
+        self.add_code(end_label)
 
     def gen_LstAppend(self, node: AST.LstAppend):
         obj_reg = self.generate(node.obj)
@@ -1,4 +1,5 @@
 import argparse
+import sys
 from ply import lex
 
 reserved = {
@@ -52,6 +53,45 @@ tokens = [
     'DOT'
 ] + list(reserved.values())
 
+class pythonLexerState():
+    """
+    Everything that changes while lexing one input. Every PLY lexer handed
+    out by pythonLexer carries its own state as lexer.state
+    """
+    def __init__(self):
+        # number of leading tabs of each line, keyed by line number
+        self.tab_counts = {}
+        # lexLineNo[0] is the current line number
+        # lexLineNo[1] is the line number after counting newline
+        self.lexLineNo = [1,1]
+
+    def getTabCount(self, lineNo):
+        return self.tab_counts.get(lineNo, 0)
+
+
+class indentTracker():
+    """
+    Turns the tab count of each statement into INDENT/DEDENT events,
+    the same way Python's tokenizer does with its indentation stack
+    """
+    def __init__(self):
+        self.levels = [0]
+
+    def track(self, tabCount):
+        if tabCount > self.levels[-1]:
+            self.levels.append(tabCount)
+            return ['INDENT']
+        events = []
+        while tabCount < self.levels[-1]:
+            self.levels.pop()
+            events.append('DEDENT')
+        if tabCount != self.levels[-1]:
+            # Dedent to a depth that was never opened, e.g. from 2 tabs to 1 after an indent from 0 to 2
+            self.levels.append(tabCount)
+            events.append('INDENT')
+        return events
+
+
 class pythonLexer():
     t_PLUS = r'\+'
     t_MINUS = r'-'
@@ -76,12 +116,6 @@ class pythonLexer():
     t_ignore = ' '
     literals = "!@-`~\\|/{}?'\""
 
-    #keeps track number of tabs for each line number
-    tab_list = []
-    # lexLineNo[0] is the current line number
-    # lexLineNo[1] is the line number after counting newline
-    lexLineNo = [1,1]
-
     def t_BOOL(self,t):
         r'(True)|(False)'
         if t.value == 'True':
@@ -127,17 +161,20 @@ class pythonLexer():
     def t_ID(self,t):
         r'[a-zA-Z_][a-zA-Z_0-9]*'
         t.type = reserved.get(t.value, 'ID')  # Check for reserved words
+        # Every use of a name shares one string
+        t.value = sys.intern(t.value)
         return t
 
     def t_NEWLINE(self,t):
         r'\n+'
         t.lexer.lineno += len(t.value)
-        self.lexLineNo[1] = t.lexer.lineno
+        t.lexer.state.lexLineNo[1] = t.lexer.lineno
         return t
 
     def t_TAB(self, t):
         r'\t+'
-        self.tab_list.append([t.lexer.lineno, len(t.value)])
+        # only the first run of tabs on a line is its indentation
+        t.lexer.state.tab_counts.setdefault(t.lexer.lineno, len(t.value))
 
     def t_FUNCTIONANNOTATION(self, t):
         r'(-\>)'
@@ -148,24 +185,26 @@ class pythonLexer():
         print("Illegal character '%s'" % t.value[0])
         t.lexer.skip(1)
 
-    def getTabCount(self, lineNo):
-        for i in self.tab_list:
-            if i[0] == lineNo:
-                return i[1]
-        return 0
-
-    def clearTabCount(self):
-        self.tab_list.clear()
-
     def build(self, **kwargs):
         self.tokens = tokens
         self.lexer = lex.lex(module=self, **kwargs)
+        self.lexer.state = pythonLexerState()
+
+    def new_lexer(self):
+        """
+        A PLY lexer with fresh state that shares the compiled rules of this one
+        """
+        lexer = self.lexer.clone()
+        lexer.lineno = 1
+        lexer.state = pythonLexerState()
+        return lexer
 
     def test(self, data):
-        self.lexer.input(data)
+        lexer = self.new_lexer()
+        lexer.input(data)
         result = []
         while True:
-            tok = self.lexer.token()
+            tok = lexer.token()
             if not tok:
                 break
             result.append(tok)
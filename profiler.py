@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass, asdict
+
+
+@dataclass
+class StageProfile:
+    name: str
+    # seconds since the profiler's origin
+    start: float
+    wall: float = 0.0
+    cpu: float = 0.0
+    # bytes allocated at the peak of the stage, above what was allocated when it started
+    peak_memory: int = None
+    counts: dict = field(default_factory=dict)
+
+
+class Profiler:
+    """
+    Collects wall time, CPU time, peak memory and counts of each compiler stage.
+
+    Pass one to compiler() or front_end() and read profiler.stages afterwards,
+    or export them with write_json() / write_chrome_trace(). Peak memory comes
+    from tracemalloc and is only recorded with memory=True, since tracing
+    slows every allocation down.
+    """
+    def __init__(self, memory=False, origin=None):
+        self.memory = memory
+        self.stages = []
+        # stage start times are relative to this perf_counter() value
+        self.origin = time.perf_counter() if origin is None else origin
+        self.current = None
+
+    @contextmanager
+    def stage(self, name):
+        profile = StageProfile(name=name, start=time.perf_counter() - self.origin)
+        self.stages.append(profile)
+        outer, self.current = self.current, profile
+        started_tracing = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield profile
+        finally:
+            profile.wall = time.perf_counter() - wall
+            profile.cpu = time.process_time() - cpu
+            if self.memory:
+                profile.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            self.current = outer
+
+    def count(self, name, value):
+        """
+        Record a count, like the number of AST nodes, on the current stage
+        """
+        if self.current is not None:
+            self.current.counts[name] = value
+
+    @property
+    def timings(self):
+        return {profile.name: profile.wall for profile in self.stages}
+
+    def to_json(self):
+        return [asdict(profile) for profile in self.stages]
+
+    def write_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_json(), f, indent=2)
+            f.write('\n')
+
+    def to_chrome_trace(self, pid=None, tid=0):
+        """
+        The stages as complete events of the Chrome trace event format, for chrome://tracing or Perfetto
+        """
+        pid = os.getpid() if pid is None else pid
+        return [{
+            'name': profile.name,
+            'ph': 'X',
+            'ts': profile.start * 1e6,
+            'dur': profile.wall * 1e6,
+            'pid': pid,
+            'tid': tid,
+            'args': {'cpu': profile.cpu, 'peak_memory': profile.peak_memory, **profile.counts},
+        } for profile in self.stages]
+
+    def write_chrome_trace(self, filename):
+        write_chrome_trace(filename, self.to_chrome_trace())
+
+    def report(self):
+        lines = [f"{'stage':<12}{'wall ms':>10}{'cpu ms':>10}{'peak KiB':>10}  counts"]
+        for profile in self.stages:
+            peak = f"{profile.peak_memory / 1024:>10.1f}" if profile.peak_memory is not None else f"{'-':>10}"
+            counts = ' '.join(f'{name}={value}' for name, value in profile.counts.items())
+            lines.append(f"{profile.name:<12}{profile.wall * 1000:>10.2f}{profile.cpu * 1000:>10.2f}{peak}  {counts}")
+        return '\n'.join(lines)
+
+
+def write_chrome_trace(filename, events):
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        f.write('\n')
+
+
+@contextmanager
+def stage(profiler, name):
+    """
+    profiler.stage(name), or nothing when profiler is None
+    """
+    if profiler is None:
+        yield None
+    else:
+        with profiler.stage(name) as profile:
+            yield profile
+
+
+def count_nodes(node):
+    """
+    Number of dataclass nodes in an AST, C AST or list of them
+    """
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+        elif is_dataclass(node):
+            count += 1
+            stack.extend(getattr(node, f.name) for f in fields(node))
+    return count
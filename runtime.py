@@ -0,0 +1,55 @@
+import hashlib
+import os
+import re
+import subprocess
+import uuid
+
+RUNTIME_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_SOURCES = ['starter.h', 'starter.c']
+RUNTIME_BUILD_DIR = os.path.join(RUNTIME_DIR, '__pycache__')
+# Objects of every version of the runtime, but not the temporary files of builds in progress
+RUNTIME_OBJECT = re.compile(r'starter-[0-9a-f]{16}\.o')
+
+
+def runtime_hash():
+    """
+    Hash of the C runtime sources
+    """
+    h = hashlib.sha256()
+    for name in RUNTIME_SOURCES:
+        with open(os.path.join(RUNTIME_DIR, name), 'rb') as f:
+            h.update(name.encode() + b'\0' + f.read() + b'\0')
+    return h.hexdigest()
+
+
+def runtime_object(build_dir=None):
+    """
+    Path to starter.c compiled to an object file. It is built once per version
+    of the runtime sources and reused by every program linked against it
+    """
+    build_dir = build_dir or RUNTIME_BUILD_DIR
+    path = os.path.join(build_dir, f'starter-{runtime_hash()[:16]}.o')
+    if os.path.exists(path):
+        return path
+    os.makedirs(build_dir, exist_ok=True)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp.o'
+    proc = subprocess.run(['gcc', '-c', os.path.join(RUNTIME_DIR, 'starter.c'), '-o', tmp_path], stderr=subprocess.PIPE, universal_newlines=True)
+    assert proc.returncode == 0, f"gcc return code was {proc.returncode} building the runtime\n{proc.stderr}"
+    # Atomic, so concurrent builds never link against a half written object
+    os.replace(tmp_path, path)
+    remove_stale_objects(build_dir, path)
+    return path
+
+
+def remove_stale_objects(build_dir, current):
+    """
+    Delete the objects built from earlier versions of the runtime sources
+    """
+    for name in os.listdir(build_dir):
+        path = os.path.join(build_dir, name)
+        if RUNTIME_OBJECT.fullmatch(name) and path != current:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # removed by a concurrent build
+                pass
@@ -1,241 +1,474 @@
-#include <stdio.h>
-#include <stdlib.h>
-#include <stdarg.h>
-#include <stdbool.h>
-#include <string.h>
-
-#define NONE_LITERAL 42
-#define MAX_ALLOCATED_OBJ_COUNT 256
-#define MAX_STR_LEN 99999
-
-typedef double float_t;
-typedef long long int_t;
-typedef char *str_t;
-typedef int bool_t;
-typedef int none_t;
-typedef struct list list_t;
-typedef union data data_t;
-
-struct list
+#include "starter.h"
+#include <ctype.h>
+#include <unistd.h>
+
+arena_chunk_t *arena_head = NULL;
+// The last chunk region_end released, kept to serve the next region without a malloc
+arena_chunk_t *arena_spare = NULL;
+
+static size_t arena_align(size_t size)
 {
-  data_t *data;
-  int_t length;
-  int_t uninitialized_length;
-};
+  return (size + sizeof(max_align_t) - 1) & ~(sizeof(max_align_t) - 1);
+}
+
+static void arena_new_chunk(size_t size)
+{
+  size_t chunk_size = arena_head == NULL ? ARENA_CHUNK_SIZE : arena_head->size * 2;
+  if (chunk_size > ARENA_MAX_CHUNK_SIZE)
+    chunk_size = ARENA_MAX_CHUNK_SIZE;
+  if (chunk_size < size)
+    chunk_size = size;
+  arena_chunk_t *chunk;
+  if (arena_spare != NULL && arena_spare->size >= size)
+  {
+    chunk = arena_spare;
+    arena_spare = NULL;
+  }
+  else
+  {
+    chunk = malloc(sizeof(arena_chunk_t) + chunk_size);
+    if (chunk == NULL)
+    {
+      printf("Out of memory\n");
+      exit(1);
+    }
+    chunk->size = chunk_size;
+  }
+  chunk->used = 0;
+  chunk->prev = arena_head;
+  arena_head = chunk;
+}
 
-union data
+void *arena_alloc(size_t size)
 {
-  int_t int_v;
-  float_t float_v;
-  str_t str_v;
-  bool_t bool_v;
-  none_t none_v;
-  list_t list_v;
-};
+  size = arena_align(size);
+  if (arena_head == NULL || arena_head->size - arena_head->used < size)
+    arena_new_chunk(size);
+  void *ptr = (char *)arena_head->data + arena_head->used;
+  arena_head->used += size;
+  return ptr;
+}
 
-str_t *allocated_str[MAX_ALLOCATED_OBJ_COUNT];
-int allocated_str_count = 0;
+// Grows the most recent allocation in place when there is room after it,
+// anything else is copied to a new allocation
+void *arena_realloc(void *ptr, size_t old_size, size_t new_size)
+{
+  if (ptr != NULL && arena_head != NULL)
+  {
+    char *end = (char *)arena_head->data + arena_head->used;
+    size_t old_aligned = arena_align(old_size);
+    if ((char *)ptr + old_aligned == end && arena_head->size - arena_head->used + old_aligned >= arena_align(new_size))
+    {
+      arena_head->used += arena_align(new_size) - old_aligned;
+      return ptr;
+    }
+  }
+  void *new_ptr = arena_alloc(new_size);
+  if (ptr != NULL)
+    memcpy(new_ptr, ptr, old_size < new_size ? old_size : new_size);
+  return new_ptr;
+}
 
-list_t *allocated_list[MAX_ALLOCATED_OBJ_COUNT];
-int allocated_list_count = 0;
+region_t region_begin()
+{
+  return (region_t){.chunk = arena_head, .used = arena_head == NULL ? 0 : arena_head->used};
+}
 
-str_t allocate_str(int length)
+void region_end(region_t region)
 {
-  if (allocated_str_count == MAX_ALLOCATED_OBJ_COUNT)
+  while (arena_head != region.chunk)
   {
-    printf("Out of memory for string\n");
-    exit(1);
+    arena_chunk_t *chunk = arena_head;
+    arena_head = chunk->prev;
+    if (arena_spare == NULL || arena_spare->size < chunk->size)
+    {
+      free(arena_spare);
+      arena_spare = chunk;
+    }
+    else
+    {
+      free(chunk);
+    }
   }
-  str_t str = (str_t)malloc(length);
-  allocated_str[allocated_str_count] = &str;
-  allocated_str_count++;
+  if (arena_head != NULL)
+    arena_head->used = region.used;
+}
+
+void arena_free()
+{
+  region_end((region_t){.chunk = NULL, .used = 0});
+  free(arena_spare);
+  arena_spare = NULL;
+}
+
+str_t allocate_str(int_t capacity)
+{
+  str_t str = {.length = 0, .capacity = capacity, .data = arena_alloc(capacity + 1)};
+  str.data[0] = '\0';
   return str;
 }
 
 str_t str_init(char *str)
 {
   int_t len = strlen(str);
-  str_t new_str = allocate_str(len + 1);
-  strcpy(new_str, str);
+  str_t new_str = allocate_str(len);
+  memcpy(new_str.data, str, len + 1);
+  new_str.length = len;
   return new_str;
 }
 
 str_t str_concat(str_t str1, str_t str2)
 {
-  int_t len1 = strlen(str1);
-  int_t len2 = strlen(str2);
-  str_t new_str = allocate_str(len1 + len2 + 1);
-  strcpy(new_str, str1);
-  strcpy(new_str + len1, str2);
+  str_t new_str = allocate_str(str1.length + str2.length);
+  memcpy(new_str.data, str1.data, str1.length);
+  memcpy(new_str.data + str1.length, str2.data, str2.length);
+  new_str.length = str1.length + str2.length;
+  new_str.data[new_str.length] = '\0';
   return new_str;
 }
 
-void str_clean_up()
+// str = str + other, writing into the spare capacity of str when it has enough.
+// Only valid when no other variable shares the buffer of str
+void str_append(str_t *str, str_t other)
 {
-  for (int i = 0; i < allocated_str_count; i++)
+  int_t length = str->length + other.length;
+  if (length > str->capacity)
   {
-    free(allocated_str[i]);
+    int_t capacity = str->capacity * 2;
+    if (capacity < length)
+      capacity = length;
+    if (capacity < 16)
+      capacity = 16;
+    if (str->capacity == 0)
+    {
+      // Not allocated by the runtime, so the buffer is copied rather than grown
+      char *data = arena_alloc(capacity + 1);
+      memcpy(data, str->data, str->length);
+      str->data = data;
+    }
+    else
+      str->data = arena_realloc(str->data, str->capacity + 1, capacity + 1);
+    str->capacity = capacity;
   }
+  // other may be str itself, whose characters are still in place either way
+  memcpy(str->data + str->length, other.data, other.length);
+  str->length = length;
+  str->data[length] = '\0';
 }
 
-list_t *list_init(int_t length)
+bool_t str_eq(str_t str1, str_t str2)
 {
-  list_t *list = malloc(sizeof(data_t));
-  list->data = malloc(length * sizeof(void *));
-  if (allocated_list_count == MAX_ALLOCATED_OBJ_COUNT)
+  return str1.length == str2.length && memcmp(str1.data, str2.data, str1.length) == 0;
+}
+
+// Number of iterations of for (i = start; i < stop; i += step)
+int_t range_length(int_t start, int_t stop, int_t step)
+{
+  if (step <= 0 || start >= stop)
+    return 0;
+  return (stop - start + step - 1) / step;
+}
+
+// The checks every list function shares, kept out of LIST_DEFINE so each
+// instantiation only carries its element-specific code
+void list_check_initialized(int_t length, int_t uninitialized_length)
+{
+  if (uninitialized_length != 0)
   {
-    printf("Out of memory for list\n");
+    printf("RUNTIME ERROR: List initialization is not complete. Length is %lld, uninitialized length is %lld\n", length, uninitialized_length);
     exit(1);
   }
-  allocated_list[allocated_list_count] = list;
-  allocated_list_count++;
-  list->length = length;
-  list->uninitialized_length = length;
-  return list;
 }
 
-void list_init_add_internal(list_t *list, data_t value)
+void list_check_slice(int_t length, int_t start, int_t end)
 {
-  if (list->uninitialized_length == 0)
+  if (start < 0 || start > length)
   {
-    printf("RUNTIME ERROR: Trying to add more initial elements to full list. Length is %lld\n", list->length);
+    printf("RUNTIME ERROR: Start index out of bounds. Trying to access %lld, length is %lld\n", start, length);
+    exit(1);
+  }
+  if (end < 0 || end > length)
+  {
+    printf("RUNTIME ERROR: End index out of bounds. Trying to access %lld, length is %lld\n", end, length);
+    exit(1);
+  }
+  if (start > end)
+  {
+    printf("RUNTIME ERROR: Start index is greater than end index. start=%lld, end=%lld\n", start, end);
     exit(1);
   }
-  data_t *addr = list->data + list->length - list->uninitialized_length;
-  *addr = value;
-  list->uninitialized_length--;
 }
 
-void list_add_internal(list_t *list, data_t value)
+#define LIST_DEFINE(T)                                                                                                   \
+  T##_list_t *T##_list_init(int_t length)                                                                                \
+  {                                                                                                                      \
+    T##_list_t *list = arena_alloc(sizeof(T##_list_t));                                                                  \
+    list->data = arena_alloc(length * sizeof(T##_t));                                                                    \
+    list->length = length;                                                                                               \
+    list->uninitialized_length = length;                                                                                 \
+    list->capacity = length;                                                                                             \
+    return list;                                                                                                         \
+  }                                                                                                                      \
+                                                                                                                         \
+  void T##_list_init_add(T##_list_t *list, T##_t value)                                                                  \
+  {                                                                                                                      \
+    if (list->uninitialized_length == 0)                                                                                 \
+    {                                                                                                                    \
+      printf("RUNTIME ERROR: Trying to add more initial elements to full list. Length is %lld\n", list->length);        \
+      exit(1);                                                                                                           \
+    }                                                                                                                    \
+    list->data[list->length - list->uninitialized_length] = value;                                                       \
+    list->uninitialized_length--;                                                                                        \
+  }                                                                                                                      \
+                                                                                                                         \
+  /* Make room for at least `additional` more elements without reallocating */                                           \
+  void T##_list_reserve(T##_list_t *list, int_t additional)                                                              \
+  {                                                                                                                      \
+    if (additional <= 0 || list->length + additional <= list->capacity)                                                  \
+      return;                                                                                                            \
+    int_t capacity = list->length + additional;                                                                          \
+    if (list->capacity == 0)                                                                                             \
+    {                                                                                                                    \
+      /* A slice, or an empty list. The elements are copied to a buffer of its own, */                                   \
+      /* so appending never writes to the list the slice was taken from */                                               \
+      T##_t *data = arena_alloc(capacity * sizeof(T##_t));                                                               \
+      memcpy(data, list->data, list->length * sizeof(T##_t));                                                            \
+      list->data = data;                                                                                                 \
+    }                                                                                                                    \
+    else                                                                                                                 \
+      list->data = arena_realloc(list->data, list->capacity * sizeof(T##_t), capacity * sizeof(T##_t));                  \
+    list->capacity = capacity;                                                                                           \
+  }                                                                                                                      \
+                                                                                                                         \
+  void T##_list_add(T##_list_t *list, T##_t value)                                                                       \
+  {                                                                                                                      \
+    list_check_initialized(list->length, list->uninitialized_length);                                                    \
+    if (list->length >= list->capacity)                                                                                  \
+      T##_list_reserve(list, list->length < 4 ? 4 : list->length);                                                       \
+    list->data[list->length] = value;                                                                                    \
+    list->length++;                                                                                                      \
+  }                                                                                                                      \
+                                                                                                                         \
+  T##_t T##_list_get(T##_list_t *list, int_t index)                                                                      \
+  {                                                                                                                      \
+    list_check_initialized(list->length, list->uninitialized_length);                                                    \
+    if (index >= list->length)                                                                                           \
+    {                                                                                                                    \
+      printf("RUNTIME ERROR: Index out of bounds. Trying to access %lld, length is %lld\n", index, list->length);        \
+      exit(1);                                                                                                           \
+    }                                                                                                                    \
+    return list->data[index];                                                                                            \
+  }                                                                                                                      \
+                                                                                                                         \
+  /* list[start:end] as a view of the elements of list rather than a copy of them */                                     \
+  T##_list_t *T##_list_slice(T##_list_t *list, int_t start, int_t end)                                                   \
+  {                                                                                                                      \
+    list_check_initialized(list->length, list->uninitialized_length);                                                    \
+    list_check_slice(list->length, start, end);                                                                          \
+    T##_list_t *view = arena_alloc(sizeof(T##_list_t));                                                                  \
+    view->data = list->data + start;                                                                                     \
+    view->length = end - start;                                                                                          \
+    view->uninitialized_length = 0;                                                                                      \
+    /* Views have no capacity of their own, so the first append copies the elements */                                   \
+    view->capacity = 0;                                                                                                  \
+    return view;                                                                                                         \
+  }
+
+LIST_DEFINE(int)
+LIST_DEFINE(float)
+LIST_DEFINE(bool)
+LIST_DEFINE(str)
+LIST_DEFINE(none)
+
+// stdin is read in blocks into input_buffer, and parsed from there by hand
+// rather than with scanf. input_position is the next character to parse
+static char input_buffer[INPUT_BUFFER_SIZE];
+static int_t input_position = 0;
+static int_t input_end = 0;
+// Whether stdin is a terminal, or -1 until it is first checked. Prompts are
+// only printed, and output only flushed before reading, for a terminal
+static int input_interactive = -1;
+
+// The next character of stdin without consuming it, or EOF
+static int input_peek()
 {
-  if (list->uninitialized_length != 0)
+  if (input_position == input_end)
   {
-    printf("RUNTIME ERROR: List initialization is not complete. Length is %lld, uninitialized length is %lld\n", list->length, list->uninitialized_length);
-    exit(1);
+    ssize_t count = read(STDIN_FILENO, input_buffer, INPUT_BUFFER_SIZE);
+    if (count <= 0)
+      return EOF;
+    input_position = 0;
+    input_end = count;
   }
-
-  list->length++;
-  list->data = realloc(list->data, list->length * sizeof(data_t));
-  data_t *addr = list->data + list->length - 1;
-  *addr = value;
+  return (unsigned char)input_buffer[input_position];
 }
 
-void list_free(list_t *list)
+static void input_skip_space()
 {
-  if (list == NULL)
-    return;
-  free(list->data);
-  free(list);
+  int c;
+  while ((c = input_peek()) != EOF && isspace(c))
+    input_position++;
 }
 
-void list_clean_up()
+static bool input_read_digits(unsigned long long *magnitude)
 {
-  for (int i = 0; i < allocated_list_count; i++)
+  int c = input_peek();
+  if (!isdigit(c))
+    return false;
+  for (*magnitude = 0; isdigit(c); c = input_peek())
   {
-    list_free(allocated_list[i]);
+    *magnitude = *magnitude * 10 + (c - '0');
+    input_position++;
   }
+  return true;
 }
 
-data_t list_get_internal(list_t *list, int_t index)
+// An optional sign followed by digits, after any whitespace
+static bool input_read_int(int_t *value)
 {
-  if (list->uninitialized_length != 0)
-  {
-    printf("RUNTIME ERROR: List initialization is not complete. Length is %lld, uninitialized length is %lld\n", list->length, list->uninitialized_length);
-    exit(1);
-  }
-  if (index >= list->length)
-  {
-    printf("RUNTIME ERROR: Index out of bounds. Trying to access %lld, length is %lld\n", index, list->length);
-    exit(1);
-  }
-  return list->data[index];
+  input_skip_space();
+  bool negative = input_peek() == '-';
+  if (negative || input_peek() == '+')
+    input_position++;
+  unsigned long long magnitude;
+  if (!input_read_digits(&magnitude))
+    return false;
+  *value = negative ? -magnitude : magnitude;
+  return true;
 }
 
-list_t *list_slice(list_t *list, int_t start, int_t end)
+// Moves the next character to number if it is one of chars
+static bool input_take(char *number, int *length, const char *chars)
 {
-  if (list->uninitialized_length != 0)
-  {
-    printf("RUNTIME ERROR: List initialization is not complete. Length is %lld, uninitialized length is %lld\n", list->length, list->uninitialized_length);
-    exit(1);
-  }
-  if (start < 0 || start >= list->length)
-  {
-    printf("RUNTIME ERROR: Start index out of bounds. Trying to access %lld, length is %lld\n", start, list->length);
-    exit(1);
-  }
-  if (end < 0 || end >= list->length)
-  {
-    printf("RUNTIME ERROR: End index out of bounds. Trying to access %lld, length is %lld\n", end, list->length);
-    exit(1);
-  }
-  if (start > end)
+  int c = input_peek();
+  if (c == EOF || c == '\0' || !strchr(chars, c) || *length == INPUT_NUMBER_LENGTH)
+    return false;
+  number[(*length)++] = c;
+  input_position++;
+  return true;
+}
+
+static int input_take_digits(char *number, int *length)
+{
+  int start = *length;
+  while (input_take(number, length, "0123456789"))
+    continue;
+  return *length - start;
+}
+
+// A decimal number with an optional fraction and exponent, after any whitespace.
+// The characters are checked here, and strtod rounds them to the nearest float
+static bool input_read_float(float_t *value)
+{
+  char number[INPUT_NUMBER_LENGTH + 1];
+  int length = 0;
+  input_skip_space();
+  input_take(number, &length, "+-");
+  int digits = input_take_digits(number, &length);
+  if (input_take(number, &length, "."))
+    digits += input_take_digits(number, &length);
+  if (digits == 0)
+    return false;
+  if (input_take(number, &length, "eE"))
   {
-    printf("RUNTIME ERROR: Start index is greater than end index. start=%lld, end=%lld\n", start, end);
-    exit(1);
+    input_take(number, &length, "+-");
+    input_take_digits(number, &length);
   }
-  list_t *new_list = list_init(end - start + 1);
-  for (int_t i = start; i <= end; i++)
+  number[length] = '\0';
+  *value = strtod(number, NULL);
+  return true;
+}
+
+// The characters up to the next whitespace, after any whitespace
+static bool input_read_str(str_t *value)
+{
+  input_skip_space();
+  int c = input_peek();
+  if (c == EOF)
+    return false;
+  str_t str = allocate_str(16);
+  for (; c != EOF && !isspace(c); c = input_peek())
   {
-    list_init_add_internal(new_list, list->data[i]);
+    if (str.length == str.capacity)
+    {
+      str.data = arena_realloc(str.data, str.capacity + 1, str.capacity * 2 + 1);
+      str.capacity *= 2;
+    }
+    str.data[str.length++] = c;
+    input_position++;
   }
-  return new_list;
+  str.data[str.length] = '\0';
+  *value = str;
+  return true;
+}
+
+static void input_prompt(str_t prompt, const char *expecting)
+{
+  if (input_interactive == -1)
+    input_interactive = isatty(STDIN_FILENO);
+  if (!input_interactive)
+    return;
+  fwrite(prompt.data, 1, prompt.length, stdout);
+  printf(" (expecting %s): ", expecting);
+  fflush(stdout);
 }
 
 void input_helper_invalid_input()
 {
   int c;
-  while ((c = getchar()) != EOF && c != '\n')
-    continue;
+  while ((c = input_peek()) != EOF && c != '\n')
+    input_position++;
   if (c == EOF)
   {
     printf("RUNTIME ERROR: Reaching unexpected EOF.\n");
     exit(1);
   }
+  input_position++;
   printf("Invalid input. Please try again.\n");
 }
 
-data_t input_internal(char *prompt, char type)
+data_t input_internal(str_t prompt, char type)
 {
   data_t value;
 start:
-  printf("%s", prompt);
   switch (type)
   {
-  // https://stackoverflow.com/questions/40551037/scanf-not-working-on-invalid-input
   case 'i':
-    printf(" (expecting int): ");
-    if (scanf("%lld", &value.int_v) != 1)
+    input_prompt(prompt, "int");
+    if (!input_read_int(&value.int_v))
     {
       input_helper_invalid_input();
       goto start;
     }
     break;
   case 'f':
-    printf(" (expecting float): ");
-    if (scanf("%lf", &value.float_v) != 1)
+    input_prompt(prompt, "float");
+    if (!input_read_float(&value.float_v))
     {
       input_helper_invalid_input();
       goto start;
     }
     break;
   case 's':
-    printf(" (expecting string): ");
-    char str_tmp[MAX_STR_LEN];
-    if (scanf("%s", str_tmp) != 1)
+    input_prompt(prompt, "string");
+    if (!input_read_str(&value.str_v))
     {
       input_helper_invalid_input();
       goto start;
     }
-    value.str_v = str_init(str_tmp);
     break;
   case 'b':
-    printf(" (expecting bool): ");
-    if (scanf("%d", &value.bool_v) != 1)
+  {
+    input_prompt(prompt, "bool");
+    int_t bool_value;
+    if (!input_read_int(&bool_value))
     {
       input_helper_invalid_input();
       goto start;
     }
+    value.bool_v = bool_value;
     break;
+  }
   default:
     printf("RUNTIME ERROR: Unknown type %c\n", type);
     exit(1);
@@ -244,65 +477,51 @@ start:
   return value;
 }
 
-int print_internal(int items_count, ...)
-{
-  va_list valist;
-  va_start(valist, items_count);
-
-  for (int i = 0; i < items_count; i++)
-  {
-    char type = va_arg(valist, /* str_t */ int);
-    switch (type)
-    {
-    case 'i':
-      printf("%lld", va_arg(valist, int_t));
-      break;
-    case 'f':
-      printf("%lf", va_arg(valist, float_t));
-      break;
-    case 'c':
-      printf("%c", va_arg(valist, /* str_t */ int));
-      break;
-    case 'b':
-      printf("%s", va_arg(valist, bool_t) ? "true" : "false");
-      break;
-    case 's':
-      printf("%s", va_arg(valist, char *));
-      break;
-    default:
-      printf("RUNTIME ERROR: Unknown type: %c\n", type);
-      exit(1);
-    }
-    printf(" ");
+// n values, read as if by n calls to input_int / input_float
+#define INPUT_VALUES_DEFINE(T, NAME)                                                           \
+  T##_list_t *NAME(int_t n)                                                                    \
+  {                                                                                            \
+    T##_list_t *list = T##_list_init(0);                                                       \
+    T##_list_reserve(list, n);                                                                 \
+    for (int_t i = 0; i < n; i++)                                                              \
+      list->data[list->length++] = input_internal(str_literal("Enter a number"), #T[0]).T##_v; \
+    return list;                                                                               \
   }
-  printf("\n");
-  va_end(valist);
-  return 0;
-}
-
-#define list_get(vname, list, index) \
-  list_get_internal(list, index).vname
 
-#define list_init_add(vname, list, value) \
-  list_init_add_internal(list, (data_t){.vname = value})
-
-#define list_add(vname, list, value) \
-  list_add_internal(list, (data_t){.vname = value})
-
-#define input(vname, prompt) \
-  input_internal(prompt, #vname[0]).vname
-
-#define input_int() input(int_v, "Enter a number")
-#define input_float() input(float_v, "Enter a number")
-#define input_bool() input(int_v, "Enter 0 or 1")
-#define input_str() input(str_v, "Enter a string")
+// Every value up to the end of the line, starting from the first character
+// that is not whitespace. The whole line is read again after invalid input
+#define INPUT_LIST_DEFINE(T)                                                                   \
+  T##_list_t *input_list_##T()                                                                 \
+  {                                                                                            \
+    T##_list_t *list = T##_list_init(0);                                                       \
+    T##_t value;                                                                               \
+  start:                                                                                       \
+    input_prompt(str_literal("Enter numbers on one line"), #T);                                \
+    list->length = 0;                                                                          \
+    input_skip_space();                                                                        \
+    do                                                                                         \
+    {                                                                                          \
+      if (!input_read_##T(&value))                                                             \
+      {                                                                                        \
+        input_helper_invalid_input();                                                          \
+        goto start;                                                                            \
+      }                                                                                        \
+      T##_list_add(list, value);                                                               \
+      while (input_peek() == ' ' || input_peek() == '\t' || input_peek() == '\r')              \
+        input_position++;                                                                      \
+    } while (input_peek() != '\n' && input_peek() != EOF);                                     \
+    return list;                                                                               \
+  }
 
-#define input_int_s(X) input(int_v, X)
-#define input_float_s(X) input(float_v, X)
-#define input_bool_s(X) input(int_v, X)
-#define input_str_s(X) input(str_v, X)
+INPUT_VALUES_DEFINE(int, input_ints)
+INPUT_VALUES_DEFINE(float, input_floats)
+INPUT_LIST_DEFINE(int)
+INPUT_LIST_DEFINE(float)
 
-#define print_int(X) print_internal(1, 'i', X)
-#define print_float(X) print_internal(1, 'f', X)
-#define print_bool(X) print_internal(1, 'b', X)
-#define print_str(X) print_internal(1, 's', X)
+// Make stdout fully buffered with a large buffer, even on a terminal. The buffer
+// is flushed when it fills up, before reading input and when the program exits,
+// including on a runtime error since those are printed to stdout as well
+void output_init()
+{
+  setvbuf(stdout, NULL, _IOFBF, OUTPUT_BUFFER_SIZE);
+}
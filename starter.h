@@ -0,0 +1,194 @@
+#ifndef STARTER_H
+#define STARTER_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <string.h>
+#include <stddef.h>
+
+#define NONE_LITERAL 42
+// Size of the first arena chunk, later chunks double up to ARENA_MAX_CHUNK_SIZE
+#define ARENA_CHUNK_SIZE (64 * 1024)
+#define ARENA_MAX_CHUNK_SIZE (16 * 1024 * 1024)
+// Size of stdout's buffer, see output_init
+#define OUTPUT_BUFFER_SIZE (1024 * 1024)
+// Size of the blocks stdin is read in, and the longest float that can be read
+#define INPUT_BUFFER_SIZE (64 * 1024)
+#define INPUT_NUMBER_LENGTH 63
+
+typedef double float_t;
+typedef long long int_t;
+typedef struct str str_t;
+typedef int bool_t;
+typedef int none_t;
+typedef union data data_t;
+typedef struct arena_chunk arena_chunk_t;
+typedef struct region region_t;
+
+// A string carries its length, so concatenation never scans for the end.
+// data always has room for capacity characters and a terminating NUL.
+// String literals have a capacity of 0 since they cannot be written to
+struct str
+{
+  int_t length;
+  int_t capacity;
+  char *data;
+};
+
+union data
+{
+  int_t int_v;
+  float_t float_v;
+  str_t str_v;
+  bool_t bool_v;
+  none_t none_v;
+};
+
+// Every string and list lives in one arena, a stack of chunks that is
+// bump allocated and freed all at once by arena_free at exit
+struct arena_chunk
+{
+  arena_chunk_t *prev;
+  size_t size;
+  size_t used;
+  max_align_t data[];
+};
+
+// A point in the arena to roll back to. Everything allocated after
+// region_begin is freed by region_end
+struct region
+{
+  arena_chunk_t *chunk;
+  size_t used;
+};
+
+void *arena_alloc(size_t size);
+void *arena_realloc(void *ptr, size_t old_size, size_t new_size);
+region_t region_begin();
+void region_end(region_t region);
+void arena_free();
+
+str_t allocate_str(int_t capacity);
+str_t str_init(char *str);
+str_t str_concat(str_t str1, str_t str2);
+void str_append(str_t *str, str_t other);
+bool_t str_eq(str_t str1, str_t str2);
+
+// Lists are specialized by element type, so a [int] keeps its elements in a
+// packed int_t array. LIST_DECLARE(T) declares T##_list_t, the list of T##_t,
+// and its functions, which LIST_DEFINE(T) in starter.c defines.
+//
+// A list owns data when capacity is above 0. A slice is a view with a
+// capacity of 0 whose data points into the list it was taken from, and a
+// list is never written to below its length, so the two can share elements
+#define LIST_DECLARE(T)                                                    \
+  typedef struct T##_list T##_list_t;                                      \
+  struct T##_list                                                          \
+  {                                                                        \
+    T##_t *data;                                                           \
+    int_t length;                                                          \
+    int_t uninitialized_length;                                            \
+    int_t capacity;                                                        \
+  };                                                                       \
+  T##_list_t *T##_list_init(int_t length);                                 \
+  void T##_list_init_add(T##_list_t *list, T##_t value);                   \
+  void T##_list_add(T##_list_t *list, T##_t value);                        \
+  void T##_list_reserve(T##_list_t *list, int_t additional);               \
+  T##_t T##_list_get(T##_list_t *list, int_t index);                       \
+  T##_list_t *T##_list_slice(T##_list_t *list, int_t start, int_t end);
+
+LIST_DECLARE(int)
+LIST_DECLARE(float)
+LIST_DECLARE(bool)
+LIST_DECLARE(str)
+LIST_DECLARE(none)
+
+int_t range_length(int_t start, int_t stop, int_t step);
+void list_check_initialized(int_t length, int_t uninitialized_length);
+void list_check_slice(int_t length, int_t start, int_t end);
+
+void input_helper_invalid_input();
+data_t input_internal(str_t prompt, char type);
+int_list_t *input_ints(int_t n);
+float_list_t *input_floats(int_t n);
+int_list_t *input_list_int();
+float_list_t *input_list_float();
+void output_init();
+
+// X is a string literal or the static const char array of one
+#define str_literal(X) \
+  ((str_t){.length = sizeof(X) - 1, .capacity = 0, .data = (char *)(X)})
+
+// For indexes the compiler has proven to be in bounds of a fully initialized list
+#define list_get_unchecked(list, index) \
+  (list)->data[index]
+
+#define input(vname, prompt) \
+  input_internal(prompt, #vname[0]).vname
+
+#define input_int() input(int_v, str_literal("Enter a number"))
+#define input_float() input(float_v, str_literal("Enter a number"))
+#define input_bool() input(int_v, str_literal("Enter 0 or 1"))
+#define input_str() input(str_v, str_literal("Enter a string"))
+
+#define input_int_s(X) input(int_v, X)
+#define input_float_s(X) input(float_v, X)
+#define input_bool_s(X) input(int_v, X)
+#define input_str_s(X) input(str_v, X)
+
+// Printing writes straight into stdout's buffer without locking it or going
+// through a format string, except for floats. print(a, b) calls a function like
+// print_int_str that the compiler generates from these for the call's types
+static inline void output_char(char c)
+{
+  putchar_unlocked(c);
+}
+
+static inline void output_int(int_t value)
+{
+  char digits[20];
+  int count = 0;
+  unsigned long long magnitude = value < 0 ? -(unsigned long long)value : (unsigned long long)value;
+  if (value < 0)
+    output_char('-');
+  do
+  {
+    digits[count++] = '0' + magnitude % 10;
+    magnitude /= 10;
+  } while (magnitude != 0);
+  while (count > 0)
+    output_char(digits[--count]);
+}
+
+static inline void output_float(float_t value)
+{
+  printf("%lf", value);
+}
+
+static inline void output_bool(bool_t value)
+{
+  fputs(value ? "true" : "false", stdout);
+}
+
+static inline void output_str(str_t value)
+{
+  fwrite(value.data, 1, value.length, stdout);
+}
+
+// Every value is followed by a space, and the line by a newline
+#define PRINT_DEFINE(T)                       \
+  static inline none_t print_##T(T##_t value) \
+  {                                           \
+    output_##T(value);                        \
+    output_char(' ');                         \
+    output_char('\n');                        \
+    return NONE_LITERAL;                      \
+  }
+
+PRINT_DEFINE(int)
+PRINT_DEFINE(float)
+PRINT_DEFINE(bool)
+PRINT_DEFINE(str)
+
+#endif
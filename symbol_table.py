@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from AST import Type as A_Type
 from C_AST import Type as C_Type
 from typing import Union, List
-from AST import ParameterLst, PrimitiveType
+from AST import ParameterLst, PrimitiveType, NonPrimitiveType
 from copy import deepcopy
 import random
 
@@ -44,6 +44,17 @@ def generate_global_functions_for_typechecking():
             C_Function(hashed_name='print_' + type_name, param_types=[C_Type(type_name + '_t')], return_type=A_Type(PrimitiveType('none'))),
             Function(param_names=[], param_types=[A_Type(PrimitiveType(type_name))], return_type=A_Type(PrimitiveType('none'))),
         ])
+    # input_ints(n) reads n values, input_list_int() every value on a line
+    for type_name in ['int', 'float']:
+        list_type = A_Type(NonPrimitiveType('list', A_Type(PrimitiveType(type_name))))
+        result['input_' + type_name + 's'] = Functions([
+            C_Function(hashed_name='input_' + type_name + 's', param_types=[C_Type('int_t')], return_type=list_type),
+            Function(param_names=[], param_types=[A_Type(PrimitiveType('int'))], return_type=list_type),
+        ])
+        result['input_list_' + type_name] = Functions([
+            C_Function(hashed_name='input_list_' + type_name, param_types=[], return_type=list_type),
+            Function(param_names=[], param_types=[], return_type=list_type),
+        ])
     return result
 
 
@@ -1,6 +1,11 @@
 import pytest
 import os
-from compiler import read, compiler, execute_program
+from compiler import read, compiler, execute_program, compile_many, find_programs
+from compile_cache import CompileCache
+from profiler import Profiler
+from runtime import runtime_object
+import json
+import compiler as compiler_module
 
 test_names_compile = [f.replace('.py', '') for f in os.listdir(f'./tests/compile/') if f.endswith('.py')]
 @pytest.mark.parametrize("test_name", test_names_compile)
@@ -14,6 +19,78 @@ def test_compile(test_name):
         ir_tmp=f'{d}/{test_name}_IR.txt',
     )
 
+def test_compile_many():
+    paths = find_programs(['./tests/compile', './tests/error/02_string.py', './tests/error/03_assignment.py'])
+    results = compile_many(paths, jobs=4)
+    assert [result.input_file for result in results] == paths
+    for result in results[:-2]:
+        assert result.ok, result.error
+        assert set(result.timings) == {'read', 'parse', 'typecheck', 'ir', 'c_ast', 'c_emit', 'gcc'}
+        assert os.path.exists(result.executable)
+    assert results[-2].error.startswith('Parser Error')
+    assert results[-1].error.startswith('Type Checker Error')
+    assert 'gcc' not in results[-1].timings
+
+
+def test_compile_cache(tmp_path, monkeypatch):
+    d = './tests/compile'
+    cache = CompileCache(str(tmp_path))
+    compiler(f'{d}/04_func.py', f'{d}/04_func.c', f'{d}/04_func', ir_tmp=f'{d}/04_func_IR.txt', cache=cache)
+    expected = [read(f'{d}/04_func.c'), read(f'{d}/04_func_IR.txt'), execute_program(f'{d}/04_func')]
+    for name in ['04_func.c', '04_func_IR.txt', '04_func']:
+        os.remove(f'{d}/{name}')
+
+    def stage_ran(*args, **kwargs):
+        raise AssertionError("Expect a cache hit to skip every stage")
+    monkeypatch.setattr(compiler_module, 'front_end', stage_ran)
+    monkeypatch.setattr(compiler_module, 'back_end', stage_ran)
+    compiler(f'{d}/04_func.py', f'{d}/04_func.c', f'{d}/04_func', ir_tmp=f'{d}/04_func_IR.txt', cache=cache)
+    assert [read(f'{d}/04_func.c'), read(f'{d}/04_func_IR.txt'), execute_program(f'{d}/04_func')] == expected
+
+    with pytest.raises(AssertionError):
+        compiler(f'{d}/04_func.py', f'{d}/04_func.c', f'{d}/04_func', opt_on=True, cache=cache)
+
+
+def test_compile_cache_eviction(tmp_path):
+    d = './tests/compile'
+    cache = CompileCache(str(tmp_path), max_size=0)
+    compiler(f'{d}/01_simple_types.py', f'{d}/01_simple_types.c', f'{d}/01_simple_types', cache=cache)
+    assert os.listdir(tmp_path) == [], "Expect entries over the size limit to be evicted"
+
+
+def test_runtime_object_replaces_stale(tmp_path):
+    (tmp_path / 'starter-0123456789abcdef.o').write_text('')
+    (tmp_path / 'starter-0123456789abcdef.o.0.tmp.o').write_text('')
+    path = runtime_object(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(path), 'starter-0123456789abcdef.o.0.tmp.o']), \
+        "Expect objects of older runtimes to be removed, and builds in progress left alone"
+
+
+def test_profiler(tmp_path):
+    d = './tests/compile'
+    profiler = Profiler(memory=True)
+    compiler(f'{d}/04_func.py', f'{d}/04_func.c', f'{d}/04_func', ir_tmp=f'{d}/04_func_IR.txt', profiler=profiler)
+    assert [profile.name for profile in profiler.stages] == ['read', 'parse', 'typecheck', 'ir', 'c_ast', 'c_emit', 'gcc']
+    for profile in profiler.stages:
+        assert profile.wall >= 0 and profile.cpu >= 0 and profile.peak_memory >= 0
+    counts = {name: value for profile in profiler.stages for name, value in profile.counts.items()}
+    assert counts['ir_lines'] == len(read(f'{d}/04_func_IR.txt').strip().split('\n'))
+    assert counts['ast_nodes'] > 0 and counts['c_ast_nodes'] > 0
+    assert counts['c_bytes'] == os.path.getsize(f'{d}/04_func.c')
+
+    profiler.write_chrome_trace(tmp_path / 'trace.json')
+    events = json.loads(read(tmp_path / 'trace.json'))['traceEvents']
+    assert [event['name'] for event in events] == [profile.name for profile in profiler.stages]
+
+
+def test_many_temporaries(tmp_path):
+    # Far more lists than the runtime used to be able to track, each function call's freed by its region
+    source = 'def f(n: int) -> int:\n\tl: [int] = [1, 2, 3, n]\n\tm: [int] = l[1:2]\n\treturn n + 1\n\ni: int = 0\nwhile i < 100000:\n\ti = f(i)\nprint(i)\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert execute_program(str(tmp_path / 'program'), input='') == (0, '100000 \n')
+
+
 test_names_error = [f.replace('.py', '') for f in os.listdir(f'./tests/error/') if f.endswith('.py')]
 @pytest.mark.parametrize("test_name", test_names_error)
 def test_error(test_name):
@@ -91,3 +168,46 @@ def test_opt(test_name):
 
     assert output_on == output_off, f"Expect opt_on to be the same as opt_off\n\nGot:\n{output_on=}\n{output_off=}"
 
+
+
+def test_list_slice_views(tmp_path):
+    # Appending to a slice copies it first, so the list it was taken from keeps its elements
+    source = 'a: [int] = [1, 2, 3, 4]\nb: [int] = a[1:3]\nb.append(9)\nc: [int] = a[2:]\nc.append(8)\nprint(b[0])\nprint(b[2])\nprint(a[3])\nprint(c[2])\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert execute_program(str(tmp_path / 'program'), input='') == (0, '2 \n9 \n4 \n8 \n')
+
+
+def test_typed_lists(tmp_path):
+    # Float elements used to be read back through the int member of the union
+    source = 'def second(a: [float]) -> float:\n\treturn a[1]\n\nb: [float] = [1.5, 2.5]\nb.append(0.25)\ns: float = 0.0\nfor x in b:\n\ts = s + x\nprint(s)\nprint(second(b))\nc: [bool] = [True]\nprint(c[0])\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert execute_program(str(tmp_path / 'program'), input='') == (0, '4.250000 \n2.500000 \ntrue \n')
+
+
+def test_print_several_values(tmp_path):
+    # Output is buffered, so it has to be flushed ahead of the runtime error
+    source = 'a: [int] = [1]\nprint(-7, "a", 0.5, False)\nprint(a[0])\nprint(a[3])\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert execute_program(str(tmp_path / 'program'), input='') == \
+        (1, '-7 a 0.500000 false \n1 \nRUNTIME ERROR: Index out of bounds. Trying to access 3, length is 1\n')
+
+
+def test_input_lists(tmp_path):
+    # Prompts are only printed when stdin is a terminal
+    source = 'n: int = input_int()\na: [int] = input_ints(n)\nb: [float] = input_list_float()\nc: [int] = input_list_int()\nprint(a[2], b[1], c[1])\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert execute_program(str(tmp_path / 'program'), input='3\n1 x\n2\n-3\n1.5 -2e1\n\n 7 8 \n') == \
+        (0, 'Invalid input. Please try again.\n-3 -20.000000 8 \n')
+
+
+def test_string_constants(tmp_path):
+    # Every distinct literal is emitted once as static data, its bytes escaped for C
+    source = 's: str = "a\\\\b"\nt: str = "a\\\\b"\nprint(s, t + "ü%d")\n'
+    (tmp_path / 'program.py').write_text(source)
+    compiler(str(tmp_path / 'program.py'), str(tmp_path / 'program.c'), str(tmp_path / 'program'))
+    assert read(str(tmp_path / 'program.c')).count('static const char') == 2
+    assert execute_program(str(tmp_path / 'program'), input='') == (0, 'a\\\\b a\\\\bü%d \n')
@@ -8,18 +8,19 @@ case1 = Block([
 ])
 
 case1_out = """
-#include "../starter.c"
+#include "starter.h"
 
 
 int main() {
+    output_init();
+
 /***** Main *****/
 int_t var1;
-var1 = var1 + var2;
+var1 = (var1 + var2);
 
 /***** End of main *****/
 
-    str_clean_up();
-    list_clean_up();
+    arena_free();
 
     return 0;
 }
@@ -37,24 +38,25 @@ case2 = Block([
 ])
 
 case2_out = """
-#include "../starter.c"
+#include "starter.h"
 
 
 int main() {
+    output_init();
+
 /***** Main *****/
 int_t var1;
-var1 = var1 + var1;
-if (var1 + var1) {
-    var1 = var1 + var2;
+var1 = (var1 + var1);
+if (var1) {
+    var1 = (var1 + var2);
     if (var1) {
-        var1 = var1 + var2;
+        var1 = (var1 + var2);
     }
 }
 
 /***** End of main *****/
 
-    str_clean_up();
-    list_clean_up();
+    arena_free();
 
     return 0;
 }
@@ -75,7 +77,7 @@ case3 = Block([
 ])
 
 case3_out = """
-#include "../starter.c"
+#include "starter.h"
 
 /***** Function declarations *****/
 int_t func1(int_t arg1, int_t arg2);
@@ -83,17 +85,54 @@ int_t func1(int_t arg1, int_t arg2);
 
 /***** Function definitions *****/
 int_t func1(int_t arg1, int_t arg2) {
+    region_t _region_ = region_begin();
+    region_end(_region_);
 } /* End of func1 */
 
 /***** End of function definitions *****/
 
 int main() {
+    output_init();
+
+/***** Main *****/
+
+/***** End of main *****/
+
+    arena_free();
+
+    return 0;
+}
+"""
+
+case4 = Block([
+    NonPrimitiveLiteral(head=Id('_t1_'), type=Type(NonPrimitiveType('list', Type('str_t'))), value=[]),
+    Declaration(Id('lst'), Type(NonPrimitiveType('list', Type('str_t')))),
+    Assignment(Id('lst'), '_t1_'),
+    Declaration(Id('s'), Type('str_t')),
+    Assignment(Id('s'), String('_t1_', 4)),
+    LstAdd(obj=Id('_t1_'), value=Id('s'), type=Type('str_t'), idx='end'),
+])
+
+case4_out = """
+#include "starter.h"
+
+/***** String constants *****/
+static const char _str0_[] = "_t1_";
+/***** End of string constants *****/
+
+
+int main() {
+    output_init();
+
 /***** Main *****/
+str_list_t * lst = str_list_init(0);
+str_t s;
+s = str_literal(_str0_);
+str_list_add(lst, s);
 
 /***** End of main *****/
 
-    str_clean_up();
-    list_clean_up();
+    arena_free();
 
     return 0;
 }
@@ -103,6 +142,7 @@ cases = [
     [case1, case1_out],
     [case2, case2_out],
     [case3, case3_out],
+    [case4, case4_out],
 ]
 
 @pytest.fixture
@@ -116,3 +156,163 @@ def test_main_c_ast(input_data, expected):
     result = CCodeGenerator().generate_code(input_data)
     print(result)
     assert result.strip() == expected.strip()
+
+
+def test_generate_code_to_file_handle():
+    import io
+    out = io.StringIO()
+    assert CCodeGenerator().generate_code(case4, out=out) is None
+    assert out.getvalue().strip() == case4_out.strip()
+
+
+def test_for_range_reserves_appended_lists():
+    case = Block([
+        NonPrimitiveLiteral(head=Id('_t1_'), type=Type(NonPrimitiveType('list', Type('int_t'))), value=[]),
+        Declaration(Id('a'), Type(NonPrimitiveType('list', Type('int_t')))),
+        Assignment(Id('a'), '_t1_'),
+        Declaration(Id('n'), Type('int_t')),
+        Assignment(Id('n'), 'input_int()'),
+        Declaration(Id('_t2_'), Type('int_t')),
+        Assignment(Id('_t2_'), 0),
+        Declaration(Id('i'), Type('int_t')),
+        Assignment(Id('i'), '_t2_'),
+        ForLoopRange(var=Id('i'), rangeVal=RangeValues(stop='n', start='_t2_', step=1), body=Block([
+            LstAdd(obj=Id('a'), value=Id('i'), type=Type('int_t'), idx='end'),
+            LstAdd(obj=Id('a'), value=Id('n'), type=Type('int_t'), idx='end'),
+            NonPrimitiveLiteral(head=Id('_t3_'), type=Type(NonPrimitiveType('list', Type('int_t'))), value=[]),
+            Declaration(Id('b'), Type(NonPrimitiveType('list', Type('int_t')))),
+            Assignment(Id('b'), '_t3_'),
+            LstAdd(obj=Id('b'), value=Id('i'), type=Type('int_t'), idx='end'),
+        ])),
+    ])
+    code_generator = CCodeGenerator()
+    lines = code_generator.generate_code(case).split('\n')
+    # b is created inside the loop, so it cannot be reserved before it
+    assert [line for line in lines if 'list_reserve' in line] == ['int_list_reserve(a, range_length(0, n, 1) * 2);']
+    assert lines.index('int_list_reserve(a, range_length(0, n, 1) * 2);') + 1 == lines.index('for (i = 0; i < n; i += 1){')
+
+
+def test_str_append_in_place():
+    def concat(result, left, right):
+        return [
+            Declaration(Id(result), Type('str_t')),
+            BinaryOperation(left=Id(result), type=Type('str_t'), operator='+', operand_a=Id(left), operand_b=Id(right)),
+        ]
+
+    case = Block([
+        Declaration(Id('_t1_'), Type('str_t')),
+        Assignment(Id('_t1_'), String(val='ab', len=2)),
+        Declaration(Id('s'), Type('str_t')),
+        Assignment(Id('s'), '_t1_'),
+        Declaration(Id('t'), Type('str_t')),
+        Assignment(Id('t'), '_t1_'),
+        *concat('_t2_', 's', '_t1_'),
+        Assignment(Id('s'), '_t2_'),
+        *concat('_t3_', 't', '_t1_'),
+        Assignment(Id('t'), '_t3_'),
+        Declaration(Id('u'), Type('str_t')),
+        Assignment(Id('u'), 't'),
+        Assignment(Id('_t4_'), FunctionCall(name='print_str', lst=['s'])),
+    ])
+    code_generator = CCodeGenerator()
+    lines = code_generator.generate_code(case).split('\n')
+    # t is copied to u, so the two share a buffer that neither can append to in place
+    assert 'str_append(&s, str_literal(_str0_));' in lines
+    assert 't = str_concat(t, str_literal(_str0_));' in lines
+
+
+def test_list_get_unchecked_when_in_bounds():
+    def index(result, idx):
+        return [
+            Declaration(Id(result), Type('int_t')),
+            NonPrimitiveIndex(result=Id(result), obj=Id('a'), type=Type('int_t'), idx=Id(idx)),
+        ]
+
+    def range_loop(stop, body):
+        return ForLoopRange(var=Id('i'), rangeVal=RangeValues(stop=stop, start=0, step=1), body=Block(body))
+
+    case = Block([
+        Declaration(Id('_t1_'), Type('int_t')),
+        Assignment(Id('_t1_'), 7),
+        NonPrimitiveLiteral(head=Id('_t2_'), type=Type(NonPrimitiveType('list', Type('int_t'))), value=[Id('_t1_')] * 3),
+        Declaration(Id('a'), Type(NonPrimitiveType('list', Type('int_t')))),
+        Assignment(Id('a'), '_t2_'),
+        Declaration(Id('i'), Type('int_t')),
+        Assignment(Id('_t4_'), 2),
+        Assignment(Id('_t5_'), 3),
+        *index('x', '_t4_'),
+        *index('y', '_t5_'),
+        range_loop(3, index('z', 'i')),
+        range_loop(4, index('w', 'i')),
+        Declaration(Id('v'), Type('int_t')),
+        ForLoopList(var=Id('v'), indexVar=Id('_t3_'), length=3, Lst=Id('a'), body=Block([])),
+    ])
+    code_generator = CCodeGenerator()
+    lines = [line.strip() for line in code_generator.generate_code(case).split('\n')]
+    assert 'x = list_get_unchecked(a,2);' in lines
+    assert 'y = int_list_get(a,3);' in lines
+    assert 'z = list_get_unchecked(a,i);' in lines
+    # range(4) reaches past the end of a
+    assert 'w = int_list_get(a,i);' in lines
+    assert 'v = list_get_unchecked(a, _index_);' in lines
+
+
+def test_string_constants():
+    assert c_string('say "hi"\\\n\té\x01') == r'"say \"hi\"\\\n\t\303\251\001"'
+
+    case = Block([
+        Declaration(Id('a'), Type('str_t')),
+        Assignment(Id('a'), String(val='ab', len=2)),
+        Declaration(Id('b'), Type('str_t')),
+        Assignment(Id('b'), String(val='cd', len=2)),
+        Assignment(Id('a'), String(val='ab', len=2)),
+    ])
+    lines = CCodeGenerator().generate_code(case).split('\n')
+    # Equal literals share their static data
+    assert [line for line in lines if line.startswith('static')] == \
+        ['static const char _str0_[] = "ab";', 'static const char _str1_[] = "cd";']
+    assert [line for line in lines if line.startswith('a =')] == ['a = str_literal(_str0_);'] * 2
+
+
+def test_written_names():
+    inner = Block([Assignment(Id('x'), 1)])
+    middle = Block([ForLoopRange(var=Id('j'), rangeVal=RangeValues(stop=2, start=0, step=1), body=inner)])
+    outer = Block([ForLoopRange(var=Id('i'), rangeVal=RangeValues(stop=2, start=0, step=1), body=middle),
+                   Assignment(Id('y'), 2)])
+    root = Block([Declaration(Id('x'), Type('int_t')), outer])
+    written = WrittenNames(root)
+    assert [name for name in 'ijxy' if written.writes(outer, name)] == ['i', 'j', 'x', 'y']
+    assert [name for name in 'ijxy' if written.writes(middle, name)] == ['j', 'x']
+    assert [name for name in 'ijxy' if written.writes(inner, name)] == ['x']
+    # Blocks outside of the root are indexed when first asked about
+    assert WrittenNames().writes(middle, 'x')
+
+
+def test_string_parameters_stay_in_their_function():
+    # f's s is a str, g's s is an int, so g adds to it rather than concatenating
+    case = Block([
+        FunctionDeclaration(
+            name=Id('f'),
+            lst=ParameterLst([Parameter(Type('str_t'), Id('s'))]),
+            body=Block([
+                Assignment(Id('_t1_'), FunctionCall(name='print_str', lst=['s'])),
+                ReturnStatement(Id('s')),
+            ]),
+            returnType=Type('str_t'),
+        ),
+        FunctionDeclaration(
+            name=Id('g'),
+            lst=ParameterLst([Parameter(Type('int_t'), Id('s'))]),
+            body=Block([
+                Declaration(Id('_t2_'), Type('int_t')),
+                Assignment(Id('_t2_'), 1),
+                Declaration(Id('_t3_'), Type('int_t')),
+                BinaryOperation(left=Id('_t3_'), type=Type('int_t'), operator='+', operand_a=Id('s'), operand_b=Id('_t2_')),
+                ReturnStatement(Id('_t3_')),
+            ]),
+            returnType=Type('int_t'),
+        ),
+    ])
+    lines = [line.strip() for line in CCodeGenerator().generate_code(case).split('\n')]
+    assert 'int_t _result_ = (s + 1);' in lines
+    assert not any('str_concat' in line for line in lines)
@@ -1,11 +1,13 @@
 import pytest
 import os
 import difflib
+from dataclasses import fields
 from yacc import pythonParser
 from type_checker import TypeChecker, SymbolTable
 from ir_gen import IRGen
 from C_AST_gen import CASTGenerator
 from C_AST import CCodeGenerator
+from compiler import check_if_code_compiles
 
 @pytest.fixture
 def parser():
@@ -20,7 +22,7 @@ test_names = [f.replace('_input.py', '') for f in files if f.endswith('_input.py
 
 def format_parser_output(o):
     import json
-    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **x.__dict__}, indent=2)
+    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **{f.name: getattr(x, f.name) for f in fields(x)}}, indent=2)
 
 
 @pytest.mark.parametrize("test_name", test_names)
@@ -71,10 +73,4 @@ def test_c_gen(parser, test_name):
             except FileNotFoundError:
                 pass
     else:
-        import subprocess
-        proc = subprocess.run(f'gcc ./{test_dir}/{test_name}_received.c -o ./{test_dir}/{test_name}_received', shell=True, stdout=subprocess.PIPE, universal_newlines=True)
-        print("----- stderr -----")
-        print(proc.stderr)
-        print("----- stdout -----")
-        print(proc.stdout)
-        assert proc.returncode == 0, f"gcc return code was {proc.returncode}"
+        check_if_code_compiles(f'./{test_dir}/{test_name}_received.c', f'./{test_dir}/{test_name}_received')
@@ -0,0 +1,75 @@
+import json
+import pytest
+from yacc import pythonParser
+from type_checker import TypeChecker, SymbolTable
+from ir_gen import IRGen
+from cfg import build_cfg, cfg_to_json, cfg_to_str
+
+
+@pytest.fixture(scope='module')
+def parser():
+    p = pythonParser()
+    p.build()
+    return p
+
+
+def generate_cfg(parser, source):
+    blocks = parser.parse(source)
+    st = SymbolTable()
+    tc = TypeChecker()
+    for block in blocks:
+        tc.typecheck(block, st)
+    ir_generator = IRGen()
+    ir_generator.generate_IR(blocks)
+    return build_cfg(ir_generator.IR)
+
+
+def block_of(cfg, label):
+    return cfg.block_of_label[next(name for name in cfg.block_of_label if label in name)]
+
+
+NESTED = 's: int = 0\nfor i in range(3):\n\tj: int = 0\n\twhile j < i:\n\t\tif j > 1:\n\t\t\ts = s + j\n\t\tj = j + 1\nprint(s)\nwhile s > 100:\n\ts = s - 1\n'
+
+
+def test_dominators(parser):
+    cfg = generate_cfg(parser, NESTED)
+    for_head, while_head = block_of(cfg, 'FORRANGE'), block_of(cfg, 'WHILE_3')
+    assert cfg.blocks[0].idom is None
+    assert all(cfg.dominates(0, block.index) for block in cfg.blocks)
+    assert cfg.dominates(for_head, while_head) and not cfg.dominates(while_head, for_head)
+    # The if's two arms meet again below it, so neither of them dominates the join
+    then_block, else_block = cfg.blocks[block_of(cfg, 'L_6')].predecessors
+    assert cfg.blocks[block_of(cfg, 'L_6')].idom == cfg.blocks[then_block].idom == cfg.blocks[else_block].idom
+
+
+def test_loop_nesting(parser):
+    cfg = generate_cfg(parser, NESTED)
+    for_head, while_head, last_head = block_of(cfg, 'FORRANGE'), block_of(cfg, 'WHILE_3'), block_of(cfg, 'WHILE_7')
+    assert [(loop.header, loop.depth) for loop in cfg.loops] == [(for_head, 1), (while_head, 2), (last_head, 1)]
+    assert cfg.loops[1].parent == 0 and cfg.loops[2].parent is None
+    assert set(cfg.loops[1].blocks) < set(cfg.loops[0].blocks)
+    assert [cfg.loop_depth(index) for index in (0, for_head, while_head, block_of(cfg, 'L_6'), last_head)] == [0, 1, 2, 2, 1]
+    assert cfg.loop_depth(block_of(cfg, 'L_8')) == 0
+
+
+def test_unreachable_and_function_blocks(parser):
+    source = 'def f(p: int) -> int:\n\twhile p > 0:\n\t\treturn p\n\treturn 0\n\nprint(f(2))\n'
+    cfg = generate_cfg(parser, source)
+    function = cfg.entries[1]
+    assert cfg.blocks[function].idom is None
+    # The jump back to the head of the loop comes after the return, so nothing reaches it
+    unreachable = [block.index for block in cfg.blocks if not block.predecessors and block.index not in cfg.entries]
+    assert len(unreachable) == 1 and cfg.blocks[unreachable[0]].idom is None
+    assert not cfg.dominates(function, unreachable[0])
+    assert cfg.loops == []
+    assert not cfg.dominates(0, function) and not cfg.dominates(function, 0)
+
+
+def test_serialize(parser):
+    cfg = generate_cfg(parser, NESTED)
+    data = json.loads(json.dumps(cfg_to_json(cfg)))
+    assert [block['successors'] for block in data['blocks']] == [block.successors for block in cfg.blocks]
+    assert [loop['header'] for loop in data['loops']] == [loop.header for loop in cfg.loops]
+    text = cfg_to_str(cfg)
+    assert text.startswith('B0 entry: preds - succs B1 idom - loop -\n')
+    assert 'L1: header B3 latches B7 parent L0 depth 2 blocks B3 B4 B5 B6 B7\n' in text
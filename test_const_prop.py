@@ -0,0 +1,71 @@
+import pytest
+from yacc import pythonParser
+from type_checker import TypeChecker, SymbolTable
+from ir_gen import IRGen, IR_PrimitiveLiteral, IR_Argument_VAL, IR_BinaryOperation
+from cfg import build_cfg
+from const_prop import propagate_constants, fold_binary
+
+
+@pytest.fixture(scope='module')
+def parser():
+    p = pythonParser()
+    p.build()
+    return p
+
+
+def generate_ir(parser, source):
+    blocks = parser.parse(source)
+    st = SymbolTable()
+    tc = TypeChecker()
+    for block in blocks:
+        tc.typecheck(block, st)
+    ir_generator = IRGen()
+    ir_generator.generate_IR(blocks)
+    return ir_generator.IR
+
+
+def printed(ir):
+    """ Value of every argument that is a literal, None for the others """
+    literals = {ir_line.reg: ir_line.val for ir_line in ir if isinstance(ir_line, IR_PrimitiveLiteral)}
+    return [literals.get(ir_line.reg) for ir_line in ir if isinstance(ir_line, IR_Argument_VAL)]
+
+
+def test_fold_like_c():
+    assert fold_binary('/', ('int_t', -7), ('int_t', 2), 'int_t') == -3
+    assert fold_binary('%', ('int_t', -7), ('int_t', 2), 'int_t') == -1
+    assert fold_binary('/', ('int_t', 7), ('float_t', 2.0), 'float_t') == 3.5
+    assert fold_binary('and', ('bool_t', True), ('bool_t', True), 'int_t') == 1
+    assert fold_binary('<', ('int_t', 1), ('float_t', 1.5), 'bool_t') is True
+    # Left to the C code: division by zero, overflow and operators gcc rejects on floats
+    assert fold_binary('/', ('int_t', 1), ('int_t', 0), 'int_t') is None
+    assert fold_binary('*', ('int_t', 2 ** 62), ('int_t', 2), 'int_t') is None
+    assert fold_binary('%', ('float_t', 1.0), ('float_t', 2.0), 'float_t') is None
+
+
+def test_propagate_constants(parser):
+    source = 'a: int = -7\nb: int = a / 2\nt: bool = True\nx: bool = t and False\nprint(b, a % 2, x)\n'
+    assert printed(propagate_constants(generate_ir(parser, source))) == [-3, -1, 0]
+
+
+def test_branches_that_never_run(parser):
+    # n is only reassigned in a branch that never runs, so it is still 3 after the if
+    source = 'n: int = 3\nif n > 5:\n\tn = 1\nprint(n)\nwhile n < 2:\n\tn = 0\nprint(n)\n'
+    assert printed(propagate_constants(generate_ir(parser, source))) == [3, 3]
+
+
+def test_loops_are_not_folded(parser):
+    source = 'j: int = 0\nwhile j < 5:\n\tj = j + 1\nprint(j)\ns: int = 0\nfor i in range(3):\n\ts = s + 2\nprint(s)\n'
+    ir = propagate_constants(generate_ir(parser, source))
+    assert printed(ir) == [None, None]
+    assert [ir_line.left_reg for ir_line in ir if isinstance(ir_line, IR_BinaryOperation) and ir_line.operator == '+'] == ['j', 's']
+
+
+def test_functions_are_entries(parser):
+    source = 'def f(p: int) -> int:\n\tw: int = 4\n\treturn p + w\n\nw: int = 1\nprint(f(w))\n'
+    ir = generate_ir(parser, source)
+    cfg = build_cfg(ir)
+    function = [block for block in cfg.blocks if block.function is not None]
+    assert [block.index for block in function][:1] == [cfg.entries[1]]
+    assert all(successor in [block.index for block in function] for block in function for successor in block.successors)
+    # The w of the program is passed to f, the w of f is its own
+    assert printed(propagate_constants(ir)) == [1, None]
@@ -1,6 +1,7 @@
 import pytest
 import os
 import difflib
+from dataclasses import fields
 from yacc import pythonParser
 from type_checker import TypeChecker, SymbolTable
 from ir_gen import IRGen
@@ -18,7 +19,7 @@ test_names = [f.replace('_input.py', '') for f in files if f.endswith('_input.py
 
 def format_parser_output(o):
     import json
-    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **x.__dict__}, indent=2)
+    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **{f.name: getattr(x, f.name) for f in fields(x)}}, indent=2)
 
 
 @pytest.mark.parametrize("test_name", test_names)
@@ -1,5 +1,5 @@
 import pytest
-from lex import pythonLexer
+from lex import pythonLexer, indentTracker
 
 @pytest.fixture
 def lexer():
@@ -58,3 +58,10 @@ def test_lex_simple_token(lexer, input_data, expected):
         result = lexer.test(input_data)
         assert len(result) == 1, f"Expect 1, got {len(result)}: {[x.type for x in result]}"
         assert result[0].type == expected, f"Expect {expected}, got {result[0].type}"
+
+
+def test_indent_tracker():
+    tracker = indentTracker()
+    assert [tracker.track(t) for t in [0, 1, 2, 2, 0, 1, 3, 1]] == [
+        [], ['INDENT'], ['INDENT'], [], ['DEDENT', 'DEDENT'], ['INDENT'], ['INDENT'], ['DEDENT'],
+    ]
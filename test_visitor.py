@@ -0,0 +1,36 @@
+import pytest
+from visitor import Visitor
+from AST import Id, PrimitiveLiteral
+from C_AST import CCodeGenerator
+
+
+class Names(Visitor):
+    prefix = 'name_'
+
+    def name_Id(self, node, suffix=''):
+        return node.name + suffix
+
+
+class Upper(Names):
+    def name_Id(self, node, suffix=''):
+        return node.name.upper() + suffix
+
+
+def test_dispatch():
+    assert Names().visit(Id('a'), '!') == 'a!'
+    assert Names.dispatch_table == {Id: Names.name_Id}
+    # A subclass keeps its own table, so overriding methods works
+    assert Upper().visit(Id('a')) == 'A'
+    assert Names().visit(Id('b')) == 'b'
+    with pytest.raises(NotImplementedError, match='Missing function name_PrimitiveLiteral'):
+        Names().visit(PrimitiveLiteral('int', 1))
+
+
+def test_errors_are_not_hidden():
+    # An AttributeError raised by a method reaches the caller as it is
+    class Broken(CCodeGenerator):
+        def gen_Id(self, node):
+            return node.missing
+
+    with pytest.raises(AttributeError, match='missing'):
+        Broken().gen(Id('a'))
@@ -1,6 +1,7 @@
 import pytest
 import os
 import difflib
+from dataclasses import fields
 from yacc import pythonParser
 
 @pytest.fixture
@@ -16,7 +17,7 @@ test_names = [f.replace('_input.py', '') for f in files if f.endswith('_input.py
 
 def format_parser_output(o):
     import json
-    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **x.__dict__}, indent=2)
+    return json.dumps(o, default=lambda x: { 'NODE': x.__class__.__name__, **{f.name: getattr(x, f.name) for f in fields(x)}}, indent=2)
 
 
 @pytest.mark.parametrize("test_name", test_names)
@@ -49,3 +50,80 @@ def test_main_yacc(parser, test_name):
                 pass
     else:
         raise AssertionError(f'Missing output file')
+
+
+def test_cached_parse_tables(tmp_path):
+    cold = pythonParser()
+    cold.build(cache_dir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 1, "Expect the parse tables to be cached"
+    warm = pythonParser()
+    warm.build(cache_dir=tmp_path)
+    for test_name in test_names:
+        with open(f'./{test_dir}/{test_name}_input.py', 'r') as f:
+            input_str = f.read()
+        assert format_parser_output(warm.parse(input_str)) == format_parser_output(cold.parse(input_str))
+
+
+def test_unreadable_parse_tables(tmp_path):
+    import pickle
+    import yacc
+    path = tmp_path / 'parsetab.pickle'
+    # Tables from another version of the parser, of any shape, are rebuilt rather than failing the compile
+    stale_tables = [
+        pickle.dumps({'action': {}}),
+        pickle.dumps((yacc.PARSETAB_VERSION, {}, {}, [1])),
+        # Classes that are gone or were never there
+        b'cyacc\nNoSuchClass\n.',
+        b'cno_such_module\nTable\n.',
+        b'not a pickle',
+    ]
+    for stale in stale_tables:
+        path.write_bytes(stale)
+        assert yacc.read_parsetab(path) is None
+
+
+def test_shared_parser_built_once(monkeypatch):
+    import time
+    import yacc
+    from concurrent.futures import ThreadPoolExecutor
+    builds = []
+    build = pythonParser.build
+
+    def slow_build(self, *args, **kwargs):
+        builds.append(self)
+        time.sleep(0.05)
+        return build(self, *args, **kwargs)
+    monkeypatch.setattr(yacc, 'shared_parser', None)
+    monkeypatch.setattr(pythonParser, 'build', slow_build)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        parsers = list(pool.map(lambda _: yacc.get_shared_parser(), range(8)))
+    assert len(builds) == 1 and all(parser is parsers[0] for parser in parsers)
+
+
+def test_concurrent_parses(parser):
+    from concurrent.futures import ThreadPoolExecutor
+    sources = []
+    for directory in [test_dir, 'tests_c_gen', 'tests/compile']:
+        for name in sorted(os.listdir(f'./{directory}/')):
+            if name.endswith('.py'):
+                with open(f'./{directory}/{name}', 'r') as f:
+                    # Comments are stripped before parsing, as in the other stages' tests
+                    sources.append('\n'.join(line for line in f.read().split('\n') if not line.startswith('#')))
+    sources = sources * -(-500 // len(sources))
+    expected = [format_parser_output(parser.parse(source)) for source in sources]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        received = list(pool.map(lambda source: format_parser_output(parser.parse(source)), sources))
+    assert len(received) >= 500
+    assert received == expected
+
+
+def test_compact_nodes(parser):
+    import pickle
+    import sys
+    blocks = parser.parse('count: int = 1\ncount = count >= 2\n')
+    assignment = blocks[1]
+    assert not hasattr(assignment, '__dict__')
+    # Every use of a name, and every operator, shares one string
+    assert blocks[0].left.name is assignment.left.name is assignment.right.left.name is sys.intern('count')
+    assert assignment.right.operator is sys.intern('>=')
+    assert pickle.loads(pickle.dumps(blocks)) == blocks
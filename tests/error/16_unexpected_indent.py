@@ -0,0 +1,4 @@
+# Statement indented without an enclosing block
+# Parser Error: Unexpected indent
+a: int = 1
+	b: int = 2
@@ -0,0 +1,26 @@
+a: int = -7
+b: int = 2
+q: int = a / b
+r: int = a % b
+t: bool = True
+f: bool = False
+x: bool = t and f
+y: bool = t & f
+j: int = 0
+while j < 5:
+	j = j + 1
+n: int = 3
+if n > 5:
+	n = 1
+elif n == 3:
+	n = n * 4
+else:
+	n = 0
+s: int = 0
+for i in range(n):
+	s = s + i
+
+print(q, r)
+print(x, y)
+print(j)
+print(n, s)
@@ -0,0 +1,10 @@
+a:int = 1
+if a == 1:
+	b:int = 1
+elif a == 2:
+	if a == 3:
+		c:int = 1
+elif a == 4:
+	d:int = 2
+else:
+	e:int = 3
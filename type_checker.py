@@ -2,22 +2,20 @@ import AST
 from AST import Type, PrimitiveType, NonPrimitiveType
 from symbol_table import SymbolTable, ParseError
 from typing import Union
+from visitor import Visitor
 
-class TypeChecker:
+class TypeChecker(Visitor):
+    prefix = 'check_'
 
     def do_typecheck(self,nodes,st=None):
         for node in nodes:
             self.typecheck(node,st)
 
     def typecheck(self, node, st=None) -> Union[Type, None]:
-        method = 'check_' + node.__class__.__name__
-        result_type = getattr(self, method, self.generic_typecheck)(node, st)
+        result_type = self.visit(node, st)
         assert isinstance(result_type, AST.Type) or result_type is None, f"Got: {result_type}"
         return result_type
 
-    def generic_typecheck(self, node, st=None):
-        raise Exception(f"Missing function check_{node.__class__.__name__}. Trying to process {node}")
-
     def check_FunctionDef(self, node: AST.FunctionDef, st: SymbolTable):
         param_lst = node.lst.lst or []
 
@@ -45,6 +43,9 @@ class TypeChecker:
             for argument_expression in node.lst.lst:
                 arg_types.append(self.typecheck(argument_expression, st))
 
+        if node.name.name == 'print' and len(arg_types) > 1:
+            # print(a, b, ...) prints every value on one line, so each has to be printable
+            return [st.lookup_function('print', [arg_type]) for arg_type in arg_types][0]
         return st.lookup_function(node.name.name, arg_types)
 
 
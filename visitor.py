@@ -0,0 +1,32 @@
+class Visitor:
+    """
+    Base of the compiler stages that walk a tree or list of nodes. visit(node)
+    calls the method named prefix + the class name of the node, such as
+    gen_BinaryOperation. Each visitor class looks the method up once per class
+    of node and keeps it in its dispatch table, rather than building the name
+    and calling getattr on every visit.
+    """
+    prefix = 'visit_'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Method of every node class visited so far. Subclasses can override
+        # methods, so each class has a table of its own
+        cls.dispatch_table = {}
+
+    def visit(self, node, *args):
+        try:
+            method = self.dispatch_table[node.__class__]
+        except KeyError:
+            method = self.dispatch_table[node.__class__] = self.find_method(node.__class__)
+        return method(self, node, *args)
+
+    @classmethod
+    def find_method(cls, node_class):
+        name = cls.prefix + node_class.__name__
+        method = getattr(cls, name, None)
+        if method is None:
+            def missing(self, node, *args):
+                raise NotImplementedError(f"Missing function {name}. Trying to process {node}")
+            return missing
+        return method
@@ -1,56 +1,126 @@
 from ply import yacc
-from lex import pythonLexer
+from ply import __version__ as ply_version
+from lex import pythonLexer, indentTracker
 from lex import tokens
-from dataclasses import dataclass
 import argparse
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import threading
 import AST
 
-
-@dataclass
-class statementNode():
-    lineNo: int
-    tabCount: int
-    astNode: AST.Node
-
-    def __init__(self, lineNo, tabCount, astNode):
-        self.lineNo = lineNo
-        self.tabCount = tabCount
-        self.astNode = astNode
-
-
-lst_stack = []
-tup_stack = []
-
-statementNodeLst = []
-
-final_result = []
-
-
-def statementBodyGenerator():
-    stack = []
-    current_statement_with_body = None  # the statement that is being considered for any child statements
-    expected_tab_count = 0
-    statements_with_body = ["IfStmt", "ElifStmt", "ElseStmt", "WhileStmt", "ForLoopRange", "ForLoopList", "FunctionDef"]
-    for statement in statementNodeLst:
-        if statement.tabCount == expected_tab_count and current_statement_with_body != None:
-            current_statement_with_body.astNode.body.lst.append(statement.astNode)
-        elif statement.tabCount < expected_tab_count:
-            while stack and statement.tabCount <= current_statement_with_body.tabCount:
-                current_statement_with_body = stack.pop()
-            if statement.tabCount > current_statement_with_body.tabCount:
-                expected_tab_count = statement.tabCount
-                current_statement_with_body.astNode.body.lst.append(statement.astNode)
-                stack.append(current_statement_with_body)
-
-        if statement.tabCount == 0:
-            final_result.append(statement.astNode)
-        if statement.astNode.__class__.__name__ in statements_with_body:
-            stack.append(statement)
-            current_statement_with_body = statement
-            if current_statement_with_body.astNode.body == None:
-                current_statement_with_body.astNode.body = AST.Block(lst=[])
-            expected_tab_count += 1
-    return final_result
+# Bump whenever the layout of the cached parse tables changes
+PARSETAB_VERSION = 1
+PARSETAB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+
+class blockBuilder():
+    """
+    Builds the nested AST.Block structure while parsing. Statements with a
+    body get it from open_block() in their grammar action, and every
+    statement is placed in its block by add() as soon as it is reduced
+    """
+    def __init__(self):
+        self.indent = indentTracker()
+        self.result = []
+        # statement lists of the enclosing blocks, innermost last
+        self.blocks = [self.result]
+        # body opened by the statement being parsed
+        self.opened = None
+        # body of the previous statement, waiting for an INDENT
+        self.pending = None
+
+    def open_block(self):
+        self.opened = AST.Block(lst=[])
+        return self.opened
+
+    def add(self, lineNo, tabCount, node):
+        for event in self.indent.track(tabCount):
+            if event == 'DEDENT':
+                self.blocks.pop()
+            elif self.pending is None:
+                raise Exception(f"Unexpected indent at line={lineNo}")
+            else:
+                self.blocks.append(self.pending.lst)
+                self.pending = None
+        self.blocks[-1].append(node)
+        self.pending, self.opened = self.opened, None
+
+
+class parseContext():
+    """
+    Everything a single parse mutates. Grammar actions reach it through
+    p.lexer.context, so any number of parses can run at the same time
+    """
+    def __init__(self, lexer):
+        self.lexer = lexer
+        lexer.context = self
+        self.lst_stack = []
+        self.tup_stack = []
+        self.builder = blockBuilder()
+
+
+class parseTable:
+    """
+    LR tables in the shape yacc.LRParser expects. They are only read while
+    parsing, so every parse shares them
+    """
+    def __init__(self, action, goto, productions):
+        self.lr_action = action
+        self.lr_goto = goto
+        self.lr_productions = productions
+
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+
+def grammar_signature(module):
+    """
+    Hash of everything the LR tables are generated from: the grammar rule
+    docstrings, precedence, start symbol and tokens
+    """
+    parts = [str(PARSETAB_VERSION), ply_version, module.start, repr(module.precedence), ' '.join(tokens)]
+    for name in sorted(dir(module)):
+        if name.startswith('p_'):
+            parts.append(name + ':' + (getattr(module, name).__doc__ or ''))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def parsetab_path(module, cache_dir=None):
+    return os.path.join(cache_dir or PARSETAB_DIR, f'parsetab-{grammar_signature(module)[:16]}.pickle')
+
+
+def read_parsetab(path):
+    # The cache is only advisory: any table that cannot be read, stale or
+    # from another version, is rebuilt instead
+    try:
+        with open(path, 'rb') as f:
+            version, action, goto, productions = pickle.load(f)
+        if version != PARSETAB_VERSION:
+            return None
+        return parseTable(action, goto, [yacc.Production(number, *production) for number, production in enumerate(productions)])
+    except Exception:
+        return None
+
+
+def write_parsetab(path, table):
+    productions = [(p.name, p.prod, p.prec, p.func, p.file, p.line) for p in table.lr_productions]
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((PARSETAB_VERSION, table.lr_action, table.lr_goto, productions), f, pickle.HIGHEST_PROTOCOL)
+        # Atomic, so concurrent builds never read a half written table
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is only an optimization, a read-only location just means a cold build every time
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 
 class pythonParser:
@@ -73,7 +143,8 @@ class pythonParser:
         """block    : block statement
                      | statement"""
         if len(p) == 3:
-            p[0] = p[1] + [p[2]]
+            p[1].append(p[2])
+            p[0] = p[1]
         else:
             p[0] = [p[1]]
 
@@ -134,13 +205,13 @@ class pythonParser:
                         | expression OR expression
                         | expression AND expression
                         | expression XOR expression"""
-        p[0] = AST.BinaryOperation(left=p[1], operator=p[2], right=p[3])
+        p[0] = AST.BinaryOperation(left=p[1], operator=sys.intern(p[2]), right=p[3])
 
     def p_expr_unary(self, p):
         """
         expression  : MINUS expression %prec UNARY
                     | NOT expression %prec UNARY"""
-        p[0] = AST.UnaryOperation(operator=p[1], right=p[2])
+        p[0] = AST.UnaryOperation(operator=sys.intern(p[1]), right=p[2])
 
     def p_lst_empty(self, p):
         """
@@ -152,7 +223,7 @@ class pythonParser:
         """
         list    : LBRACKET expression
         """
-        global lst_stack
+        lst_stack = p.lexer.context.lst_stack
         if not p[2]:
             lst = AST.NonPrimitiveLiteral(name='list', children=[lst_stack[-1].children.pop()])
         else:
@@ -163,7 +234,7 @@ class pythonParser:
         """
         list    : list COMMA expression
         """
-        global lst_stack
+        lst_stack = p.lexer.context.lst_stack
         if p[3]:
             lst_stack[-1].children.append(p[3])
 
@@ -171,7 +242,7 @@ class pythonParser:
         """
         expression      : list RBRACKET
         """
-        global lst_stack
+        lst_stack = p.lexer.context.lst_stack
         if len(lst_stack) > 1:
             lst_stack[-2].children.append(lst_stack.pop())
         else:
@@ -188,7 +259,7 @@ class pythonParser:
         tuple   : LPAREN expression COMMA expression
         """
         # tuple must have either 0 or more than 1 expression
-        global tup_stack
+        tup_stack = p.lexer.context.tup_stack
         if not p[2]:
             tup = AST.NonPrimitiveLiteral(name='tuple', children=[tup_stack[-1].children.pop()])
         else:
@@ -199,7 +270,7 @@ class pythonParser:
         """
         tuple   : tuple COMMA expression
         """
-        global tup_stack
+        tup_stack = p.lexer.context.tup_stack
         if p[3]:
             tup_stack[-1].children.append(p[3])
 
@@ -207,7 +278,7 @@ class pythonParser:
         """
         expression      : tuple RPAREN
         """
-        global tup_stack
+        tup_stack = p.lexer.context.tup_stack
         if len(tup_stack) > 1:
             tup_stack[-2].children.append(tup_stack.pop())
         else:
@@ -225,12 +296,13 @@ class pythonParser:
                      | assignment
                      | expression NEWLINE
         """
+        state = p.lexer.state
         # get current line number
-        lineNo = self.lexer.lexLineNo[0]
-        tabCount = self.lexer.getTabCount(lineNo)
-        statementNodeLst.append(statementNode(lineNo, tabCount, p[1]))
+        lineNo = state.lexLineNo[0]
+        tabCount = state.getTabCount(lineNo)
+        p.lexer.context.builder.add(lineNo, tabCount, p[1])
         # update current line number
-        self.lexer.lexLineNo[0] = self.lexer.lexLineNo[1]
+        state.lexLineNo[0] = state.lexLineNo[1]
         p[0] = p[1]
 
     def p_statement_no_new_line(self, p):
@@ -246,7 +318,7 @@ class pythonParser:
 
     def p_function_dec(self, p):
         """function_dec : DEF ID LPAREN parameter_or_empty RPAREN FUNCTIONANNOTATION type COLON"""
-        p[0] = AST.FunctionDef(name=AST.Id(name=p[2]), lst=p[4], body=None, returnType=p[7])
+        p[0] = AST.FunctionDef(name=AST.Id(name=p[2]), lst=p[4], body=p.lexer.context.builder.open_block(), returnType=p[7])
 
     def p_parameter_or_empty(self, p):
         """parameter_or_empty : parameter_lst
@@ -295,19 +367,19 @@ class pythonParser:
 
     def p_if_statement(self, p):
         """if_statement : IF expression COLON"""
-        p[0] = AST.IfStmt(ifCond=p[2], body=None)
+        p[0] = AST.IfStmt(ifCond=p[2], body=p.lexer.context.builder.open_block())
 
     def p_elif_statement(self, p):
         """elif_statement : ELIF expression COLON"""
-        p[0] = AST.ElifStmt(elifCond=p[2], body=None)
+        p[0] = AST.ElifStmt(elifCond=p[2], body=p.lexer.context.builder.open_block())
 
     def p_else_statement(self, p):
         """else_statement : ELSE COLON"""
-        p[0] = AST.ElseStmt(body=None)
+        p[0] = AST.ElseStmt(body=p.lexer.context.builder.open_block())
 
     def p_for_loop_range(self, p):
         """for_loop_range : FOR ID IN range COLON"""
-        p[0] = AST.ForLoopRange(var=AST.Id(name=p[2]), rangeVal=p[4], body=None)
+        p[0] = AST.ForLoopRange(var=AST.Id(name=p[2]), rangeVal=p[4], body=p.lexer.context.builder.open_block())
 
     def p_range(self, p):
         """range : RANGE LPAREN expression RPAREN
@@ -324,11 +396,11 @@ class pythonParser:
     # for list and tuples
     def p_for_loop_lst(self, p):
         """for_loop_lst : FOR ID IN expression COLON"""
-        p[0] = AST.ForLoopList(var=AST.Id(name=p[2]), Lst=p[4], body=None)
+        p[0] = AST.ForLoopList(var=AST.Id(name=p[2]), Lst=p[4], body=p.lexer.context.builder.open_block())
 
     def p_while_statement(self, p):
         """while_statement : WHILE expression COLON"""
-        p[0] = AST.WhileStmt(cond=p[2], body=None)
+        p[0] = AST.WhileStmt(cond=p[2], body=p.lexer.context.builder.open_block())
 
     def p_assignment(self, p):
         """assignment :  ID ASSIGN expression NEWLINE
@@ -375,21 +447,66 @@ class pythonParser:
         pass
 
     def p_error(self, p):
-        raise Exception(f"Unable to parse at line={self.lexer.lexLineNo[1]} col={self.lexer.lexLineNo[0]}. At token" + str(p))
+        # PLY requires p_error while generating the tables,
+        # parse() reports errors through syntax_error with the parse context instead
+        raise Exception("Unable to parse. At token" + str(p))
+
+    def syntax_error(self, context, p):
+        lexLineNo = context.lexer.state.lexLineNo
+        raise Exception(f"Unable to parse at line={lexLineNo[1]} col={lexLineNo[0]}. At token" + str(p))
+
+    def build(self, debug=False, cache=True, cache_dir=None, **kwargs):
+        """
+        Build the lexer and the LR tables.
 
-    def build(self, **kwargs):
+        The LR tables are loaded from the parse table cache when the grammar is
+        unchanged, and generated and stored otherwise. debug=True always
+        regenerates the tables and writes the parser.out report.
+        """
         self.tokens = tokens
         self.lexer = pythonLexer()
         self.lexer.build()
-        self.parser = yacc.yacc(module=self, debug=True, **kwargs)
+        if debug or not cache:
+            parser = yacc.yacc(module=self, debug=debug, **kwargs)
+            self.table = parseTable(parser.action, parser.goto, parser.productions)
+            return
+        path = parsetab_path(self, cache_dir)
+        self.table = read_parsetab(path)
+        if self.table is None:
+            parser = yacc.yacc(module=self, debug=False, **kwargs)
+            self.table = parseTable(parser.action, parser.goto, parser.productions)
+            write_parsetab(path, self.table)
+            return
+        self.table.bind_callables({name: getattr(self, name) for name in dir(self) if name.startswith('p_')})
 
     def parse(self, data):
-        statementNodeLst.clear()
-        final_result.clear()
-        result = self.parser.parse(data)
-        statementBodyGenerator()
-        self.lexer.clearTabCount()
-        return final_result
+        """
+        Parse data into a list of top level AST nodes. Safe to call from many
+        threads at once: each call gets its own lexer, LR parser and parse context
+        """
+        context = parseContext(self.lexer.new_lexer())
+        parser = yacc.LRParser(self.table, functools.partial(self.syntax_error, context))
+        parser.parse(data, lexer=context.lexer)
+        return context.builder.result
+
+
+shared_parser = None
+shared_parser_lock = threading.Lock()
+
+
+def get_shared_parser():
+    """
+    The process-wide parser, built on first use. The lock makes concurrent
+    first calls build it once
+    """
+    global shared_parser
+    if shared_parser is None:
+        with shared_parser_lock:
+            if shared_parser is None:
+                parser = pythonParser()
+                parser.build()
+                shared_parser = parser
+    return shared_parser
 
 
 if __name__ == "__main__":